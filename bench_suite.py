@@ -0,0 +1,233 @@
+"""
+In-process benchmark suite with regression gating.
+
+Times the prediction entry points directly (no HTTP server): single-config
+predictions, predict_batch_metrics from 1 to 10^6 rows, and the
+optimize_parameters, sensitivity_analysis and simulate_dashboard handlers.
+Every case reports p50/p95/p99 latency and rows/sec, and the results are
+written as JSON.
+
+    python bench_suite.py                              # run, write bench_results.json
+    python bench_suite.py --update-baseline            # also store as the baseline
+    python bench_suite.py --baseline bench_baseline.json --threshold 0.25
+
+With a baseline, the run fails (exit code 1) when any case's gated
+percentile is more than `threshold` slower than in the baseline. Baselines
+are machine-specific: record them on the machine that runs the gate.
+"""
+import argparse
+import gc
+import json
+import os
+import platform
+import sys
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+import numpy as np
+
+BATCH_SIZES = [1, 10, 100, 1_000, 10_000, 100_000, 1_000_000]
+DEFAULT_OUTPUT = "bench_results.json"
+DEFAULT_BASELINE = "bench_baseline.json"
+DEFAULT_THRESHOLD = 0.25
+GATED_METRIC = "p50_ms"
+
+# Distinct configs cycled through by the batch cases
+CONFIG_POOL_SIZE = 4096
+
+
+class BenchCase:
+    """
+    One timed call. `setup` runs before every repetition, outside the timer.
+    """
+
+    def __init__(self, name: str, rows: int, run: Callable[[], Any], repeats: int,
+                 setup: Optional[Callable[[], None]] = None):
+        self.name = name
+        self.rows = rows
+        self.run = run
+        self.repeats = repeats
+        self.setup = setup
+
+
+def summarize(latencies_s: List[float], rows: int) -> Dict[str, float]:
+    latencies_ms = np.asarray(latencies_s) * 1e3
+    p50, p95, p99 = np.percentile(latencies_ms, [50, 95, 99])
+    return {
+        "rows": rows,
+        "repeats": len(latencies_ms),
+        "p50_ms": float(p50),
+        "p95_ms": float(p95),
+        "p99_ms": float(p99),
+        "mean_ms": float(latencies_ms.mean()),
+        "rows_per_s": float(rows / (p50 / 1e3)) if p50 > 0 else float("inf")
+    }
+
+
+def time_case(case: BenchCase, warmup: int = 1) -> Dict[str, float]:
+    for _ in range(warmup):
+        if case.setup:
+            case.setup()
+        case.run()
+
+    gc.collect()
+    latencies = []
+    for _ in range(case.repeats):
+        if case.setup:
+            case.setup()
+        start = time.perf_counter()
+        case.run()
+        latencies.append(time.perf_counter() - start)
+    return summarize(latencies, case.rows)
+
+
+def repeats_for(rows: int, budget_rows: int = 2_000_000, lo: int = 3, hi: int = 200) -> int:
+    """
+    Fewer repetitions for bigger batches so each case costs about the same.
+    """
+    return int(max(lo, min(hi, budget_rows // max(rows, 1))))
+
+
+def build_cases(max_rows: int = BATCH_SIZES[-1]) -> List[BenchCase]:
+    import main
+    from sample_configs import BASE_CONFIG, random_configs
+
+    pool = random_configs(CONFIG_POOL_SIZE, seed=0)
+    base = main.OSISInput(**BASE_CONFIG)
+    cursor = {"i": 0}
+
+    def next_config():
+        cursor["i"] = (cursor["i"] + 1) % len(pool)
+        return pool[cursor["i"]]
+
+    cases = [
+        BenchCase("predict_full_metrics/uncached", 1,
+                  lambda: main.predict_full_metrics(next_config()), repeats=500,
+                  setup=main.prediction_cache.clear),
+        BenchCase("predict_full_metrics/cached", 1,
+                  lambda: main.predict_full_metrics(BASE_CONFIG), repeats=2000)
+    ]
+
+    for rows in [n for n in BATCH_SIZES if n <= max_rows]:
+        # Batches larger than the pool repeat its configs (the list holds
+        # references, so a 10^6-row batch does not copy 10^6 dicts)
+        candidates = (pool * (rows // len(pool) + 1))[:rows]
+        cases.append(BenchCase(
+            f"predict_batch_metrics/{rows}", rows,
+            lambda candidates=candidates: main.predict_batch_metrics(candidates),
+            repeats=repeats_for(rows)
+        ))
+
+    optimization = main.OptimizationInput(base_config=base)
+    adaptive = main.OptimizationInput(base_config=base, search_mode="adaptive")
+    sensitivity = main.SensitivityInput(**BASE_CONFIG)
+    simulation = main.SimulationInput(base_config=base, sweep_parameter="track_pitch_nm",
+                                      start=180, end=1800, steps=200)
+    grid_rows = int(np.prod([len(v) for v in main.optimization_grid_axes(
+        main.standardize_physical_inputs(BASE_CONFIG)).values()]))
+
+    cases += [
+        BenchCase("optimize_parameters/grid", grid_rows,
+                  lambda: main.optimize_parameters(optimization), repeats=20),
+        BenchCase("optimize_parameters/adaptive", adaptive.budget,
+                  lambda: main.optimize_parameters(adaptive), repeats=20),
+        BenchCase("sensitivity_analysis", len(main.build_sensitivity_candidates(BASE_CONFIG, 0.05)),
+                  lambda: main.sensitivity_analysis(sensitivity), repeats=100,
+                  setup=main.prediction_cache.clear),
+        BenchCase("simulate_dashboard", simulation.steps,
+                  lambda: main.simulate_dashboard(simulation), repeats=100)
+    ]
+    return cases
+
+
+def environment_info() -> Dict[str, Any]:
+    import sklearn
+    import main
+
+    return {
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "sklearn": sklearn.__version__,
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "model_version": main.MODEL_VERSION,
+        "osis_env": {key: value for key, value in os.environ.items() if key.startswith("OSIS_")},
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z")
+    }
+
+
+def run_suite(max_rows: int = BATCH_SIZES[-1], only: Optional[str] = None,
+              log=print) -> Dict[str, Any]:
+    results = {}
+    for case in build_cases(max_rows):
+        if only and only not in case.name:
+            continue
+        results[case.name] = time_case(case)
+        r = results[case.name]
+        log(f"{case.name:<36} | p50 {r['p50_ms']:9.3f} ms | p95 {r['p95_ms']:9.3f} ms | "
+            f"p99 {r['p99_ms']:9.3f} ms | {r['rows_per_s']:12.0f} rows/s")
+    return {"environment": environment_info(), "results": results}
+
+
+def compare_results(current: Dict[str, Any], baseline: Dict[str, Any],
+                    threshold: float = DEFAULT_THRESHOLD, metric: str = GATED_METRIC) -> List[Dict[str, Any]]:
+    """
+    Cases present in both runs whose `metric` grew by more than `threshold`.
+    """
+    regressions = []
+    for name, result in current["results"].items():
+        reference = baseline["results"].get(name)
+        if reference is None or reference[metric] <= 0:
+            continue
+        change = result[metric] / reference[metric] - 1.0
+        if change > threshold:
+            regressions.append({
+                "case": name,
+                "metric": metric,
+                "baseline": reference[metric],
+                "current": result[metric],
+                "change": change
+            })
+    return regressions
+
+
+def main_cli(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--output", default=DEFAULT_OUTPUT)
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE)
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="allowed relative slowdown before failing (0.25 = 25%%)")
+    parser.add_argument("--metric", default=GATED_METRIC, choices=["p50_ms", "p95_ms", "p99_ms", "mean_ms"])
+    parser.add_argument("--max-rows", type=int, default=BATCH_SIZES[-1])
+    parser.add_argument("--only", help="run only cases whose name contains this text")
+    parser.add_argument("--update-baseline", action="store_true")
+    args = parser.parse_args(argv)
+
+    report = run_suite(max_rows=args.max_rows, only=args.only)
+
+    regressions = []
+    if os.path.isfile(args.baseline) and not args.update_baseline:
+        with open(args.baseline) as handle:
+            regressions = compare_results(report, json.load(handle), args.threshold, args.metric)
+        report["baseline"] = args.baseline
+    report["threshold"] = args.threshold
+    report["regressions"] = regressions
+
+    with open(args.output, "w") as handle:
+        json.dump(report, handle, indent=2)
+    if args.update_baseline:
+        with open(args.baseline, "w") as handle:
+            json.dump(report, handle, indent=2)
+        print(f"Baseline written to {args.baseline}")
+    elif "baseline" not in report:
+        print(f"No baseline at {args.baseline}; nothing gated (use --update-baseline)")
+
+    for regression in regressions:
+        print(f"REGRESSION {regression['case']}: {regression['metric']} "
+              f"{regression['baseline']:.3f} -> {regression['current']:.3f} ms "
+              f"(+{regression['change'] * 100:.1f}%)")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main_cli())
@@ -0,0 +1,394 @@
+"""
+Columnar on-disk dataset: one .npy file per column.
+
+    osis_dataset/
+        schema.json            # format version, row count, per-column dtype
+        numerical_aperture.npy
+        recording_material.npy # int8 codes; labels in the schema
+        NA_sq.npy              # engineered features, computed once on write
+        ...
+
+Readers project columns and fetch row ranges with positioned reads of the
+column files, so only the requested bytes are read and memory follows the
+chunk size (`DatasetStore.column` still returns a memory map).
+`recording_material` is stored as category codes and decoded on read. The interaction and one-hot
+features that training and evaluation need are precomputed on write by
+`engineer_columns`. CSV stays available through `import_csv` and
+`export_csv`; a CSV written after the store was built takes precedence
+(see `use_store`).
+"""
+import json
+import os
+import shutil
+import warnings
+from typing import Dict, Iterator, List, Optional, Sequence
+
+import numpy as np
+
+FORMAT_VERSION = 1
+SCHEMA_FILE = "schema.json"
+DEFAULT_STORE = "osis_dataset"
+DEFAULT_CSV = "osis_dataset.csv"
+
+MATERIALS = ["GST_HTL", "DYE_LTH", "MDISC"]
+CATEGORICAL = {"recording_material": MATERIALS}
+
+# Generated columns, in CSV order, with their on-disk dtypes
+RAW_COLUMNS = {
+    "laser_wavelength_nm": "<i2",
+    "numerical_aperture": "<f8",
+    "spot_size_nm": "<f8",
+    "track_pitch_nm": "<f8",
+    "layer_count": "<i1",
+    "layer_spacing_nm": "<f8",
+    "isi_factor": "<f8",
+    "crosstalk_factor": "<f8",
+    "recording_material": "<i1",
+    "thermal_conductivity_w_mk": "<f8",
+    "activation_energy_ev": "<f8",
+    "temperature_c": "<f8",
+    "relative_humidity": "<f8",
+    "prml_enabled": "<i1",
+    "ctc_enabled": "<i1",
+    "physics_snr_db": "<f8",
+    "measured_snr_db": "<f8",
+    "thermal_factor": "<f8"
+}
+ENGINEERED_COLUMNS = {
+    "NA_sq": "<f8",
+    "wavelength_div_NA": "<f8",
+    "spot_div_pitch": "<f8",
+    "temp_x_humidity": "<f8",
+    "recording_material_GST_HTL": "<u1",
+    "recording_material_MDISC": "<u1"
+}
+# Raw columns engineer_columns reads
+ENGINEERING_INPUTS = {"numerical_aperture", "laser_wavelength_nm", "spot_size_nm", "track_pitch_nm",
+                      "temperature_c", "relative_humidity", "recording_material"}
+
+
+def engineer_columns(columns: Dict[str, np.ndarray]) -> Dict[str, np.ndarray]:
+    """
+    Interaction features and material one-hots, as train_model.py builds them.
+    `recording_material` may be labels or category codes.
+    """
+    material = np.asarray(columns["recording_material"])
+    if material.dtype.kind in "iu":
+        material = np.asarray(MATERIALS)[material]
+    na = np.asarray(columns["numerical_aperture"], dtype=np.float64)
+    return {
+        "NA_sq": na ** 2,
+        "wavelength_div_NA": np.asarray(columns["laser_wavelength_nm"], dtype=np.float64) / na,
+        "spot_div_pitch": np.asarray(columns["spot_size_nm"]) / np.asarray(columns["track_pitch_nm"]),
+        "temp_x_humidity": np.asarray(columns["temperature_c"]) * np.asarray(columns["relative_humidity"]),
+        "recording_material_GST_HTL": (material == "GST_HTL").astype(np.uint8),
+        "recording_material_MDISC": (material == "MDISC").astype(np.uint8)
+    }
+
+
+def encode_categories(name: str, values) -> np.ndarray:
+    labels = CATEGORICAL[name]
+    values = np.asarray(values)
+    codes = np.full(len(values), -1, dtype=np.int8)
+    for code, label in enumerate(labels):
+        codes[values == label] = code
+    if (codes < 0).any():
+        unknown = sorted(set(values[codes < 0].tolist()))
+        raise ValueError(f"Unknown {name} values: {unknown}")
+    return codes
+
+
+# -------------------------
+# WRITING
+# -------------------------
+class DatasetWriter:
+    """
+    Fills a new store of exactly `n_rows` rows with consecutive chunks.
+
+    Files are written into a staging directory that replaces `root` on
+    `close()`, so readers never see a half-written store.
+    """
+
+    def __init__(self, root: str, n_rows: int):
+        self.root = root
+        self.n_rows = int(n_rows)
+        self.staging = root.rstrip("/\\") + ".partial"
+        shutil.rmtree(self.staging, ignore_errors=True)
+        os.makedirs(self.staging)
+
+        self.dtypes = {**RAW_COLUMNS, **ENGINEERED_COLUMNS}
+        self._maps = {
+            name: np.lib.format.open_memmap(os.path.join(self.staging, f"{name}.npy"), mode="w+",
+                                            dtype=np.dtype(dtype), shape=(self.n_rows,))
+            for name, dtype in self.dtypes.items()
+        }
+        self.rows_written = 0
+
+    def append(self, columns) -> None:
+        """
+        Write the next chunk; `columns` maps every raw column to an array
+        (a DataFrame works too). Engineered columns are derived here.
+        """
+        columns = {name: np.asarray(columns[name]) for name in RAW_COLUMNS}
+        n = len(columns["numerical_aperture"])
+        start, stop = self.rows_written, self.rows_written + n
+        if stop > self.n_rows:
+            raise ValueError(f"Chunk overflows the store: {stop} > {self.n_rows} rows")
+
+        columns.update(engineer_columns(columns))
+        for name, values in columns.items():
+            if name in CATEGORICAL and values.dtype.kind not in "iu":
+                values = encode_categories(name, values)
+            self._maps[name][start:stop] = values
+        self.rows_written = stop
+
+    def close(self) -> None:
+        if self.rows_written != self.n_rows:
+            raise ValueError(f"Store expects {self.n_rows} rows, got {self.rows_written}")
+        for values in self._maps.values():
+            values.flush()
+        self._maps.clear()
+
+        schema = {
+            "format_version": FORMAT_VERSION,
+            "n_rows": self.n_rows,
+            "columns": {
+                name: {
+                    "dtype": dtype,
+                    "kind": "engineered" if name in ENGINEERED_COLUMNS else "raw",
+                    **({"categories": CATEGORICAL[name]} if name in CATEGORICAL else {})
+                }
+                for name, dtype in self.dtypes.items()
+            }
+        }
+        with open(os.path.join(self.staging, SCHEMA_FILE), "w") as handle:
+            json.dump(schema, handle, indent=1)
+
+        shutil.rmtree(self.root, ignore_errors=True)
+        os.replace(self.staging, self.root)
+
+    def abort(self) -> None:
+        self._maps.clear()
+        shutil.rmtree(self.staging, ignore_errors=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            try:
+                self.close()
+            except BaseException:
+                self.abort()
+                raise
+        else:
+            self.abort()
+        return False
+
+
+# -------------------------
+# READING
+# -------------------------
+class DatasetStore:
+    """
+    Read-only view of a store directory.
+    """
+
+    def __init__(self, root: str = DEFAULT_STORE):
+        self.root = root
+        with open(os.path.join(root, SCHEMA_FILE)) as handle:
+            self.schema = json.load(handle)
+        if self.schema.get("format_version") != FORMAT_VERSION:
+            raise ValueError(f"Unsupported dataset format: {self.schema.get('format_version')!r}")
+        self.n_rows = int(self.schema["n_rows"])
+        self._maps: Dict[str, np.ndarray] = {}
+
+    def __len__(self) -> int:
+        return self.n_rows
+
+    @property
+    def columns(self) -> List[str]:
+        return list(self.schema["columns"])
+
+    def column(self, name: str) -> np.ndarray:
+        """
+        The raw memory map of one column (category codes stay encoded).
+        """
+        if name not in self.schema["columns"]:
+            raise KeyError(f"Unknown column {name!r}; available: {self.columns}")
+        if name not in self._maps:
+            self._maps[name] = np.load(os.path.join(self.root, f"{name}.npy"), mmap_mode="r")
+        return self._maps[name]
+
+    def _read_rows(self, name: str, start: int, stop: int) -> np.ndarray:
+        # Plain reads rather than slices of the memory map: pages touched
+        # through a map stay in the process RSS, so a full pass over the
+        # store would grow with the dataset instead of the chunk size
+        if name not in self.schema["columns"]:
+            raise KeyError(f"Unknown column {name!r}; available: {self.columns}")
+        with open(os.path.join(self.root, f"{name}.npy"), "rb") as handle:
+            version = np.lib.format.read_magic(handle)
+            if version == (1, 0):
+                _, _, dtype = np.lib.format.read_array_header_1_0(handle)
+            else:
+                _, _, dtype = np.lib.format.read_array_header_2_0(handle)
+            handle.seek(start * dtype.itemsize, os.SEEK_CUR)
+            return np.fromfile(handle, dtype=dtype, count=stop - start)
+
+    def read(self, columns: Optional[Sequence[str]] = None, start: int = 0,
+             stop: Optional[int] = None, decode: bool = True) -> Dict[str, np.ndarray]:
+        """
+        In-memory copies of rows [start, stop) of the projected columns.
+        """
+        columns = self.columns if columns is None else list(columns)
+        start, stop, _ = slice(start, stop).indices(self.n_rows)
+        out = {}
+        for name in columns:
+            values = self._read_rows(name, start, max(start, stop))
+            if decode and name in CATEGORICAL:
+                values = np.asarray(self.schema["columns"][name]["categories"])[values]
+            out[name] = values
+        return out
+
+    def to_frame(self, columns: Optional[Sequence[str]] = None, start: int = 0,
+                 stop: Optional[int] = None):
+        """
+        DataFrame of the projected rows; categorical columns become
+        pandas Categoricals (codes are not expanded to strings).
+        """
+        import pandas as pd
+
+        data = self.read(columns, start, stop, decode=False)
+        for name in data:
+            if name in CATEGORICAL:
+                data[name] = pd.Categorical.from_codes(data[name], self.schema["columns"][name]["categories"])
+        return pd.DataFrame(data, copy=False)
+
+    def iter_chunks(self, columns: Optional[Sequence[str]] = None,
+                    chunk_rows: int = 1_000_000, decode: bool = True) -> Iterator[Dict[str, np.ndarray]]:
+        for start in range(0, self.n_rows, chunk_rows):
+            yield self.read(columns, start, min(start + chunk_rows, self.n_rows), decode=decode)
+
+
+def store_exists(root: str = DEFAULT_STORE) -> bool:
+    return os.path.isfile(os.path.join(root, SCHEMA_FILE))
+
+
+def use_store(root: str = DEFAULT_STORE, csv_path: str = DEFAULT_CSV) -> bool:
+    """
+    Whether readers should use the store rather than the CSV: it exists and
+    the CSV was not modified after it was written. A newer CSV (e.g. just
+    regenerated) is read instead, with a warning to re-import it.
+    """
+    if not store_exists(root):
+        return False
+    if os.path.isfile(csv_path) and os.path.getmtime(csv_path) > os.path.getmtime(os.path.join(root, SCHEMA_FILE)):
+        warnings.warn(f"{csv_path} is newer than the dataset store {root}/; reading the CSV. "
+                      f"Run `python dataset_store.py import` to rebuild the store.", stacklevel=3)
+        return False
+    return True
+
+
+# -------------------------
+# CSV IMPORT / EXPORT
+# -------------------------
+def count_csv_rows(path: str) -> int:
+    """
+    Data rows in a CSV file with a header line, without parsing it.
+    """
+    rows, last = 0, b"\n"
+    with open(path, "rb") as handle:
+        for block in iter(lambda: handle.read(1 << 24), b""):
+            rows += block.count(b"\n")
+            last = block[-1:]
+    if last != b"\n":
+        rows += 1  # final line without a newline
+    return max(rows - 1, 0)
+
+
+def import_csv(csv_path: str = DEFAULT_CSV, root: str = DEFAULT_STORE,
+               chunk_rows: int = 1_000_000) -> DatasetStore:
+    import pandas as pd
+
+    n_rows = count_csv_rows(csv_path)
+    with DatasetWriter(root, n_rows) as writer:
+        for chunk in pd.read_csv(csv_path, chunksize=chunk_rows, float_precision="round_trip"):
+            writer.append(chunk)
+    return DatasetStore(root)
+
+
+def export_csv(root: str = DEFAULT_STORE, csv_path: str = DEFAULT_CSV,
+               columns: Optional[Sequence[str]] = None, chunk_rows: int = 1_000_000) -> None:
+    store = DatasetStore(root)
+    columns = list(RAW_COLUMNS) if columns is None else list(columns)
+    with open(csv_path, "w", newline="") as handle:
+        handle.write(",".join(columns) + "\n")
+        for chunk in store.iter_chunks(columns, chunk_rows):
+            fields = [map(str, chunk[name].tolist()) for name in columns]
+            handle.write("".join(line + "\n" for line in map(",".join, zip(*fields))))
+
+
+def _csv_chunks(columns: Sequence[str], csv_path: str,
+                chunk_rows: Optional[int] = None) -> Iterator[Dict[str, np.ndarray]]:
+    """
+    CSV fallback of load_dataset and iter_dataset: reads only the raw
+    columns `columns` needs (plus the engineering inputs when it asks for
+    engineered ones) and yields one dict per chunk, or a single dict for
+    the whole file when `chunk_rows` is None.
+    """
+    import pandas as pd
+
+    raw = [name for name in columns if name in RAW_COLUMNS]
+    needs_engineering = any(name in ENGINEERED_COLUMNS for name in columns)
+    usecols = set(raw)
+    if needs_engineering:
+        usecols |= ENGINEERING_INPUTS
+    reader = pd.read_csv(csv_path, usecols=sorted(usecols), chunksize=chunk_rows)
+    for chunk in ([reader] if chunk_rows is None else reader):
+        data = {name: chunk[name].to_numpy() for name in chunk.columns}
+        if needs_engineering:
+            data.update(engineer_columns(data))
+        yield {name: data[name] for name in columns}
+
+
+def load_dataset(columns: Sequence[str], root: str = DEFAULT_STORE, csv_path: str = DEFAULT_CSV):
+    """
+    DataFrame with `columns` (raw or engineered) from the store when it
+    is current (`use_store`), otherwise from the CSV file with the
+    engineered columns added.
+    """
+    if use_store(root, csv_path):
+        return DatasetStore(root).to_frame(columns)
+
+    import pandas as pd
+
+    return pd.DataFrame(next(_csv_chunks(columns, csv_path)), columns=list(columns), copy=False)
+
+
+def iter_dataset(columns: Sequence[str], chunk_rows: int = 1_000_000, root: str = DEFAULT_STORE,
+                 csv_path: str = DEFAULT_CSV) -> Iterator[Dict[str, np.ndarray]]:
+    """
+    Chunked counterpart of load_dataset: dicts of at most `chunk_rows` rows
+    per column, with categorical columns decoded to labels.
+    """
+    if use_store(root, csv_path):
+        yield from DatasetStore(root).iter_chunks(columns, chunk_rows)
+        return
+    yield from _csv_chunks(columns, csv_path, chunk_rows)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Convert between osis_dataset.csv and the columnar store.")
+    parser.add_argument("command", choices=["import", "export"])
+    parser.add_argument("--csv", default=DEFAULT_CSV)
+    parser.add_argument("--store", default=DEFAULT_STORE)
+    args = parser.parse_args()
+
+    if args.command == "import":
+        store = import_csv(args.csv, args.store)
+        print(f"Imported {len(store)} rows into {args.store}/")
+    else:
+        export_csv(args.store, args.csv)
+        print(f"Exported {args.store}/ to {args.csv}")
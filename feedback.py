@@ -0,0 +1,378 @@
+"""
+Measured-SNR feedback: a bounded on-disk buffer and an incremental
+correction of the residual model.
+
+    osis_feedback/
+        state.json      # capacity, feature columns, rows appended so far
+        features.npy    # (capacity, n_features) ring of model feature rows
+        targets.npy     # (capacity, 3): physics, measured and served SNR
+        corrector.pkl   # correction model and the rows it has consumed
+
+The served residual becomes base model + correction. Each update adds a
+few boosting stages (warm start) fitted only on the rows that arrived
+since the previous update, so its cost follows the new data, not the
+training set. When the correction reaches `max_stages` it is refitted
+from scratch on the buffer window instead, which is bounded by
+`capacity`.
+"""
+import json
+import os
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, Dict, Optional, Sequence
+
+import numpy as np
+
+from tree_engine import compile_model
+
+STATE_FILE = "state.json"
+CORRECTOR_FILE = "corrector.pkl"
+DEFAULT_FEEDBACK_DIR = "osis_feedback"
+
+# Columns of targets.npy
+PHYSICS, MEASURED, SERVED = 0, 1, 2
+
+
+# -------------------------
+# BUFFER
+# -------------------------
+class FeedbackBuffer:
+    """
+    Ring of the last `capacity` feedback rows in memory-mapped .npy files.
+
+    Every row gets a sequence number (rows appended before it); `since(seq)`
+    returns the rows from `seq` on that are still in the ring. The row count
+    is persisted by `sync()`, so rows appended after the last sync are lost
+    if the process dies.
+    """
+
+    def __init__(self, directory: str, feature_columns: Sequence[str], capacity: int = 100_000):
+        self.directory = directory
+        self.feature_columns = list(feature_columns)
+        self.capacity = int(capacity)
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+
+        state = self._read_state()
+        if (state is not None and state["capacity"] == self.capacity
+                and state["feature_columns"] == self.feature_columns):
+            mode, self.appended = "r+", int(state["appended"])
+        else:
+            mode, self.appended = "w+", 0
+        self._features = np.lib.format.open_memmap(
+            os.path.join(directory, "features.npy"), mode=mode, dtype=np.float64,
+            shape=(self.capacity, len(self.feature_columns)))
+        self._targets = np.lib.format.open_memmap(
+            os.path.join(directory, "targets.npy"), mode=mode, dtype=np.float64, shape=(self.capacity, 3))
+        if mode == "w+":
+            self.sync()
+
+    def _read_state(self) -> Optional[Dict[str, Any]]:
+        try:
+            with open(os.path.join(self.directory, STATE_FILE)) as handle:
+                return json.load(handle)
+        except (OSError, ValueError):
+            return None
+
+    def __len__(self) -> int:
+        return min(self.appended, self.capacity)
+
+    @property
+    def oldest(self) -> int:
+        """
+        Sequence number of the oldest row still buffered.
+        """
+        return self.appended - len(self)
+
+    def append(self, X: np.ndarray, physics_snr, measured_snr, served_snr) -> int:
+        """
+        Add rows; returns the sequence number of the first one.
+        """
+        X = np.atleast_2d(np.asarray(X, dtype=np.float64))
+        targets = np.column_stack([np.broadcast_to(np.asarray(values, dtype=np.float64), (len(X),))
+                                   for values in (physics_snr, measured_snr, served_snr)])
+        if len(X) > self.capacity:
+            X, targets = X[-self.capacity:], targets[-self.capacity:]
+        with self._lock:
+            first = self.appended
+            slots = (first + np.arange(len(X))) % self.capacity
+            self._features[slots] = X
+            self._targets[slots] = targets
+            self.appended += len(X)
+        return first
+
+    def since(self, seq: int = 0):
+        """
+        (first sequence number, features, targets) of rows from `seq` on.
+        Rows already pushed out of the ring are skipped.
+        """
+        with self._lock:
+            first = max(int(seq), self.oldest)
+            slots = np.arange(first, self.appended) % self.capacity
+            return first, np.array(self._features[slots]), np.array(self._targets[slots])
+
+    def tail(self, n_rows: int):
+        return self.since(self.appended - n_rows)
+
+    def sync(self) -> None:
+        with self._lock:
+            self._features.flush()
+            self._targets.flush()
+            state = {"capacity": self.capacity, "feature_columns": self.feature_columns,
+                     "appended": self.appended}
+        tmp_path = os.path.join(self.directory, STATE_FILE + ".tmp")
+        with open(tmp_path, "w") as handle:
+            json.dump(state, handle)
+        os.replace(tmp_path, os.path.join(self.directory, STATE_FILE))
+
+
+# -------------------------
+# CORRECTION MODEL
+# -------------------------
+class ResidualCorrector:
+    """
+    Gradient-boosted correction of the base residual model, grown by
+    `stages_per_update` stages per update (warm start, new rows only).
+    """
+
+    def __init__(self, stages_per_update: int = 20, max_stages: int = 400,
+                 learning_rate: float = 0.1, max_depth: int = 3, min_samples_leaf: int = 20):
+        self.stages_per_update = int(stages_per_update)
+        self.max_stages = int(max_stages)
+        self.params = dict(learning_rate=learning_rate, max_depth=max_depth,
+                           min_samples_leaf=min_samples_leaf, init="zero", random_state=42)
+        self.model = None
+        self.compiled = None
+        self.updates = 0
+        self.seen = 0          # buffer sequence number consumed up to
+        self.base_version: Optional[str] = None
+
+    @property
+    def n_stages(self) -> int:
+        return 0 if self.model is None else len(getattr(self.model, "estimators_", ()))
+
+    @property
+    def version(self) -> Optional[str]:
+        return None if self.model is None else f"fb{self.updates}"
+
+    def needs_refit(self) -> bool:
+        return self.n_stages + self.stages_per_update > self.max_stages
+
+    def predict(self, X: np.ndarray):
+        return 0.0 if self.compiled is None else self.compiled.predict(X)
+
+    def update(self, X: np.ndarray, target: np.ndarray) -> None:
+        """
+        Add stages fitted to `target - current correction` on these rows.
+        """
+        from sklearn.ensemble import GradientBoostingRegressor
+
+        if self.model is None:
+            self.model = GradientBoostingRegressor(n_estimators=0, warm_start=True, **self.params)
+        self.model.set_params(n_estimators=self.n_stages + self.stages_per_update)
+        self.model.fit(X, target)
+        self._publishable()
+
+    def refit(self, X: np.ndarray, target: np.ndarray) -> None:
+        """
+        Start over on a window of rows (e.g. the whole buffer).
+        """
+        self.model = None
+        self.update(X, target)
+
+    def reset(self) -> None:
+        self.model = None
+        self.compiled = None
+
+    def _publishable(self) -> None:
+        self.compiled = compile_model(self.model)
+        self.updates += 1
+
+    def save(self, path: str) -> None:
+        import joblib
+
+        tmp_path = path + ".tmp"
+        joblib.dump({"model": self.model, "updates": self.updates, "seen": self.seen,
+                     "base_version": self.base_version}, tmp_path)
+        os.replace(tmp_path, path)
+
+    def load(self, path: str, base_version: str) -> bool:
+        """
+        Restore a saved correction if it was fitted against `base_version`.
+        """
+        import joblib
+
+        self.base_version = base_version
+        if not os.path.exists(path):
+            return False
+        saved = joblib.load(path)
+        if saved["base_version"] != base_version or saved["model"] is None:
+            return False
+        self.model, self.updates, self.seen = saved["model"], saved["updates"], saved["seen"]
+        self.compiled = compile_model(self.model)
+        return True
+
+
+def _rmse(error: np.ndarray) -> Optional[float]:
+    return float(np.sqrt(np.mean(np.square(error)))) if len(error) else None
+
+
+# -------------------------
+# UPDATE LOOP
+# -------------------------
+class FeedbackLoop:
+    """
+    Buffer + corrector + background updater.
+
+    `base_predict(X)` is the uncorrected residual model. `publish(correction,
+    version, base_version)` receives the compiled correction (None when
+    cleared) after every update, with the base model version it was fitted
+    against. Files are only created once feedback is first used.
+    """
+
+    def __init__(self, directory: str, feature_columns: Sequence[str], base_version: str,
+                 base_predict: Callable[[np.ndarray], np.ndarray],
+                 publish: Callable[[Any, Optional[str], str], None], enabled: bool = True,
+                 capacity: int = 100_000, interval_s: float = 60.0, min_rows: int = 256,
+                 stages_per_update: int = 20, max_stages: int = 400, drift_window: int = 1000):
+        self.directory = directory
+        self.feature_columns = list(feature_columns)
+        self.base_version = base_version
+        self.base_predict = base_predict
+        self.publish = publish
+        self.enabled = enabled
+        self.capacity = int(capacity)
+        self.interval_s = float(interval_s)
+        self.min_rows = int(min_rows)
+        self.drift_window = int(drift_window)
+
+        self.corrector = ResidualCorrector(stages_per_update, max_stages)
+        self.history: deque = deque(maxlen=20)
+        self._buffer: Optional[FeedbackBuffer] = None
+        self._init_lock = threading.Lock()
+        self._update_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def corrector_path(self) -> str:
+        return os.path.join(self.directory, CORRECTOR_FILE)
+
+    @property
+    def buffer(self) -> FeedbackBuffer:
+        if self._buffer is None:
+            with self._init_lock:
+                if self._buffer is None:
+                    buffer = FeedbackBuffer(self.directory, self.feature_columns, self.capacity)
+                    if self.corrector.load(self.corrector_path, self.base_version):
+                        self.publish(self.corrector.compiled, self.corrector.version, self.base_version)
+                    self._buffer = buffer
+        return self._buffer
+
+    def ingest(self, X: np.ndarray, physics_snr, measured_snr, served_snr) -> int:
+        return self.buffer.append(X, physics_snr, measured_snr, served_snr)
+
+    def run_update(self, force: bool = False) -> Optional[Dict[str, Any]]:
+        """
+        Fold the rows that arrived since the last update into the correction
+        and publish it. Returns the update record, or None if there were
+        fewer than `min_rows` new rows (and not `force`).
+        """
+        with self._update_lock:
+            buffer = self.buffer
+            buffer.sync()
+            corrector = self.corrector
+            first, X, targets = buffer.since(corrector.seen)
+            if len(X) == 0 or (len(X) < self.min_rows and not force):
+                return None
+
+            start = time.perf_counter()
+            refit = corrector.needs_refit()
+            if refit:
+                # Sliding-window refit: everything still buffered
+                first, X, targets = buffer.since(0)
+            target = targets[:, MEASURED] - targets[:, PHYSICS] - self.base_predict(X)
+            rmse_before = _rmse(target - corrector.predict(X))
+            if refit:
+                corrector.refit(X, target)
+            else:
+                corrector.update(X, target)
+            # Only past the rows actually read: rows ingested during the
+            # fit are left for the next update
+            corrector.seen = first + len(X)
+            rmse_after = _rmse(target - corrector.predict(X))
+
+            corrector.save(self.corrector_path)
+            self.publish(corrector.compiled, corrector.version, corrector.base_version)
+            record = {
+                "version": corrector.version,
+                "rows": len(X),
+                "refit": refit,
+                "stages": corrector.n_stages,
+                "seconds": time.perf_counter() - start,
+                "rmse_before_db": rmse_before,
+                "rmse_after_db": rmse_after,
+                "timestamp": time.time()
+            }
+            self.history.append(record)
+            return record
+
+    def clear(self, base_version: str) -> None:
+        """
+        Drop the correction (e.g. the base model changed); buffered rows stay
+        and are used by the next update.
+        """
+        with self._update_lock:
+            self.base_version = base_version
+            self.corrector.reset()
+            self.corrector.base_version = base_version
+            self.corrector.seen = self.buffer.oldest
+            self.publish(None, None, base_version)
+
+    def stats(self) -> Dict[str, Any]:
+        if not self.enabled:
+            return {"enabled": False}
+        buffer = self.buffer
+        _, _, targets = buffer.tail(self.drift_window)
+        # Drift: how the served predictions did on the latest feedback rows
+        served_error = targets[:, MEASURED] - targets[:, SERVED]
+        return {
+            "enabled": True,
+            "buffered_rows": len(buffer),
+            "appended_rows": buffer.appended,
+            "pending_rows": buffer.appended - max(self.corrector.seen, buffer.oldest),
+            "capacity": buffer.capacity,
+            "correction_version": self.corrector.version,
+            "correction_stages": self.corrector.n_stages,
+            "drift": {
+                "window_rows": len(served_error),
+                "served_rmse_db": _rmse(served_error),
+                "served_bias_db": float(served_error.mean()) if len(served_error) else None
+            },
+            "updates": list(self.history)
+        }
+
+    # Background thread
+    def start(self) -> None:
+        if not self.enabled or self._thread is not None:
+            return
+        self.buffer  # open the files and restore a saved correction
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="osis-feedback", daemon=True)
+        self._thread.start()
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval_s):
+            try:
+                self.run_update()
+            except Exception as exc:  # keep serving; the next tick retries
+                self.history.append({"error": repr(exc), "timestamp": time.time()})
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        if self._buffer is not None:
+            self._buffer.sync()
@@ -4,15 +4,27 @@ try:
         sys.stdout.reconfigure(encoding='utf-8')
 except Exception:
     pass
+import argparse
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+
 import numpy as np
 import pandas as pd
 
+from dataset_store import DEFAULT_STORE, DatasetWriter
+
 # =====================================================
 # CONFIGURATION
 # =====================================================
 N_SAMPLES = 20000
 OUTPUT_FILE = "osis_dataset.csv"
-np.random.seed(42)
+SEED = 42
+
+# Rows drawn per chunk. Every chunk has its own seed stream, so the output
+# depends on (SEED, CHUNK_SIZE) but not on how many workers run
+CHUNK_SIZE = 100_000
 
 # =====================================================
 # PHYSICS-BASED HELPER FUNCTIONS
@@ -39,11 +51,11 @@ def calculate_physics_snr(wavelength, NA, isi, crosstalk, thermal_factor):
     Formula provided:
     physics_snr = 85 + 30*NA - 0.02*wavelength - 15*isi - 10*crosstalk + 5*thermal_factor
     """
-    return (85 
-            + 30 * NA 
-            - 0.02 * wavelength 
-            - 15 * isi 
-            - 10 * crosstalk 
+    return (85
+            + 30 * NA
+            - 0.02 * wavelength
+            - 15 * isi
+            - 10 * crosstalk
             + 5 * thermal_factor)
 
 # =====================================================
@@ -54,117 +66,196 @@ wavelengths = [405, 650, 780]
 NA_range = {405: (0.80, 0.95), 650: (0.60, 0.70), 780: (0.40, 0.55)}
 track_pitch_base = {405: 225, 650: 740, 780: 1600}
 materials = ["GST_HTL", "DYE_LTH", "MDISC"]
+material_p = [0.5, 0.3, 0.2]
+# (low, high) ranges keyed by material
+thermal_k_range = {"GST_HTL": (0.5, 1.5), "DYE_LTH": (0.1, 0.4), "MDISC": (1.2, 2.0)}
+activation_range = {"GST_HTL": (1.8, 2.2), "DYE_LTH": (0.8, 1.2), "MDISC": (2.0, 2.5)}
+layer_counts = [1, 2, 3, 4]
+layer_p = [0.5, 0.3, 0.15, 0.05]
+
+columns = [
+    "laser_wavelength_nm", "numerical_aperture", "spot_size_nm",
+    "track_pitch_nm", "layer_count", "layer_spacing_nm",
+    "isi_factor", "crosstalk_factor", "recording_material",
+    "thermal_conductivity_w_mk", "activation_energy_ev",
+    "temperature_c", "relative_humidity", "prml_enabled",
+    "ctc_enabled", "physics_snr_db", "measured_snr_db", "thermal_factor"
+]
 
 # =====================================================
 # DATA GENERATION
 # =====================================================
 
-data = []
+def generate_chunk(n, seed):
+    """
+    Draw `n` samples at once; `seed` is an int or np.random.SeedSequence.
+    """
+    rng = np.random.default_rng(seed)
+
+    wl_idx = rng.integers(0, len(wavelengths), n)
+    wl = np.asarray(wavelengths)[wl_idx]
 
-for _ in range(N_SAMPLES):
-    wl = np.random.choice(wavelengths)
-    
     # Randomize NA within realistic range for the wavelength
-    na_min, na_max = NA_range[wl]
-    NA = np.random.uniform(na_min, na_max)
-    
+    na_bounds = np.array([NA_range[w] for w in wavelengths])
+    NA = rng.uniform(na_bounds[wl_idx, 0], na_bounds[wl_idx, 1])
+
     # Track pitch variation
-    base_pitch = track_pitch_base[wl]
-    track_pitch = base_pitch * np.random.uniform(0.9, 1.1)
-    
+    track_pitch = np.array([track_pitch_base[w] for w in wavelengths])[wl_idx] * rng.uniform(0.9, 1.1, n)
+
     spot = spot_size_nm(wl, NA)
     isi = isi_factor(spot, track_pitch)
 
-    layers = np.random.choice([1, 2, 3, 4], p=[0.5, 0.3, 0.15, 0.05])
-    spacing = np.random.uniform(15000, 30000) if layers > 1 else 1e6
-    
-    # Updated crosstalk calculation based on spec
-    # Note: Using alpha=0.002 as a scaling factor for the exponent to make it reasonable
-    crosstalk = crosstalk_factor(track_pitch, spot)
+    layers = rng.choice(layer_counts, size=n, p=layer_p)
+    spacing = np.where(layers > 1, rng.uniform(15000, 30000, n), 1e6)
 
-    material = np.random.choice(materials, p=[0.5, 0.3, 0.2])
+    crosstalk = crosstalk_factor(track_pitch, spot)
 
-    if material == "GST_HTL":
-        thermal_k = np.random.uniform(0.5, 1.5)
-        activation = np.random.uniform(1.8, 2.2)
-    elif material == "DYE_LTH":
-        thermal_k = np.random.uniform(0.1, 0.4)
-        activation = np.random.uniform(0.8, 1.2)
-    else: # MDISC
-        thermal_k = np.random.uniform(1.2, 2.0)
-        activation = np.random.uniform(2.0, 2.5)
+    mat_idx = rng.choice(len(materials), size=n, p=material_p)
+    k_bounds = np.array([thermal_k_range[m] for m in materials])
+    ea_bounds = np.array([activation_range[m] for m in materials])
+    thermal_k = rng.uniform(k_bounds[mat_idx, 0], k_bounds[mat_idx, 1])
+    activation = rng.uniform(ea_bounds[mat_idx, 0], ea_bounds[mat_idx, 1])
 
-    temp = np.random.uniform(20, 80)
-    humidity = np.random.uniform(10, 90)
+    temp = rng.uniform(20, 80, n)
+    humidity = rng.uniform(10, 90, n)
 
-    prml = np.random.choice([0, 1], p=[0.5, 0.5])
-    ctc = np.random.choice([0, 1], p=[0.5, 0.5])
+    prml = rng.integers(0, 2, n)
+    ctc = rng.integers(0, 2, n)
 
-    # 1. Deterministic Physics Baseline
+    # 1. Deterministic Physics Baseline (+ small noise for smooth curves)
     thermal_f = thermal_factor_calc(activation, temp)
-    physics_snr = calculate_physics_snr(wl, NA, isi, crosstalk, thermal_f)
-    
-    # Add small noise to physics_snr as requested ("smooth curves")
-    physics_snr += np.random.normal(0, 0.05)
+    physics_snr = calculate_physics_snr(wl, NA, isi, crosstalk, thermal_f) + rng.normal(0, 0.05, n)
 
     # 2. Simulate "Measured" SNR with Non-linear Interactions
-    # These are the "residuals" the ML model will learn
-    
-    # Interaction: High NA with small track pitch is worse than linear prediction
-    density_penalty = 0
-    if isi > 0.8:
-        density_penalty = 5 * (isi - 0.8)**2
-        
-    # Interaction: Humidity affects dye more than others
-    humidity_penalty = 0
-    if material == "DYE_LTH":
-        humidity_penalty = 0.05 * (humidity - 40) if humidity > 40 else 0
-        
-    # Interaction: Multi-layer penalty increases non-linearly
-    layer_penalty = 0
-    if layers > 1:
-        layer_penalty = 2 * (layers - 1)**1.5
-        
+    # High NA with small track pitch is worse than linear prediction
+    density_penalty = np.where(isi > 0.8, 5 * (isi - 0.8) ** 2, 0.0)
+    # Humidity affects dye more than others
+    is_dye = mat_idx == materials.index("DYE_LTH")
+    humidity_penalty = np.where(is_dye & (humidity > 40), 0.05 * (humidity - 40), 0.0)
+    # Multi-layer penalty increases non-linearly (zero for one layer)
+    layer_penalty = 2 * (layers - 1) ** 1.5
     # Electronic gains
-    prml_gain = 2.5 if prml else 0
-    ctc_gain = 1.5 if ctc else 0
-    
-    # Final Measured SNR
-    # measured_snr = physics_snr - penalties + gains + noise
-    measured_snr = (physics_snr 
-                    - density_penalty 
-                    - humidity_penalty 
-                    - layer_penalty 
-                    + prml_gain 
-                    + ctc_gain 
-                    + np.random.normal(0, 0.15)) # Small measurement noise
+    prml_gain = 2.5 * prml
+    ctc_gain = 1.5 * ctc
+
+    measured_snr = (physics_snr
+                    - density_penalty
+                    - humidity_penalty
+                    - layer_penalty
+                    + prml_gain
+                    + ctc_gain
+                    + rng.normal(0, 0.15, n))  # Small measurement noise
 
     # Ensure SNR doesn't go below physical floor
-    measured_snr = max(measured_snr, 1.0)
+    measured_snr = np.maximum(measured_snr, 1.0)
+
+    return pd.DataFrame({
+        "laser_wavelength_nm": wl,
+        "numerical_aperture": NA,
+        "spot_size_nm": spot,
+        "track_pitch_nm": track_pitch,
+        "layer_count": layers,
+        "layer_spacing_nm": spacing,
+        "isi_factor": isi,
+        "crosstalk_factor": crosstalk,
+        "recording_material": np.asarray(materials)[mat_idx],
+        "thermal_conductivity_w_mk": thermal_k,
+        "activation_energy_ev": activation,
+        "temperature_c": temp,
+        "relative_humidity": humidity,
+        "prml_enabled": prml,
+        "ctc_enabled": ctc,
+        "physics_snr_db": physics_snr,
+        "measured_snr_db": measured_snr,
+        "thermal_factor": thermal_f
+    }, columns=columns)
+
+
+def chunk_seeds(n_samples, seed=SEED, chunk_size=CHUNK_SIZE):
+    """
+    (rows, SeedSequence) per chunk; independent streams spawned from `seed`.
+    """
+    n_chunks = max(1, -(-n_samples // chunk_size))
+    seeds = np.random.SeedSequence(seed).spawn(n_chunks)
+    sizes = [min(chunk_size, n_samples - i * chunk_size) for i in range(n_chunks)]
+    return list(zip(sizes, seeds))
+
+
+def _chunk_csv(n, seed):
+    # Formatting is most of the cost, so workers return finished CSV text.
+    # str() per value and one join gives the same text as DataFrame.to_csv
+    # in about a third of the time
+    frame = generate_chunk(n, seed)
+    fields = [map(str, frame[name].tolist()) for name in columns]
+    return "\n".join(map(",".join, zip(*fields))) + "\n"
+
+
+def _ordered_chunks(task, chunks, workers):
+    """
+    Yield task(n, seed) for every chunk, in chunk order. At most two chunks
+    per worker are in flight, so memory does not grow with N_SAMPLES.
+    """
+    if workers <= 1:
+        for n, chunk_seed in chunks:
+            yield task(n, chunk_seed)
+        return
+
+    with ProcessPoolExecutor(max_workers=workers, mp_context=get_context("spawn")) as pool:
+        pending = []
+        for n, chunk_seed in chunks:
+            pending.append(pool.submit(task, n, chunk_seed))
+            if len(pending) >= 2 * workers:
+                yield pending.pop(0).result()
+        for future in pending:
+            yield future.result()
+
+
+def generate_dataset(n_samples=N_SAMPLES, output_file=OUTPUT_FILE, seed=SEED,
+                     chunk_size=CHUNK_SIZE, workers=None):
+    """
+    Stream `n_samples` rows to the CSV `output_file` chunk by chunk.
+    """
+    chunks = chunk_seeds(n_samples, seed, chunk_size)
+    with open(output_file, "w", newline="") as handle:
+        handle.write(",".join(columns) + "\n")
+        for text in _ordered_chunks(_chunk_csv, chunks, workers or os.cpu_count() or 1):
+            handle.write(text)
+
+
+def generate_store(n_samples=N_SAMPLES, store_dir=DEFAULT_STORE, seed=SEED,
+                   chunk_size=CHUNK_SIZE, workers=None):
+    """
+    Same rows as generate_dataset, written to the columnar store instead.
+    """
+    chunks = chunk_seeds(n_samples, seed, chunk_size)
+    with DatasetWriter(store_dir, n_samples) as writer:
+        for frame in _ordered_chunks(generate_chunk, chunks, workers or os.cpu_count() or 1):
+            writer.append(frame)
 
-    data.append([
-        wl, NA, spot, track_pitch, layers, spacing,
-        isi, crosstalk, material, thermal_k, activation,
-        temp, humidity, prml, ctc, 
-        physics_snr, measured_snr, thermal_f
-    ])
 
 # =====================================================
 # SAVE CSV FILE
 # =====================================================
 
-columns = [
-    "laser_wavelength_nm", "numerical_aperture", "spot_size_nm",
-    "track_pitch_nm", "layer_count", "layer_spacing_nm",
-    "isi_factor", "crosstalk_factor", "recording_material",
-    "thermal_conductivity_w_mk", "activation_energy_ev",
-    "temperature_c", "relative_humidity", "prml_enabled",
-    "ctc_enabled", "physics_snr_db", "measured_snr_db", "thermal_factor"
-]
-
-df = pd.DataFrame(data, columns=columns)
-df.to_csv(OUTPUT_FILE, index=False)
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate the synthetic OSIS dataset.")
+    parser.add_argument("--samples", type=int, default=N_SAMPLES)
+    parser.add_argument("--output", default=OUTPUT_FILE)
+    parser.add_argument("--seed", type=int, default=SEED)
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE)
+    parser.add_argument("--workers", type=int, default=None, help="default: CPU count")
+    parser.add_argument("--format", choices=["csv", "store"], default="csv",
+                        help="store: columnar .npy directory (see dataset_store.py)")
+    args = parser.parse_args()
+    if args.format == "store" and args.output == OUTPUT_FILE:
+        args.output = DEFAULT_STORE
 
-print(f"✅ {OUTPUT_FILE} created successfully with {N_SAMPLES} samples.")
-print("Columns:", columns)
+    start = time.perf_counter()
+    if args.format == "store":
+        generate_store(args.samples, args.output, args.seed, args.chunk_size, args.workers)
+    else:
+        generate_dataset(args.samples, args.output, args.seed, args.chunk_size, args.workers)
 
+    print(f"✅ {args.output} created successfully with {args.samples} samples "
+          f"in {time.perf_counter() - start:.1f} s.")
+    print("Columns:", columns)
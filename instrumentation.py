@@ -0,0 +1,273 @@
+"""
+Hot-path latency instrumentation exported as Prometheus text.
+
+    with stage("model.residual", path="batch"):
+        residuals = engine.predict(X)
+
+records the block's duration in the `osis_stage_duration_seconds`
+histogram. When instrumentation is disabled, `stage` returns one shared
+no-op context manager and nothing is recorded.
+
+MetricsMiddleware counts requests per route and times them. A request
+carrying an `X-OSIS-Debug` header also collects its own stage timings, via
+a context variable, and gets them back in an `X-OSIS-Stages` response
+header ("stage=milliseconds;..."). Work done in another context (a
+micro-batch in a worker thread) is collected with `collect_stages` and
+handed to each request with `add_request_stages`.
+"""
+import bisect
+import contextlib
+import contextvars
+import threading
+import time
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+DEBUG_REQUEST_HEADER = b"x-osis-debug"
+DEBUG_RESPONSE_HEADER = b"x-osis-stages"
+
+# Seconds; from 5 microseconds (cached lookups) to 10 s (10^6-row batches)
+LATENCY_BUCKETS = (5e-6, 1e-5, 2.5e-5, 5e-5, 1e-4, 2.5e-4, 5e-4, 1e-3, 2.5e-3, 5e-3,
+                   1e-2, 2.5e-2, 5e-2, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+ROW_BUCKETS = (1, 10, 100, 1_000, 10_000, 100_000, 1_000_000, 10_000_000)
+
+_NOOP = contextlib.nullcontext()
+
+# Per-request {stage: seconds}, only set for requests that asked for it
+_request_stages: contextvars.ContextVar[Optional[Dict[str, float]]] = \
+    contextvars.ContextVar("osis_request_stages", default=None)
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Histogram:
+    """
+    Prometheus histogram with fixed buckets, one series per label tuple.
+    """
+
+    def __init__(self, name: str, documentation: str, label_names: Sequence[str],
+                 buckets: Sequence[float]):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(label_names)
+        self.buckets = tuple(buckets)
+        self._series: Dict[Tuple[str, ...], List[float]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, labels: Tuple[str, ...], value: float) -> None:
+        # counts per bucket (last one is +Inf), then sum and count
+        position = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [0] * (len(self.buckets) + 1) + [0.0, 0]
+            series[position] += 1
+            series[-2] += value
+            series[-1] += 1
+
+    def render(self) -> Iterable[str]:
+        yield f"# HELP {self.name} {self.documentation}"
+        yield f"# TYPE {self.name} histogram"
+        with self._lock:
+            snapshot = {labels: list(series) for labels, series in self._series.items()}
+        for labels, series in sorted(snapshot.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), series):
+                cumulative += count
+                le = f'le="{_format_value(float(bound))}"'
+                yield f"{self.name}_bucket{_format_labels(self.label_names, labels, le)} {cumulative}"
+            yield f"{self.name}_sum{_format_labels(self.label_names, labels)} {_format_value(series[-2])}"
+            yield f"{self.name}_count{_format_labels(self.label_names, labels)} {series[-1]}"
+
+    def reset(self) -> None:
+        with self._lock:
+            self._series.clear()
+
+
+class Counter:
+    def __init__(self, name: str, documentation: str, label_names: Sequence[str]):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(label_names)
+        self._values: Dict[Tuple[str, ...], float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, labels: Tuple[str, ...], amount: float = 1) -> None:
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def render(self) -> Iterable[str]:
+        yield f"# HELP {self.name} {self.documentation}"
+        yield f"# TYPE {self.name} counter"
+        with self._lock:
+            snapshot = dict(self._values)
+        for labels, value in sorted(snapshot.items()):
+            yield f"{self.name}{_format_labels(self.label_names, labels)} {_format_value(value)}"
+
+    def reset(self) -> None:
+        with self._lock:
+            self._values.clear()
+
+
+def render_values(name: str, documentation: str, values: Dict[Tuple[Tuple[str, str], ...], float],
+                  kind: str = "gauge") -> List[str]:
+    """
+    Exposition lines for externally owned values, keyed by ((label, value), ...).
+    """
+    lines = [f"# HELP {name} {documentation}", f"# TYPE {name} {kind}"]
+    for labels, value in values.items():
+        names = [label for label, _ in labels]
+        label_values = [label_value for _, label_value in labels]
+        lines.append(f"{name}{_format_labels(names, label_values)} {_format_value(value)}")
+    return lines
+
+
+class Instrumentation:
+    """
+    Registry of the server's stage, request and batch-size metrics.
+    """
+
+    def __init__(self, enabled: bool = True):
+        self.enabled = enabled
+        self.stage_seconds = Histogram(
+            "osis_stage_duration_seconds", "Time spent in each prediction stage.",
+            ("stage", "path"), LATENCY_BUCKETS
+        )
+        self.request_seconds = Histogram(
+            "osis_request_duration_seconds", "HTTP request latency by route.",
+            ("endpoint", "method"), LATENCY_BUCKETS
+        )
+        self.requests = Counter(
+            "osis_requests_total", "HTTP requests by route and status code.",
+            ("endpoint", "method", "status")
+        )
+        self.batch_rows = Histogram(
+            "osis_batch_rows", "Rows per batched prediction call.", ("path",), ROW_BUCKETS
+        )
+
+    def stage(self, name: str, path: str = "single"):
+        if not self.enabled:
+            return _NOOP
+        return _StageTimer(self, name, path)
+
+    def observe_stage(self, name: str, path: str, seconds: float) -> None:
+        self.stage_seconds.observe((name, path), seconds)
+        breakdown = _request_stages.get()
+        if breakdown is not None:
+            breakdown[name] = breakdown.get(name, 0.0) + seconds
+
+    @contextlib.contextmanager
+    def collect_stages(self):
+        """
+        Collects the stage timings of the block into a fresh dict, whatever
+        the current request asked for: for work done on behalf of several
+        requests (a micro-batch), whose timings are handed to each of them
+        with `add_request_stages`.
+        """
+        breakdown: Dict[str, float] = {}
+        token = _request_stages.set(breakdown)
+        try:
+            yield breakdown
+        finally:
+            _request_stages.reset(token)
+
+    def add_request_stages(self, breakdown: Dict[str, float]) -> None:
+        """
+        Adds timings collected elsewhere to the current request's breakdown
+        (if it asked for one). The histograms already have them.
+        """
+        current = _request_stages.get()
+        if current is not None:
+            for name, seconds in breakdown.items():
+                current[name] = current.get(name, 0.0) + seconds
+
+    def observe_batch(self, path: str, rows: int) -> None:
+        if self.enabled:
+            self.batch_rows.observe((path,), rows)
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for metric in (self.requests, self.request_seconds, self.stage_seconds, self.batch_rows):
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+    def reset(self) -> None:
+        for metric in (self.requests, self.request_seconds, self.stage_seconds, self.batch_rows):
+            metric.reset()
+
+
+class _StageTimer:
+    __slots__ = ("owner", "name", "path", "start")
+
+    def __init__(self, owner: Instrumentation, name: str, path: str):
+        self.owner = owner
+        self.name = name
+        self.path = path
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.owner.observe_stage(self.name, self.path, time.perf_counter() - self.start)
+        return False
+
+
+def format_stage_header(breakdown: Dict[str, float]) -> bytes:
+    return ";".join(f"{name}={seconds * 1e3:.3f}" for name, seconds in breakdown.items()).encode("latin-1")
+
+
+class MetricsMiddleware:
+    """
+    Pure ASGI middleware: request counts and latency per route template,
+    plus the opt-in per-request stage breakdown header.
+    """
+
+    def __init__(self, app, instrumentation: Instrumentation):
+        self.app = app
+        self.instrumentation = instrumentation
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not self.instrumentation.enabled:
+            await self.app(scope, receive, send)
+            return
+
+        breakdown = None
+        if any(name == DEBUG_REQUEST_HEADER for name, _ in scope.get("headers", ())):
+            breakdown = {}
+        token = _request_stages.set(breakdown)
+        status = [500]
+        start = time.perf_counter()
+
+        async def send_with_stages(message):
+            if message["type"] == "http.response.start":
+                status[0] = message["status"]
+                if breakdown is not None:
+                    headers = list(message.get("headers", []))
+                    headers.append((DEBUG_RESPONSE_HEADER, format_stage_header(breakdown)))
+                    message = dict(message, headers=headers)
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_stages)
+        finally:
+            _request_stages.reset(token)
+            route = scope.get("route")
+            endpoint = getattr(route, "path", None) or "unmatched"
+            method = scope.get("method", "")
+            self.instrumentation.requests.inc((endpoint, method, str(status[0])))
+            self.instrumentation.request_seconds.observe((endpoint, method), time.perf_counter() - start)
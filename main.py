@@ -1,21 +1,274 @@
-from fastapi import FastAPI
+from fastapi import FastAPI, Request
+from fastapi.concurrency import run_in_threadpool
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import FileResponse
+from fastapi.responses import FileResponse, Response, StreamingResponse
 from pydantic import BaseModel
-import pandas as pd
 import numpy as np
-import joblib
+import base64
+import itertools
+import json
 import math
-from typing import Any, Dict, List, Optional
+import os
+import hashlib
+import threading
+import time
+from contextlib import asynccontextmanager
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Tuple
+from scipy.special import erfc, log_ndtr
+
+from tree_engine import compile_model
+from model_bundle import (DEFAULT_BUNDLE_ROOT, attachment_paths, bundle_matches_sources,
+                          current_bundle_dir, load_bundle)
+from model_registry import ModelRegistry, ModelSet, ModelVersionMiddleware
+from prediction_cache import PredictionCache
+from micro_batcher import MicroBatcher
+from instrumentation import Instrumentation, MetricsMiddleware, render_values
+from adaptive_search import adaptive_search
+from pareto import crowding_distance, non_dominated_mask
+from global_sensitivity import saltelli_design, sobol_indices
+from parallel_backend import MIN_SHARD_ROWS, ParallelPredictor
+from feedback import DEFAULT_FEEDBACK_DIR, FeedbackLoop
+from response_lattice import DEFAULT_LATTICE_ROOT, LATTICE_SPEC, LatticeServer
+import physics
+from physics import (HUMIDITY_MAX, HUMIDITY_MIN, K_BOLTZMANN, LAYER_COUNT_MAX, LAYER_COUNT_MIN, MATERIALS,
+                     NA_MAX, NA_MIN, TEMP_MAX, TEMP_MIN, TRACK_PITCH_MAX, TRACK_PITCH_MIN, WAVELENGTHS,
+                     calculate_physics_snr, estimate_crosstalk, estimate_spot_size_nm, physics_columns)
+
+MODEL_ARTIFACTS = [
+    "osis_snr_model.pkl",
+    "osis_snr_model_lower.pkl",
+    "osis_snr_model_upper.pkl",
+    "osis_features.pkl",
+    "osis_explainer.pkl"
+]
+
+
+def artifact_fingerprint(paths: List[str]) -> str:
+    """
+    Short version tag for the artifacts on disk (name, size, mtime).
+    """
+    digest = hashlib.sha1()
+    for path in paths:
+        stat = os.stat(path)
+        digest.update(f"{path}:{stat.st_size}:{stat.st_mtime_ns};".encode())
+    return digest.hexdigest()[:12]
+
+
+# Compiled tree models from the memory-mapped bundle (see model_bundle.py),
+# used unless it is missing or was exported from different .pkl files
+# without attaching its own copies.
+# OSIS_MODEL_BUNDLE="" (or "none") always compiles from the .pkl artifacts.
+MODEL_BUNDLE_ROOT = os.environ.get("OSIS_MODEL_BUNDLE", DEFAULT_BUNDLE_ROOT)
+BUNDLE_ENABLED = bool(MODEL_BUNDLE_ROOT) and MODEL_BUNDLE_ROOT.lower() != "none"
+
+# The sklearn models and the SHAP explainer are unpickled on first use
+# (explanations, batches above ENGINE_MAX_ROWS); `main.model` etc. still
+# resolve, for the active model version, through the module __getattr__ below.
+ARTIFACT_FILES = {
+    "model": "osis_snr_model.pkl",
+    "model_lower": "osis_snr_model_lower.pkl",
+    "model_upper": "osis_snr_model_upper.pkl",
+    "explainer": "osis_explainer.pkl"
+}
+
+# Worker processes for very large batches, opt-in: OSIS_WORKERS=0 (default)
+# or 1 keeps everything in-process. Every model version has its own pool,
+# and each worker loads that version's residual model once
+N_WORKERS = max(0, min(int(os.environ.get("OSIS_WORKERS", "0")), 32))
+PARALLEL_MIN_ROWS = int(os.environ.get("OSIS_PARALLEL_MIN_ROWS", "65536"))
+
+
+def make_model_set(version: str, engines: Dict[str, Any], columns: List[str],
+                   artifact_paths: Dict[str, str], directory: Optional[str] = None) -> ModelSet:
+    quantile_paths = [artifact_paths[name] for name in ("model_lower", "model_upper") if name in artifact_paths]
+    parallel = ParallelPredictor(
+        artifact_paths.get("model", ARTIFACT_FILES["model"]),
+        columns,
+        n_workers=N_WORKERS if "model" in artifact_paths else 0,
+        min_rows=PARALLEL_MIN_ROWS,
+        quantile_paths=quantile_paths if len(quantile_paths) == 2 else None
+    )
+    return ModelSet(version, engines, columns, artifact_paths, directory=directory, parallel=parallel)
+
+
+def bundle_model_set(directory: str) -> ModelSet:
+    """
+    One bundle version. Its pickled artifacts are the ones attached to it,
+    or the top-level .pkl files if the bundle was exported from them.
+    """
+    bundle = load_bundle(directory)
+    artifact_paths = attachment_paths(bundle)
+    if not artifact_paths:
+        if not bundle_matches_sources(bundle):
+            raise ValueError(f"Bundle {bundle['version']} has no attached artifacts "
+                             "and no longer matches the .pkl files")
+        artifact_paths = dict(ARTIFACT_FILES)
+    return make_model_set(bundle["version"], bundle["models"], bundle["feature_columns"],
+                          artifact_paths, directory=directory)
+
+
+def pickle_model_set() -> ModelSet:
+    import joblib
+    model_set = make_model_set(artifact_fingerprint(MODEL_ARTIFACTS), {},
+                               joblib.load("osis_features.pkl"), dict(ARTIFACT_FILES))
+    # Array-backed copies of the tree models used on the prediction hot path
+    model_set.engines = {
+        "residual": compile_model(model_set.artifact("model")),
+        "lower": compile_model(model_set.artifact("model_lower")),
+        "upper": compile_model(model_set.artifact("model_upper"))
+    }
+    return model_set
 
-# Load trained models, Quantiles, and Explainer
-model = joblib.load("osis_snr_model.pkl")
-model_lower = joblib.load("osis_snr_model_lower.pkl")
-model_upper = joblib.load("osis_snr_model_upper.pkl")
-feature_columns = joblib.load("osis_features.pkl")
-explainer = joblib.load("osis_explainer.pkl")
 
-app = FastAPI(title="OSIS Hybrid SNR Predictor")
+def initial_model_set() -> ModelSet:
+    directory = current_bundle_dir(MODEL_BUNDLE_ROOT) if BUNDLE_ENABLED else None
+    if directory is not None:
+        try:
+            return bundle_model_set(directory)
+        except ValueError:
+            pass
+    return pickle_model_set()
+
+
+def load_model_version(directory: str) -> ModelSet:
+    """
+    ModelSet for a hot reload. Features are built once per request for the
+    serving feature layout, so a bundle with other columns needs a restart.
+    """
+    model_set = bundle_model_set(directory)
+    if model_set.feature_columns != feature_columns:
+        raise ValueError(f"Bundle {model_set.version} has different feature columns; restart to serve it")
+    return model_set
+
+
+# The served model version: new requests pin `model_registry.current`, and
+# POST /admin/reload_model or a change of <bundle>/CURRENT (polled every
+# OSIS_MODEL_WATCH_S seconds, 0 disables) loads, warms up and swaps in
+# another bundle version
+model_registry = ModelRegistry(
+    initial_model_set(),
+    build=load_model_version,
+    warm_up=lambda model_set: warm_up_model_set(model_set),
+    on_swap=lambda old, new: on_model_swap(old, new),
+    root=MODEL_BUNDLE_ROOT if BUNDLE_ENABLED else None,
+    watch_interval_s=float(os.environ.get("OSIS_MODEL_WATCH_S", "10")),
+    retire_after_s=float(os.environ.get("OSIS_MODEL_RETIRE_S", "30"))
+)
+active_models = model_registry.active
+feature_columns = model_registry.current.feature_columns
+
+# Module attributes that follow the active model version
+_model_attributes = {
+    "engine": lambda models: models.residual,
+    "engine_lower": lambda models: models.lower,
+    "engine_upper": lambda models: models.upper,
+    "parallel_predictor": lambda models: models.parallel,
+    "MODEL_VERSION": lambda models: models.version
+}
+
+
+def preload_artifacts() -> None:
+    model_registry.current.preload()
+
+
+def __getattr__(name: str):
+    if name in ARTIFACT_FILES:
+        return active_models().artifact(name)
+    if name in _model_attributes:
+        return _model_attributes[name](active_models())
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+# Per-stage latency histograms and request counters served on /metrics
+# (OSIS_METRICS=0 turns every stage timer into a no-op)
+instrumentation = Instrumentation(enabled=os.environ.get("OSIS_METRICS", "1") != "0")
+stage = instrumentation.stage
+
+# Above this many rows sklearn's Cython traversal overtakes the NumPy engine
+ENGINE_MAX_ROWS = int(os.environ.get("OSIS_ENGINE_MAX_ROWS", "2048"))
+
+# Column position of every model feature, resolved once for the fast path
+FEATURE_INDEX = {name: idx for idx, name in enumerate(feature_columns)}
+N_FEATURES = len(feature_columns)
+
+# Single-config prediction cache (OSIS_CACHE_SIZE=0 disables it)
+_cache_decimals = os.environ.get("OSIS_CACHE_DECIMALS")
+prediction_cache = PredictionCache(
+    maxsize=int(os.environ.get("OSIS_CACHE_SIZE", "1024")),
+    ttl_seconds=float(os.environ.get("OSIS_CACHE_TTL_S", "300")),
+    quantize_decimals=int(_cache_decimals) if _cache_decimals else None
+)
+prediction_cache.set_version(model_registry.current.version)
+
+# Feedback correction added to every residual, with the model version it
+# was fitted against (None until one is published)
+residual_correction: Optional[Tuple[Any, str]] = None
+
+
+def publish_correction(correction, version: Optional[str], base_version: str) -> None:
+    """
+    Serve `correction` with the base model version it was fitted against
+    (not the current one: an update racing a model swap must not tag a
+    correction of the old residual with the new version).
+    """
+    global residual_correction
+    residual_correction = None if correction is None else (correction, base_version)
+    prediction_cache.set_version(base_version if version is None else f"{base_version}+{version}")
+
+
+# Measured-SNR feedback (OSIS_FEEDBACK=1): rows from /feedback and
+# /compare_models are buffered on disk and folded into a boosted correction
+# of the residual model every OSIS_FEEDBACK_INTERVAL_S seconds
+feedback = FeedbackLoop(
+    os.environ.get("OSIS_FEEDBACK_DIR", DEFAULT_FEEDBACK_DIR),
+    feature_columns,
+    model_registry.current.version,
+    base_predict=lambda X: model_registry.current.residual.predict(X),
+    publish=publish_correction,
+    enabled=os.environ.get("OSIS_FEEDBACK", "0") != "0",
+    capacity=int(os.environ.get("OSIS_FEEDBACK_CAPACITY", "100000")),
+    interval_s=float(os.environ.get("OSIS_FEEDBACK_INTERVAL_S", "60")),
+    min_rows=int(os.environ.get("OSIS_FEEDBACK_MIN_ROWS", "256")),
+    stages_per_update=int(os.environ.get("OSIS_FEEDBACK_STAGES", "20"))
+)
+
+
+def on_model_swap(old: ModelSet, new: ModelSet) -> None:
+    """
+    Cached predictions and the feedback correction belong to the old base
+    model; buffered feedback rows are kept for the next correction.
+    """
+    if feedback.enabled:
+        feedback.clear(new.version)
+    else:
+        publish_correction(None, None, new.version)
+    lattice_server.ensure(new)
+
+
+# Unpickle the sklearn models and explainer off the startup path (and
+# before a reloaded model version goes live)
+PRELOAD_ARTIFACTS = os.environ.get("OSIS_PRELOAD_ARTIFACTS", "1") != "0"
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    model_registry.current.parallel.warm_up()
+    if PRELOAD_ARTIFACTS:
+        threading.Thread(target=preload_artifacts, name="osis-preload", daemon=True).start()
+    feedback.start()
+    model_registry.start()
+    lattice_server.ensure(model_registry.current)
+    yield
+    await prediction_batcher.close()
+    model_registry.stop()
+    feedback.stop()
+    model_registry.current.shutdown()
+
+app = FastAPI(title="OSIS Hybrid SNR Predictor", lifespan=lifespan)
+app.add_middleware(ModelVersionMiddleware, registry=model_registry)
+if instrumentation.enabled:
+    app.add_middleware(MetricsMiddleware, instrumentation=instrumentation)
 
 app.mount("/static", StaticFiles(directory="static"), name="static")
 
@@ -23,40 +276,9 @@ app.mount("/static", StaticFiles(directory="static"), name="static")
 def read_root():
     return FileResponse("static/index.html")
 
-# -------------------------
-# PHYSICS CONSTANTS
-# -------------------------
-K_BOLTZMANN = 8.617e-5
-
-# Parameter ranges used in optimization sweeps
-NA_MIN, NA_MAX = 0.40, 0.95
-TRACK_PITCH_MIN, TRACK_PITCH_MAX = 180.0, 1800.0
-TEMP_MIN, TEMP_MAX = 20.0, 80.0
-HUMIDITY_MIN, HUMIDITY_MAX = 10.0, 90.0
-
 # -------------------------
 # HELPER FUNCTIONS
 # -------------------------
-def calculate_physics_snr(wavelength, NA, isi, crosstalk, thermal_factor):
-    """
-    Deterministic Physics Baseline SNR (Same as training)
-    """
-    return (85 
-            + 30 * NA 
-            - 0.02 * wavelength 
-            - 15 * isi 
-            - 10 * crosstalk 
-            + 5 * thermal_factor)
-
-
-def estimate_spot_size_nm(wavelength_nm: float, numerical_aperture: float) -> float:
-    return (0.61 * wavelength_nm) / numerical_aperture
-
-
-def estimate_crosstalk(track_pitch_nm: float, spot_size_nm: float, alpha: float = 0.002) -> float:
-    return math.exp(-alpha * (track_pitch_nm - spot_size_nm))
-
-
 def standardize_physical_inputs(input_dict: Dict[str, Any]) -> Dict[str, Any]:
     """
     Recompute dependent optical terms so physics consistency is preserved.
@@ -93,7 +315,98 @@ def estimate_ber_from_snr(snr_db: float, modulation: str = "OOK-NRZ") -> float:
     return max(min(ber, 0.5), 1e-15)
 
 
-def build_model_features(input_dict: Dict[str, Any]):
+def ber_snr_divisor(modulation: str = "OOK-NRZ") -> float:
+    """
+    BPSK/QPSK use erfc(sqrt(gamma)); everything else falls back to OOK-NRZ.
+    """
+    mode = modulation.upper().strip()
+    return 1.0 if mode in {"BPSK", "QPSK"} else 2.0
+
+
+def estimate_ber_array(snr_db, modulation: str = "OOK-NRZ", use_table: bool = False) -> np.ndarray:
+    """
+    Vectorized estimate_ber_from_snr: same modulations and clamps, but the
+    modulation is resolved once for the whole SNR vector.
+    """
+    snr_db = np.asarray(snr_db, dtype=np.float64)
+    if use_table:
+        return get_ber_table(modulation).lookup(snr_db)
+
+    divisor = ber_snr_divisor(modulation)
+    with np.errstate(over="ignore"):
+        snr_linear = np.maximum(np.power(10.0, snr_db / 10), 1e-12)
+    ber = 0.5 * erfc(np.sqrt(snr_linear / divisor))
+
+    return np.clip(ber, 1e-15, 0.5)
+
+
+class BERLookupTable:
+    """
+    Precomputed BER curve on a uniform SNR grid for very large sweeps.
+
+    ln(BER) is tabulated before clamping (via log_ndtr, so it never
+    underflows) and interpolated linearly in dB; the 1e-15 / 0.5 clamps are
+    applied afterwards. With the default 0.01 dB step the relative error
+    against the exact kernel is below 2.1e-5 over the table range (measured
+    on a 4x finer probe grid and stored in `max_rel_error`). SNR values
+    outside the range fall back to the exact kernel.
+    """
+
+    def __init__(self, modulation: str = "OOK-NRZ", snr_min_db: float = -30.0,
+                 snr_max_db: float = 30.0, step_db: float = 0.01):
+        self.modulation = modulation
+        self.divisor = ber_snr_divisor(modulation)
+        self.snr_min_db = snr_min_db
+        self.step_db = step_db
+        n_points = int(round((snr_max_db - snr_min_db) / step_db)) + 1
+        self.snr_max_db = snr_min_db + (n_points - 1) * step_db
+
+        grid = snr_min_db + step_db * np.arange(n_points)
+        snr_linear = np.maximum(np.power(10.0, grid / 10), 1e-12)
+        # 0.5 * erfc(x) == ndtr(-sqrt(2) * x)
+        self.ln_ber = log_ndtr(-np.sqrt(2.0 * snr_linear / self.divisor))
+        self.ln_slope = np.diff(self.ln_ber)
+
+        probe = np.linspace(self.snr_min_db, self.snr_max_db, 4 * n_points + 1)
+        exact = estimate_ber_array(probe, modulation)
+        self.max_rel_error = float(np.max(np.abs(self.lookup(probe) - exact) / exact))
+
+    def lookup(self, snr_db) -> np.ndarray:
+        shape = np.shape(snr_db)
+        snr_db = np.asarray(snr_db, dtype=np.float64).ravel()
+        if snr_db.size == 0:
+            return snr_db.reshape(shape)
+
+        position = (snr_db - self.snr_min_db) * (1.0 / self.step_db)
+        np.clip(position, 0.0, np.nextafter(len(self.ln_slope), 0), out=position)
+        idx = position.astype(np.intp)
+        position -= idx
+
+        ber = self.ln_slope[idx]
+        ber *= position
+        ber += self.ln_ber[idx]
+        np.exp(ber, out=ber)
+        np.clip(ber, 1e-15, 0.5, out=ber)
+
+        if snr_db.min() < self.snr_min_db or snr_db.max() > self.snr_max_db:
+            outside = (snr_db < self.snr_min_db) | (snr_db > self.snr_max_db)
+            ber[outside] = estimate_ber_array(snr_db[outside], self.modulation)
+        return ber.reshape(shape)
+
+
+@lru_cache(maxsize=None)
+def _ber_table_for_divisor(divisor: float) -> BERLookupTable:
+    return BERLookupTable("BPSK" if divisor == 1.0 else "OOK-NRZ")
+
+
+def get_ber_table(modulation: str = "OOK-NRZ") -> BERLookupTable:
+    return _ber_table_for_divisor(ber_snr_divisor(modulation))
+
+
+def engineer_features(input_dict: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Physics terms, interaction features and material one-hot for one config.
+    """
     input_dict = standardize_physical_inputs(input_dict)
 
     temp_k = input_dict['temperature_c'] + 273.15
@@ -118,34 +431,135 @@ def build_model_features(input_dict: Dict[str, Any]):
     input_dict['recording_material_GST_HTL'] = 1 if material == "GST_HTL" else 0
     input_dict['recording_material_MDISC'] = 1 if material == "MDISC" else 0
 
+    return input_dict
+
+
+def build_model_features(input_dict: Dict[str, Any]):
+    """
+    Reference DataFrame path; the serving path uses build_feature_vector.
+    """
+    import pandas as pd
+
+    input_dict = engineer_features(input_dict)
+
     df = pd.DataFrame([input_dict])
     df = df.reindex(columns=feature_columns, fill_value=0)
 
-    return physics_snr, df
+    return input_dict['physics_snr_db'], df
 
 
-def predict_full_metrics(input_dict: Dict[str, Any], modulation: str = "OOK-NRZ") -> Dict[str, Any]:
-    physics_snr, df = build_model_features(input_dict)
+def build_feature_vector(input_dict: Dict[str, Any]):
+    """
+    Pandas-free single-row feature matrix in `feature_columns` order.
+    Missing features are zero-filled, extra keys ignored (same as reindex).
+    """
+    input_dict = engineer_features(input_dict)
+
+    X = np.zeros((1, N_FEATURES))
+    row = X[0]
+    for name, idx in FEATURE_INDEX.items():
+        value = input_dict.get(name)
+        if value is not None:
+            row[idx] = value
+
+    return input_dict['physics_snr_db'], X
+
+
+def predict_full_metrics(input_dict: Dict[str, Any], modulation: str = "OOK-NRZ",
+                         explain: bool = False) -> Dict[str, Any]:
+    """
+    Cached front for compute_full_metrics, keyed on the canonical config.
+    SHAP explanations are only computed (and cached separately) on request.
+    """
+    with stage("standardize"):
+        canonical = standardize_physical_inputs(input_dict)
+        key = prediction_cache.make_key(canonical, ber_snr_divisor(modulation))
+    # Models after the key: a swap switches the registry before the cache
+    # version, so an entry is never keyed newer than the model it came from
+    models = active_models()
+    with stage("cache_lookup"):
+        metrics = prediction_cache.get(key)
+    if metrics is None:
+        metrics = compute_full_metrics(input_dict, modulation=modulation, models=models)
+        prediction_cache.put(key, metrics)
+
+    return attach_explanation(dict(metrics), input_dict, canonical, explain)
+
+
+async def predict_full_metrics_batched(input_dict: Dict[str, Any], modulation: str = "OOK-NRZ",
+                                       explain: bool = False) -> Dict[str, Any]:
+    """
+    predict_full_metrics for the request handlers: cache misses wait in the
+    micro-batcher and are predicted together with concurrent requests.
+    """
+    with stage("standardize"):
+        canonical = standardize_physical_inputs(input_dict)
+        key = prediction_cache.make_key(canonical, ber_snr_divisor(modulation))
+    # Models after the key: a swap switches the registry before the cache
+    # version, so an entry is never keyed newer than the model it came from
+    models = active_models()
+    with stage("cache_lookup"):
+        metrics = prediction_cache.get(key)
+    if metrics is None:
+        # Window wait plus the shared batch pass
+        with stage("micro_batch"):
+            metrics, batch_stages = await prediction_batcher.submit((input_dict, modulation, models))
+        instrumentation.add_request_stages(batch_stages)
+        prediction_cache.put(key, metrics)
+
+    if not explain:
+        return dict(metrics)
+    return await run_in_threadpool(attach_explanation, dict(metrics), input_dict, canonical, explain)
+
+
+def attach_explanation(metrics: Dict[str, Any], input_dict: Dict[str, Any],
+                       canonical: Dict[str, Any], explain: bool) -> Dict[str, Any]:
+    if explain:
+        shap_key = prediction_cache.make_key(canonical, "shap")
+        explanation = prediction_cache.get(shap_key)
+        if explanation is None:
+            with stage("shap"):
+                explanation = explain_configs([input_dict])[0]
+            prediction_cache.put(shap_key, explanation)
+        metrics["shap_explanations"] = explanation
+
+    return metrics
+
+
+def feedback_correction(X: np.ndarray, models: ModelSet, path: str = "single"):
+    """
+    The published feedback correction for each row (0.0 while there is none,
+    or when it was fitted against another model version). It shifts the
+    quantile bounds along with the residual.
+    """
+    published = residual_correction
+    if published is None or published[1] != models.version:
+        return 0.0
+    with stage("model.correction", path=path):
+        return published[0].predict(X)
+
+
+def compute_full_metrics(input_dict: Dict[str, Any], modulation: str = "OOK-NRZ",
+                         models: Optional[ModelSet] = None) -> Dict[str, Any]:
+    models = models or active_models()
+    with stage("features"):
+        physics_snr, X = build_feature_vector(input_dict)
+    correction = float(np.ravel(feedback_correction(X, models))[0])
     
     # 1. Main Ensemble Prediction
-    ml_residual = float(model.predict(df)[0])
+    with stage("model.residual"):
+        ml_residual = float(models.residual.predict(X)[0]) + correction
     final_snr = float(physics_snr + ml_residual)
     
     # 2. Uncertainty Quantification (Quantile Regression)
-    lower_res = float(model_lower.predict(df)[0])
-    upper_res = float(model_upper.predict(df)[0])
+    with stage("model.quantiles"):
+        lower_res = float(models.lower.predict(X)[0]) + correction
+        upper_res = float(models.upper.predict(X)[0]) + correction
     snr_lower = float(physics_snr + lower_res)
     snr_upper = float(physics_snr + upper_res)
-    
-    # 3. Explainable AI (SHAP)
-    # The explainer returns shap_values -> base_values + values
-    shap_vals = explainer(df)
-    # Get the top 5 most impactful features for this specific prediction
-    feature_importances = list(zip(feature_columns, shap_vals.values[0]))
-    feature_importances.sort(key=lambda x: abs(x[1]), reverse=True)
-    top_explanations = [{"feature": f, "impact": float(val)} for f, val in feature_importances[:5]]
 
-    ber = estimate_ber_from_snr(final_snr, modulation=modulation)
+    with stage("ber"):
+        ber = estimate_ber_from_snr(final_snr, modulation=modulation)
 
     return {
         "physics_snr_db": physics_snr,
@@ -153,52 +567,255 @@ def predict_full_metrics(input_dict: Dict[str, Any], modulation: str = "OOK-NRZ"
         "predicted_snr_db": final_snr,
         "snr_lower_bound_db": snr_lower,
         "snr_upper_bound_db": snr_upper,
-        "estimated_ber": ber,
-        "shap_explanations": top_explanations
+        "estimated_ber": ber
     }
 
-def predict_batch_metrics(candidates: List[Dict[str, Any]], modulation: str = "OOK-NRZ") -> List[Dict[str, float]]:
-    if not candidates:
+
+def compute_full_metrics_batch(requests: List[Tuple]) -> List[Dict[str, Any]]:
+    """
+    compute_full_metrics for many (config, modulation[, ModelSet]) requests:
+    one feature build and one pass per tree model for each model version in
+    the batch (requests without one use the active version).
+    """
+    instrumentation.observe_batch("micro_batch", len(requests))
+    groups: Dict[int, Tuple[ModelSet, List[int]]] = {}
+    for i, request in enumerate(requests):
+        models = request[2] if len(request) > 2 else active_models()
+        groups.setdefault(id(models), (models, []))[1].append(i)
+
+    results: List[Dict[str, Any]] = [{} for _ in requests]
+    for models, rows in groups.values():
+        group = [requests[i] for i in rows]
+        for i, metrics in zip(rows, _full_metrics_rows(group, models)):
+            results[i] = metrics
+    return results
+
+
+def _full_metrics_rows(requests: List[Tuple], models: ModelSet) -> List[Dict[str, Any]]:
+    with stage("features", path="micro_batch"):
+        physics_snr, X = build_batch_features([request[0] for request in requests])
+    correction = feedback_correction(X, models, path="micro_batch")
+    with stage("model.residual", path="micro_batch"):
+        ml_residual = models.residual.predict(X) + correction
+    with stage("model.quantiles", path="micro_batch"):
+        lower_res = models.lower.predict(X) + correction
+        upper_res = models.upper.predict(X) + correction
+
+    final_snr = (physics_snr + ml_residual).tolist()
+    with stage("ber", path="micro_batch"):
+        bers = [estimate_ber_from_snr(snr, modulation=request[1]) for snr, request in zip(final_snr, requests)]
+
+    results = []
+    for i in range(len(requests)):
+        results.append({
+            "physics_snr_db": float(physics_snr[i]),
+            "ml_residual_db": float(ml_residual[i]),
+            "predicted_snr_db": final_snr[i],
+            "snr_lower_bound_db": float(physics_snr[i] + lower_res[i]),
+            "snr_upper_bound_db": float(physics_snr[i] + upper_res[i]),
+            "estimated_ber": bers[i]
+        })
+    return results
+
+
+def _micro_batch_metrics(requests: List[Tuple]) -> List[Tuple[Dict[str, Any], Dict[str, float]]]:
+    """
+    compute_full_metrics_batch for the micro-batcher. The batch runs in a
+    worker thread, outside every request's context, so its stage timings
+    are collected here and returned with each result.
+    """
+    with instrumentation.collect_stages() as batch_stages:
+        results = compute_full_metrics_batch(requests)
+    return [(metrics, batch_stages) for metrics in results]
+
+
+# Concurrent single-config requests are collected for up to
+# OSIS_BATCH_WINDOW_MS (0 disables batching) or OSIS_BATCH_MAX_SIZE
+# requests and predicted in one compute_full_metrics_batch call
+prediction_batcher = MicroBatcher(
+    _micro_batch_metrics,
+    max_batch_size=int(os.environ.get("OSIS_BATCH_MAX_SIZE", "64")),
+    max_wait_s=float(os.environ.get("OSIS_BATCH_WINDOW_MS", "2")) / 1e3
+)
+
+
+def explain_features(X: np.ndarray, top_n: int = 5) -> List[List[Dict[str, Any]]]:
+    """
+    Top SHAP contributions per row, from one vectorized explainer call.
+    """
+    # The explainer returns shap_values -> base_values + values
+    explainer = active_models().artifact("explainer")
+    shap_values = np.asarray(explainer(X).values).reshape(len(X), -1)
+    # Stable order keeps the original feature order among equal impacts
+    order = np.argsort(-np.abs(shap_values), axis=1, kind="stable")[:, :top_n]
+
+    return [
+        [{"feature": feature_columns[j], "impact": float(row_values[j])} for j in row_order]
+        for row_values, row_order in zip(shap_values, order)
+    ]
+
+
+def explain_configs(configs: List[Dict[str, Any]], top_n: int = 5) -> List[List[Dict[str, Any]]]:
+    if not configs:
         return []
+    _, X = build_batch_features(configs)
+    return explain_features(X, top_n=top_n)
 
-    # Standardize inputs
-    standardized = [standardize_physical_inputs(c) for c in candidates]
-    df = pd.DataFrame(standardized)
 
-    temp_k = df['temperature_c'] + 273.15
-    df['thermal_factor'] = np.exp(-df['activation_energy_ev'] / (K_BOLTZMANN * temp_k))
+def engineer_feature_arrays(columns: Dict[str, Any], shape: Tuple[int, ...]):
+    """
+    physics.engineer_feature_arrays for the serving feature layout.
+    """
+    return physics.engineer_feature_arrays(columns, shape, FEATURE_INDEX)
 
-    df['physics_snr_db'] = (85 
-            + 30 * df['numerical_aperture'] 
-            - 0.02 * df['laser_wavelength_nm'] 
-            - 15 * df['isi_factor'] 
-            - 10 * df['crosstalk_factor'] 
-            + 5 * df['thermal_factor'])
 
-    df['NA_sq'] = df['numerical_aperture'] ** 2
-    df['wavelength_div_NA'] = df['laser_wavelength_nm'] / df['numerical_aperture']
-    df['spot_div_pitch'] = df['spot_size_nm'] / df['track_pitch_nm']
-    df['temp_x_humidity'] = df['temperature_c'] * df['relative_humidity']
+def batch_columns(candidates: List[Dict[str, Any]]) -> Dict[str, np.ndarray]:
+    return {
+        name: np.asarray([c[name] for c in candidates])
+        for name in candidates[0]
+    }
 
-    materials = df['recording_material']
-    df['recording_material_GST_HTL'] = (materials == "GST_HTL").astype(int)
-    df['recording_material_MDISC'] = (materials == "MDISC").astype(int)
 
-    X = df.reindex(columns=feature_columns, fill_value=0)
+def build_batch_features(candidates: List[Dict[str, Any]]):
+    """
+    Vectorized feature engineering for many configs at once.
+    Returns the physics baseline SNR per row and the model feature matrix.
+    """
+    return engineer_feature_arrays(batch_columns(candidates), (len(candidates),))
 
-    ml_residuals = model.predict(X)
-    final_snr = df['physics_snr_db'] + ml_residuals
 
-    results = []
-    for i in range(len(df)):
-        snr = float(final_snr.iloc[i])
-        results.append({
-            "physics_snr_db": float(df['physics_snr_db'].iloc[i]),
-            "ml_residual_db": float(ml_residuals[i]),
-            "predicted_snr_db": snr,
-            "estimated_ber": estimate_ber_from_snr(snr, modulation=modulation)
+def grid_columns(base: Dict[str, Any], axes: Dict[str, Any]):
+    """
+    Input columns for the Cartesian product of `axes` (name -> values),
+    every other input fixed at `base`, as arrays broadcastable to the grid
+    shape. Rows are in C order over `axes`: the same order as nested loops
+    with the first axis outermost.
+    """
+    shape = tuple(len(values) for values in axes.values())
+    columns = dict(base)
+    for dim, (name, values) in enumerate(axes.items()):
+        view = [1] * len(shape)
+        view[dim] = -1
+        columns[name] = np.asarray(values).reshape(view)
+    return columns, shape
+
+
+def build_grid_features(base: Dict[str, Any], axes: Dict[str, Any]):
+    """
+    Features for the Cartesian product of `axes` without building
+    per-candidate dicts (see grid_columns).
+    """
+    columns, shape = grid_columns(base, axes)
+    return engineer_feature_arrays(columns, shape)
+
+
+def predict_residuals(X: np.ndarray, models: Optional[ModelSet] = None) -> np.ndarray:
+    models = models or active_models()
+    if models.parallel is not None and models.parallel.should_parallelize(len(X)):
+        residuals = models.parallel.predict(X)
+    elif len(X) > ENGINE_MAX_ROWS and models.has_artifact("model"):
+        import pandas as pd
+        with stage("dataframe", path="batch"):
+            frame = pd.DataFrame(X, columns=feature_columns, copy=False)
+        residuals = models.artifact("model").predict(frame)
+    else:
+        residuals = models.residual.predict(X)
+    return residuals + feedback_correction(X, models, path="batch")
+
+
+def predict_residual_bounds(X: np.ndarray, models: Optional[ModelSet] = None):
+    """
+    Residual, lower and upper quantile predictions from one feature matrix,
+    each with the feedback correction.
+    """
+    models = models or active_models()
+    residual, lower, upper = model_residual_bounds(X, models)
+    correction = feedback_correction(X, models, path="batch")
+    return residual + correction, lower + correction, upper + correction
+
+
+def model_residual_bounds(X: np.ndarray, models: ModelSet):
+    """
+    Uncorrected residual, lower and upper predictions. Up to ENGINE_MAX_ROWS
+    rows the three engines run as one fused traversal; larger batches share
+    one DataFrame across the sklearn models (or go to the worker pool).
+    """
+    parallel = models.parallel
+    sklearn_names = ("model", "model_lower", "model_upper")
+    if parallel is not None and parallel.has_bounds and parallel.should_parallelize(len(X)):
+        residual, lower, upper = parallel.predict_with_bounds(X)
+    elif len(X) > ENGINE_MAX_ROWS and all(models.has_artifact(name) for name in sklearn_names):
+        import pandas as pd
+        with stage("dataframe", path="batch"):
+            frame = pd.DataFrame(X, columns=models.feature_columns, copy=False)
+        residual, lower, upper = (models.artifact(name).predict(frame) for name in sklearn_names)
+    elif models.fused is not None:
+        fused = models.fused.predict(X)
+        residual, lower, upper = fused["residual"], fused["lower"], fused["upper"]
+    else:
+        residual, lower, upper = models.residual.predict(X), models.lower.predict(X), models.upper.predict(X)
+    return residual, lower, upper
+
+
+# 5%/95% quantile bounds added to batch outputs on request. BER falls as SNR
+# rises, so the BER upper bound comes from the SNR lower bound.
+BOUND_FIELDS = ["snr_lower_bound_db", "snr_upper_bound_db", "ber_lower_bound", "ber_upper_bound"]
+
+
+def predict_batch_arrays(physics_snr: np.ndarray, X: np.ndarray, modulation: str = "OOK-NRZ",
+                         use_ber_table: bool = False, bounds: bool = False) -> Dict[str, np.ndarray]:
+    if not bounds:
+        with stage("model.residual", path="batch"):
+            residuals = [predict_residuals(X)]
+    else:
+        with stage("model.fused", path="batch"):
+            residuals = predict_residual_bounds(X)
+    return batch_arrays(physics_snr, residuals, modulation, use_ber_table)
+
+
+def batch_arrays(physics_snr: np.ndarray, residuals, modulation: str = "OOK-NRZ",
+                 use_ber_table: bool = False) -> Dict[str, np.ndarray]:
+    """
+    Output arrays from the residual (and, if given, lower and upper
+    quantile residuals): SNR and BER for all of them through one BER call.
+    """
+    snr = physics_snr + np.stack(residuals)
+    with stage("ber", path="batch"):
+        ber = estimate_ber_array(snr, modulation=modulation, use_table=use_ber_table)
+    arrays = {
+        "physics_snr_db": physics_snr,
+        "ml_residual_db": np.asarray(residuals[0]),
+        "predicted_snr_db": snr[0],
+        "estimated_ber": ber[0]
+    }
+    if len(residuals) == 3:
+        arrays.update({
+            "snr_lower_bound_db": snr[1],
+            "snr_upper_bound_db": snr[2],
+            "ber_lower_bound": ber[2],
+            "ber_upper_bound": ber[1]
         })
-    return results
+    return arrays
+
+
+def predict_batch_metrics(candidates: List[Dict[str, Any]], modulation: str = "OOK-NRZ",
+                          use_ber_table: bool = False, bounds: bool = False) -> List[Dict[str, float]]:
+    if not candidates:
+        return []
+
+    instrumentation.observe_batch("batch", len(candidates))
+    columns = batch_columns(candidates)
+    arrays = lattice_batch_arrays(columns, (len(candidates),), modulation, use_ber_table, bounds)
+    if arrays is None:
+        with stage("features", path="batch"):
+            physics_snr, X = engineer_feature_arrays(columns, (len(candidates),))
+        arrays = predict_batch_arrays(physics_snr, X, modulation=modulation, use_ber_table=use_ber_table,
+                                      bounds=bounds)
+
+    with stage("format", path="batch"):
+        names = list(arrays)
+        columns = [arrays[name].tolist() for name in names]
+        return [dict(zip(names, row)) for row in zip(*columns)]
 
 # -------------------------
 # INPUT SCHEMA
@@ -230,10 +847,33 @@ class ComparisonInput(OSISInput):
     measured_snr_db: Optional[float] = None
 
 
+class FeedbackSample(OSISInput):
+    measured_snr_db: float
+
+
+class FeedbackInput(BaseModel):
+    samples: List[FeedbackSample]
+
+
 class OptimizationInput(BaseModel):
     base_config: OSISInput
     modulation: str = "OOK-NRZ"
     top_k: int = 5
+    search_mode: str = "grid"  # grid, adaptive
+    budget: int = 2000
+    seed: int = 0
+    grid_steps: Optional[int] = None  # points per continuous axis (grid mode)
+    rank_by: str = "expected"  # expected, worst_case (5% SNR / 95% BER bounds)
+    include_bounds: bool = False
+
+
+class ParetoInput(BaseModel):
+    base_config: OSISInput
+    modulation: str = "OOK-NRZ"
+    objectives: List[str] = ["snr", "track_pitch", "layer_count"]
+    grid_steps: int = 8  # points per continuous axis
+    max_points: int = 50
+    ber_table: bool = False  # BER from the precomputed lookup table (see BERLookupTable)
 
 
 class SensitivityInput(OSISInput):
@@ -241,6 +881,17 @@ class SensitivityInput(OSISInput):
     modulation: str = "OOK-NRZ"
 
 
+class GlobalSensitivityInput(BaseModel):
+    base_config: OSISInput
+    modulation: str = "OOK-NRZ"
+    parameters: Optional[List[str]] = None  # default: every GLOBAL_SENSITIVITY_RANGES entry
+    output: str = "snr"  # snr, ber (log10)
+    samples: int = 4096  # base sample size N; N * (d + 2) evaluations
+    bootstrap: int = 200
+    confidence: float = 0.95
+    seed: int = 0
+
+
 class SimulationInput(BaseModel):
     base_config: OSISInput
     sweep_parameter: str = "numerical_aperture"
@@ -248,13 +899,82 @@ class SimulationInput(BaseModel):
     end: float
     steps: int = 20
     modulation: str = "OOK-NRZ"
+    include_bounds: bool = False  # 5%/95% SNR and matching BER bounds per frame
+
+
+class SimulationStreamInput(SimulationInput):
+    chunk_size: int = 1024  # frames per streamed message
+    format: str = "ndjson"  # ndjson, sse
+    ber_table: bool = False  # BER from the precomputed lookup table (see BERLookupTable)
+
+
+class SweepAxis(BaseModel):
+    parameter: str
+    start: Optional[float] = None
+    end: Optional[float] = None
+    steps: int = 50
+    values: Optional[List[Any]] = None  # explicit values instead of start/end/steps
+
+
+class SweepGridInput(BaseModel):
+    base_config: OSISInput
+    axes: List[SweepAxis]
+    modulation: str = "OOK-NRZ"
+    encoding: str = "base64"  # base64 (JSON), binary (application/octet-stream)
+    include_bounds: bool = False  # adds BOUND_FIELDS after SWEEP_GRID_FIELDS
+    ber_table: bool = False  # BER from the precomputed lookup table (see BERLookupTable)
+
+
+class SimulationOptions(BaseModel):
+    sweep_parameter: str = "numerical_aperture"
+    start: float
+    end: float
+    steps: int = 20
+
+
+class EvaluationInput(BaseModel):
+    base_config: OSISInput
+    modulation: str = "OOK-NRZ"
+    measured_snr_db: Optional[float] = None
+    top_k: int = 5
+    delta_fraction: float = 0.05
+    simulation: Optional[SimulationOptions] = None
+    explain: bool = True
+
+
+class ModelReloadInput(BaseModel):
+    version: Optional[str] = None  # bundle version to serve; default: the one CURRENT names
+
+
+class ExplainInput(BaseModel):
+    configs: List[OSISInput]
+    top_n: int = 5
 
 # -------------------------
-# PREDICTION API
+# PANEL BUILDERS
 # -------------------------
-@app.post("/predict_snr")
-def predict_snr(data: OSISInput):
-    metrics = predict_full_metrics(data.model_dump(), modulation="OOK-NRZ")
+SENSITIVITY_PARAMETERS = [
+    "laser_wavelength_nm",
+    "numerical_aperture",
+    "track_pitch_nm",
+    "layer_count",
+    "layer_spacing_nm",
+    "thermal_conductivity_w_mk",
+    "activation_energy_ev",
+    "temperature_c",
+    "relative_humidity"
+]
+
+SWEEP_PARAMETERS = {
+    "numerical_aperture",
+    "track_pitch_nm",
+    "temperature_c",
+    "relative_humidity",
+    "laser_wavelength_nm"
+}
+
+
+def format_snr_response(metrics: Dict[str, Any]) -> Dict[str, Any]:
     return {
         "physics_snr_db": round(metrics["physics_snr_db"], 2),
         "ml_residual_db": round(metrics["ml_residual_db"], 2),
@@ -262,23 +982,16 @@ def predict_snr(data: OSISInput):
     }
 
 
-@app.post("/predict_ber")
-def predict_ber(data: BERInput):
-    metrics = predict_full_metrics(data.model_dump(), modulation=data.modulation)
+def format_ber_response(metrics: Dict[str, Any], modulation: str) -> Dict[str, Any]:
     return {
         "predicted_snr_db": round(metrics["predicted_snr_db"], 3),
         "estimated_ber": float(metrics["estimated_ber"]),
-        "modulation": data.modulation.upper()
+        "modulation": modulation.upper()
     }
 
 
-@app.post("/compare_models")
-def compare_models(data: ComparisonInput):
-    payload = data.model_dump()
-    modulation = payload.pop("modulation")
-    measured = payload.pop("measured_snr_db", None)
-
-    metrics = predict_full_metrics(payload, modulation=modulation)
+def format_comparison_response(metrics: Dict[str, Any], modulation: str,
+                               measured: Optional[float] = None) -> Dict[str, Any]:
     analytical_ber = estimate_ber_from_snr(metrics["physics_snr_db"], modulation=modulation)
 
     response = {
@@ -299,106 +1012,418 @@ def compare_models(data: ComparisonInput):
     return response
 
 
-@app.post("/optimize_parameters")
-def optimize_parameters(data: OptimizationInput):
-    base = standardize_physical_inputs(data.base_config.model_dump())
+# Response-surface lattice (see response_lattice.py). With OSIS_LATTICE=1,
+# batches whose inputs all lie on the lattice (the categorical choices,
+# the continuous box, and the fixed inputs at the dashboard defaults of
+# LATTICE_SPEC) are interpolated from it instead of running the models.
+LATTICE_ENABLED = os.environ.get("OSIS_LATTICE", "0") == "1"
+LATTICE_ROOT = os.environ.get("OSIS_LATTICE_DIR", DEFAULT_LATTICE_ROOT)
 
-    na_candidates = np.linspace(
-        max(NA_MIN, base["numerical_aperture"] - 0.1),
-        min(NA_MAX, base["numerical_aperture"] + 0.1),
-        7
-    )
-    pitch_candidates = np.linspace(
-        max(TRACK_PITCH_MIN, base["track_pitch_nm"] * 0.85),
-        min(TRACK_PITCH_MAX, base["track_pitch_nm"] * 1.15),
-        7
-    )
-    temp_candidates = np.linspace(
-        max(TEMP_MIN, base["temperature_c"] - 15),
-        min(TEMP_MAX, base["temperature_c"] + 15),
-        5
-    )
-    humidity_candidates = np.linspace(
-        max(HUMIDITY_MIN, base["relative_humidity"] - 30),
-        min(HUMIDITY_MAX, base["relative_humidity"] + 30),
-        5
-    )
-    material_candidates = ["GST_HTL", "DYE_LTH", "MDISC"]
+
+def lattice_evaluator(models: ModelSet):
+    """
+    Uncorrected residual, lower and upper predictions of `models`, the
+    values a lattice stores.
+    """
+    def evaluate(columns: Dict[str, Any], shape: Tuple[int, ...]) -> np.ndarray:
+        _, X = engineer_feature_arrays(columns, shape)
+        return np.stack(model_residual_bounds(X, models))
+    return evaluate
+
+
+lattice_server = LatticeServer(LATTICE_ROOT, LATTICE_SPEC, lattice_evaluator, enabled=LATTICE_ENABLED)
+
+
+def lattice_batch_arrays(columns: Dict[str, Any], shape: Tuple[int, ...], modulation: str = "OOK-NRZ",
+                         use_ber_table: bool = False, bounds: bool = False) -> Optional[Dict[str, np.ndarray]]:
+    """
+    predict_batch_arrays outputs interpolated from the lattice of the active
+    model version, or None when there is none or it does not cover every
+    row. The lattice holds the uncorrected models, so it is not used while
+    a feedback correction is published for that version.
+    """
+    models = active_models()
+    lattice = lattice_server.lattice_for(models.version)
+    published = residual_correction
+    if lattice is None or (published is not None and published[1] == models.version):
+        return None
+    if not lattice.covers(columns):
+        return None
+
+    with stage("lattice", path="batch"):
+        residuals = lattice.interpolate(columns, shape)
+        physics_snr = np.broadcast_to(physics_columns(columns)["physics_snr_db"], shape).reshape(-1)
+    return batch_arrays(physics_snr, residuals if bounds else residuals[:1], modulation, use_ber_table)
+
+
+def optimization_search_space(base: Dict[str, Any]):
+    """
+    Box searched around an operating point: continuous bounds plus the
+    categorical choices, shared by the grid and adaptive optimizers.
+    """
+    continuous = {
+        "numerical_aperture": (
+            max(NA_MIN, base["numerical_aperture"] - 0.1),
+            min(NA_MAX, base["numerical_aperture"] + 0.1)
+        ),
+        "track_pitch_nm": (
+            max(TRACK_PITCH_MIN, base["track_pitch_nm"] * 0.85),
+            min(TRACK_PITCH_MAX, base["track_pitch_nm"] * 1.15)
+        ),
+        "temperature_c": (
+            max(TEMP_MIN, base["temperature_c"] - 15),
+            min(TEMP_MAX, base["temperature_c"] + 15)
+        ),
+        "relative_humidity": (
+            max(HUMIDITY_MIN, base["relative_humidity"] - 30),
+            min(HUMIDITY_MAX, base["relative_humidity"] + 30)
+        )
+    }
+    categorical = {
+        "recording_material": MATERIALS,
+        "prml_enabled": [0, 1],
+        "ctc_enabled": [0, 1]
+    }
+    return continuous, categorical
+
+
+# Grid points per continuous axis for search_mode="grid"
+OPTIMIZATION_GRID_POINTS = {
+    "numerical_aperture": 7,
+    "track_pitch_nm": 7,
+    "temperature_c": 5,
+    "relative_humidity": 5
+}
+MAX_GRID_STEPS = 18
+# Rows routed through the models per grid chunk; large enough to give every
+# worker process a full shard when the parallel backend is enabled
+GRID_CHUNK_ROWS = max(131_072, N_WORKERS * MIN_SHARD_ROWS)
+
+
+def optimization_grid_axes(base: Dict[str, Any], grid_steps: Optional[int] = None) -> Dict[str, Any]:
+    """
+    Grid axes in nested-loop order. `grid_steps` overrides the number of
+    points on every continuous axis.
+    """
+    continuous, categorical = optimization_search_space(base)
+    axes: Dict[str, Any] = {}
+    for name, (low, high) in continuous.items():
+        axes[name] = np.linspace(low, high, grid_steps or OPTIMIZATION_GRID_POINTS[name])
+    axes.update(categorical)
+    return axes
+
+
+def build_optimization_candidates(base_config: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """
+    Reference dict path for the default grid; the endpoints use
+    run_grid_optimization, which never materializes these dicts.
+    """
+    base = standardize_physical_inputs(base_config)
+    axes = optimization_grid_axes(base)
 
     candidates = []
+    for values in itertools.product(*axes.values()):
+        candidate = dict(base)
+        for name, value in zip(axes, values):
+            candidate[name] = value.item() if isinstance(value, np.generic) else value
+        candidates.append(candidate)
+
+    return candidates
+
+
+def optimization_objective_arrays(snr_db: np.ndarray, ber: np.ndarray) -> np.ndarray:
+    return snr_db - 10 * np.log10(np.maximum(ber, 1e-15))
 
-    for na in na_candidates:
-        for pitch in pitch_candidates:
-            for temp in temp_candidates:
-                for humidity in humidity_candidates:
-                    for material in material_candidates:
-                        for prml in [0, 1]:
-                            for ctc in [0, 1]:
-                                candidate = dict(base)
-                                candidate["numerical_aperture"] = float(na)
-                                candidate["track_pitch_nm"] = float(pitch)
-                                candidate["temperature_c"] = float(temp)
-                                candidate["relative_humidity"] = float(humidity)
-                                candidate["recording_material"] = material
-                                candidate["prml_enabled"] = prml
-                                candidate["ctc_enabled"] = ctc
-                                candidates.append(candidate)
-
-    batch_metrics = predict_batch_metrics(candidates, modulation=data.modulation)
-
-    ranked: List[Dict[str, Any]] = []
-
-    for candidate, metrics in zip(candidates, batch_metrics):
-        objective = metrics["predicted_snr_db"] - (10 * math.log10(max(metrics["estimated_ber"], 1e-15)))
-
-        ranked.append({
-            "objective_score": objective,
-            "predicted_snr_db": metrics["predicted_snr_db"],
-            "estimated_ber": metrics["estimated_ber"],
-            "numerical_aperture": candidate["numerical_aperture"],
-            "track_pitch_nm": candidate["track_pitch_nm"],
-            "temperature_c": candidate["temperature_c"],
-            "relative_humidity": candidate["relative_humidity"],
-            "recording_material": candidate["recording_material"],
-            "prml_enabled": candidate["prml_enabled"],
-            "ctc_enabled": candidate["ctc_enabled"]
-        })
 
-    ranked.sort(key=lambda x: x["objective_score"], reverse=True)
-    top_k = max(1, min(data.top_k, 20))
-    best = ranked[:top_k]
+# rank_by -> (SNR field, BER field) the objective is computed from
+RANKING_FIELDS = {
+    "expected": ("predicted_snr_db", "estimated_ber"),
+    "worst_case": ("snr_lower_bound_db", "ber_upper_bound")
+}
 
+
+def optimization_objective(batch_metrics: List[Dict[str, float]], rank_by: str = "expected") -> np.ndarray:
+    snr_field, ber_field = RANKING_FIELDS[rank_by]
+    snr = np.array([m[snr_field] for m in batch_metrics])
+    ber = np.array([m[ber_field] for m in batch_metrics])
+    return optimization_objective_arrays(snr, ber)
+
+
+def top_k_indices(scores: np.ndarray, top_k: int) -> np.ndarray:
+    """
+    Indices of the best `top_k` scores, best first; ties keep input order.
+    """
+    top_k = max(1, min(top_k, 20))
+    if len(scores) > 4 * top_k:
+        # Partition first, then stable-sort only the (tie-inclusive) head
+        cutoff = np.partition(-scores, top_k - 1)[top_k - 1]
+        head = np.flatnonzero(-scores <= cutoff)
+        return head[np.argsort(-scores[head], kind="stable")][:top_k]
+    return np.argsort(-scores, kind="stable")[:top_k]
+
+
+def optimization_recommendation(candidate: Dict[str, Any], objective: float,
+                                snr_db: float, ber: float) -> Dict[str, Any]:
+    return {
+        "objective_score": objective,
+        "predicted_snr_db": snr_db,
+        "estimated_ber": ber,
+        "numerical_aperture": candidate["numerical_aperture"],
+        "track_pitch_nm": candidate["track_pitch_nm"],
+        "temperature_c": candidate["temperature_c"],
+        "relative_humidity": candidate["relative_humidity"],
+        "recording_material": candidate["recording_material"],
+        "prml_enabled": candidate["prml_enabled"],
+        "ctc_enabled": candidate["ctc_enabled"]
+    }
+
+
+def optimization_response(modulation: str, evaluated: int, best: List[Dict[str, Any]],
+                          rank_by: str = "expected") -> Dict[str, Any]:
     return {
         "optimization_goal": "maximize_snr_and_minimize_ber",
-        "modulation": data.modulation.upper(),
-        "evaluated_candidates": len(ranked),
+        "rank_by": rank_by,
+        "modulation": modulation.upper(),
+        "evaluated_candidates": evaluated,
         "top_recommendations": best
     }
 
 
-@app.post("/sensitivity_analysis")
-def sensitivity_analysis(data: SensitivityInput):
-    payload = data.model_dump()
-    delta_fraction = min(max(payload.pop("delta_fraction", 0.05), 0.01), 0.2)
-    modulation = payload.pop("modulation", "OOK-NRZ")
+def rank_optimization(candidates: List[Dict[str, Any]], batch_metrics: List[Dict[str, float]],
+                      modulation: str, top_k: int, rank_by: str = "expected") -> Dict[str, Any]:
+    objective = optimization_objective(batch_metrics, rank_by)
+    best = []
+    for i in top_k_indices(objective, top_k):
+        recommendation = optimization_recommendation(
+            candidates[i], float(objective[i]),
+            batch_metrics[i]["predicted_snr_db"], batch_metrics[i]["estimated_ber"]
+        )
+        recommendation.update((field, batch_metrics[i][field])
+                              for field in BOUND_FIELDS if field in batch_metrics[i])
+        best.append(recommendation)
+    return optimization_response(modulation, len(candidates), best, rank_by)
 
-    baseline = predict_full_metrics(payload, modulation=modulation)
-    baseline_snr = baseline["predicted_snr_db"]
 
-    tunable = [
-        "laser_wavelength_nm",
-        "numerical_aperture",
-        "track_pitch_nm",
-        "layer_count",
-        "layer_spacing_nm",
-        "thermal_conductivity_w_mk",
-        "activation_energy_ev",
-        "temperature_c",
-        "relative_humidity"
-    ]
+def evaluate_grid_arrays(base: Dict[str, Any], axes: Dict[str, Any], modulation: str = "OOK-NRZ",
+                         bounds: bool = False, use_ber_table: bool = False) -> Dict[str, np.ndarray]:
+    """
+    Predicted SNR and BER (plus BOUND_FIELDS with `bounds`) for every row of
+    the `axes` grid (C order). Features are built in chunks along the
+    leading axis to bound memory.
+    """
+    names = list(axes)
+    lead, rest = names[0], names[1:]
+    rows_per_lead = int(np.prod([len(axes[name]) for name in rest]))
+    per_chunk = max(1, GRID_CHUNK_ROWS // rows_per_lead)
+    fields = ["predicted_snr_db", "estimated_ber"] + (BOUND_FIELDS if bounds else [])
+
+    parts: Dict[str, List[np.ndarray]] = {field: [] for field in fields}
+    for start in range(0, len(axes[lead]), per_chunk):
+        chunk_axes = {lead: axes[lead][start:start + per_chunk]}
+        chunk_axes.update((name, axes[name]) for name in rest)
+        arrays = lattice_batch_arrays(*grid_columns(base, chunk_axes), modulation,
+                                      use_ber_table=use_ber_table, bounds=bounds)
+        if arrays is None:
+            physics_snr, X = build_grid_features(base, chunk_axes)
+            arrays = predict_batch_arrays(physics_snr, X, modulation=modulation, use_ber_table=use_ber_table,
+                                          bounds=bounds)
+        for field in fields:
+            parts[field].append(arrays[field])
+
+    return {field: np.concatenate(chunks) for field, chunks in parts.items()}
+
+
+def grid_candidate(base: Dict[str, Any], axes: Dict[str, Any], flat_index: int) -> Dict[str, Any]:
+    shape = tuple(len(values) for values in axes.values())
+    candidate = dict(base)
+    for name, position in zip(axes, np.unravel_index(flat_index, shape)):
+        value = axes[name][position]
+        candidate[name] = value.item() if isinstance(value, np.generic) else value
+    return candidate
+
+
+def run_grid_optimization(base_config: Dict[str, Any], modulation: str, top_k: int,
+                          grid_steps: Optional[int] = None, rank_by: str = "expected",
+                          include_bounds: bool = False) -> Dict[str, Any]:
+    """
+    Exhaustive grid search on broadcast arrays; dicts are only created for
+    the top-k rows. rank_by="worst_case" ranks on the 5% SNR bound and the
+    matching BER bound.
+    """
+    base = standardize_physical_inputs(base_config)
+    axes = optimization_grid_axes(base, grid_steps)
+
+    bounds = include_bounds or rank_by == "worst_case"
+    arrays = evaluate_grid_arrays(base, axes, modulation, bounds=bounds)
+    snr_field, ber_field = RANKING_FIELDS[rank_by]
+    objective = optimization_objective_arrays(arrays[snr_field], arrays[ber_field])
+
+    best = []
+    for i in top_k_indices(objective, top_k):
+        recommendation = optimization_recommendation(
+            grid_candidate(base, axes, i), float(objective[i]),
+            float(arrays["predicted_snr_db"][i]), float(arrays["estimated_ber"][i])
+        )
+        if bounds:
+            recommendation.update((field, float(arrays[field][i])) for field in BOUND_FIELDS)
+        best.append(recommendation)
+
+    result = optimization_response(modulation, len(objective), best, rank_by)
+    result["search_mode"] = "grid"
+    result["grid_shape"] = [len(values) for values in axes.values()]
+    return result
+
+
+def run_adaptive_optimization(base_config: Dict[str, Any], modulation: str,
+                              top_k: int, budget: int, seed: int = 0, rank_by: str = "expected",
+                              include_bounds: bool = False) -> Dict[str, Any]:
+    """
+    Successive-halving search over the same box as the grid optimizer,
+    limited to `budget` model evaluations.
+    """
+    bounds = include_bounds or rank_by == "worst_case"
+    base = standardize_physical_inputs(base_config)
+    continuous, categorical = optimization_search_space(base)
+
+    evaluated: List[Dict[str, Any]] = []
+    evaluated_metrics: List[Dict[str, float]] = []
+
+    def objective(samples):
+        n = len(samples["numerical_aperture"])
+        candidates = []
+        for i in range(n):
+            candidate = dict(base)
+            for name in continuous:
+                candidate[name] = float(samples[name][i])
+            for name in categorical:
+                value = samples[name][i]
+                candidate[name] = value if isinstance(value, str) else int(value)
+            candidates.append(candidate)
+
+        batch_metrics = predict_batch_metrics(candidates, modulation=modulation, bounds=bounds)
+        evaluated.extend(candidates)
+        evaluated_metrics.extend(batch_metrics)
+        return optimization_objective(batch_metrics, rank_by)
+
+    search = adaptive_search(objective, continuous, categorical, budget=budget, seed=seed)
+
+    result = rank_optimization(evaluated, evaluated_metrics, modulation, top_k, rank_by)
+    result["search_mode"] = "adaptive"
+    result["evaluations_used"] = search["evaluations_used"]
+    result["budget"] = budget
+    result["convergence_history"] = search["history"]
+    return result
+
+
+# Objective name -> (candidate/metric field, goal)
+PARETO_OBJECTIVES = {
+    "snr": ("predicted_snr_db", "maximize"),
+    "ber": ("estimated_ber", "minimize"),
+    "snr_worst_case": ("snr_lower_bound_db", "maximize"),
+    "ber_worst_case": ("ber_upper_bound", "minimize"),
+    "track_pitch": ("track_pitch_nm", "minimize"),
+    "layer_count": ("layer_count", "maximize"),
+    "temperature": ("temperature_c", "maximize"),
+    "humidity": ("relative_humidity", "maximize")
+}
+PARETO_MAX_GRID_STEPS = 12
+
+
+def pareto_grid_axes(grid_steps: int) -> Dict[str, Any]:
+    """
+    Full operating ranges (not a box around the base config), with layer
+    count as an extra axis so density can be traded against signal quality.
+    """
+    return {
+        "numerical_aperture": np.linspace(NA_MIN, NA_MAX, grid_steps),
+        "track_pitch_nm": np.linspace(TRACK_PITCH_MIN, TRACK_PITCH_MAX, grid_steps),
+        "layer_count": np.arange(LAYER_COUNT_MIN, LAYER_COUNT_MAX + 1),
+        "temperature_c": np.linspace(TEMP_MIN, TEMP_MAX, grid_steps),
+        "relative_humidity": np.linspace(HUMIDITY_MIN, HUMIDITY_MAX, grid_steps),
+        "recording_material": MATERIALS,
+        "prml_enabled": [0, 1],
+        "ctc_enabled": [0, 1]
+    }
+
+
+def grid_column(base: Dict[str, Any], axes: Dict[str, Any], name: str) -> np.ndarray:
+    """
+    Value of one input for every grid row (C order).
+    """
+    shape = tuple(len(values) for values in axes.values())
+    if name not in axes:
+        return np.full(int(np.prod(shape)), base[name])
+
+    view = [1] * len(shape)
+    view[list(axes).index(name)] = -1
+    return np.broadcast_to(np.asarray(axes[name]).reshape(view), shape).reshape(-1)
+
+
+def run_pareto_optimization(base_config: Dict[str, Any], modulation: str, objectives: List[str],
+                            grid_steps: int, max_points: int, use_ber_table: bool = False) -> Dict[str, Any]:
+    """
+    Non-dominated front of the full-range grid over the selected objectives,
+    one grid row per distinct objective vector. Fronts larger than
+    `max_points` are thinned by crowding distance.
+    """
+    base = standardize_physical_inputs(base_config)
+    axes = pareto_grid_axes(grid_steps)
+    bounds = any(PARETO_OBJECTIVES[name][0] in BOUND_FIELDS for name in objectives)
+    predicted = evaluate_grid_arrays(base, axes, modulation, bounds=bounds, use_ber_table=use_ber_table)
+    snr, ber = predicted["predicted_snr_db"], predicted["estimated_ber"]
+
+    # Minimization matrix: maximized objectives are negated, BER in log10
+    columns = []
+    for name in objectives:
+        field, goal = PARETO_OBJECTIVES[name]
+        column = predicted[field] if field in predicted else grid_column(base, axes, field)
+        column = np.asarray(column, dtype=np.float64)
+        if field in ("estimated_ber", "ber_upper_bound"):
+            column = np.log10(np.maximum(column, 1e-300))
+        columns.append(-column if goal == "maximize" else column)
+    F = np.column_stack(columns)
+
+    # Tree models are piecewise constant, so many rows share an objective
+    # vector; filter the distinct vectors, each represented by its first row
+    _, first_rows = np.unique(F, axis=0, return_index=True)
+    first_rows.sort()
+    front = first_rows[non_dominated_mask(F[first_rows])]
+    front_size = len(front)
+    if front_size > max_points:
+        keep = np.argsort(-crowding_distance(F[front]), kind="stable")[:max_points]
+        front = np.sort(front[keep])
+    front = front[np.argsort(F[front, 0], kind="stable")]
+
+    objective = optimization_objective_arrays(snr[front], ber[front])
+    points = []
+    for i, score in zip(front, objective):
+        candidate = grid_candidate(base, axes, i)
+        point = optimization_recommendation(candidate, float(score), float(snr[i]), float(ber[i]))
+        point["layer_count"] = candidate["layer_count"]
+        if bounds:
+            point.update((field, float(predicted[field][i])) for field in BOUND_FIELDS)
+        points.append(point)
+
+    return {
+        "optimization_goal": "pareto_front",
+        "objectives": [
+            {"name": name, "field": PARETO_OBJECTIVES[name][0], "goal": PARETO_OBJECTIVES[name][1]}
+            for name in objectives
+        ],
+        "modulation": modulation.upper(),
+        "evaluated_candidates": len(snr),
+        "grid_shape": [len(values) for values in axes.values()],
+        "front_size": front_size,
+        "pareto_front": points
+    }
+
 
+def build_sensitivity_candidates(payload: Dict[str, Any], delta_fraction: float) -> List[Dict[str, Any]]:
+    """
+    Plus/minus perturbation pairs, in SENSITIVITY_PARAMETERS order.
+    """
     candidates = []
-    for param in tunable:
+    for param in SENSITIVITY_PARAMETERS:
         current = float(payload[param])
         delta = max(abs(current) * delta_fraction, 1e-6)
 
@@ -426,10 +1451,16 @@ def sensitivity_analysis(data: SensitivityInput):
         candidates.append(plus_case)
         candidates.append(minus_case)
 
-    batch_metrics = predict_batch_metrics(candidates, modulation=modulation)
+    return candidates
+
+
+def rank_sensitivity(payload: Dict[str, Any], candidates: List[Dict[str, Any]],
+                     batch_metrics: List[Dict[str, float]], baseline: Dict[str, Any],
+                     delta_fraction: float) -> Dict[str, Any]:
+    baseline_snr = baseline["predicted_snr_db"]
 
     scores = []
-    for i, param in enumerate(tunable):
+    for i, param in enumerate(SENSITIVITY_PARAMETERS):
         plus_case = candidates[2*i]
         minus_case = candidates[2*i + 1]
         snr_plus = batch_metrics[2*i]["predicted_snr_db"]
@@ -455,43 +1486,162 @@ def sensitivity_analysis(data: SensitivityInput):
     }
 
 
-@app.post("/simulate_dashboard")
-def simulate_dashboard(data: SimulationInput):
-    base = data.base_config.model_dump()
-    steps = max(5, min(int(data.steps), 200))
-    sweep_parameter = data.sweep_parameter
+# Ranges sampled by /global_sensitivity (material terms: training-data ranges)
+GLOBAL_SENSITIVITY_RANGES = {
+    "numerical_aperture": (NA_MIN, NA_MAX),
+    "track_pitch_nm": (TRACK_PITCH_MIN, TRACK_PITCH_MAX),
+    "layer_count": (LAYER_COUNT_MIN, LAYER_COUNT_MAX),
+    "layer_spacing_nm": (15000.0, 30000.0),
+    "thermal_conductivity_w_mk": (0.1, 2.0),
+    "activation_energy_ev": (0.8, 2.5),
+    "temperature_c": (TEMP_MIN, TEMP_MAX),
+    "relative_humidity": (HUMIDITY_MIN, HUMIDITY_MAX)
+}
+# Sampled uniformly on [min, max + 1) and floored
+DISCRETE_PARAMETERS = {"layer_count"}
 
-    supported = {
-        "numerical_aperture",
-        "track_pitch_nm",
-        "temperature_c",
-        "relative_humidity",
-        "laser_wavelength_nm"
+# Synthetic rows a reloaded model version is run on before it goes live
+WARM_UP_ROWS = 256
+
+
+def warm_up_model_set(models: ModelSet) -> None:
+    """
+    Run a model version on a synthetic batch spanning the operating ranges
+    (which also pages in its memory-mapped node arrays), start its worker
+    pool and unpickle its artifacts. Raises if any prediction is not finite.
+    """
+    rng = np.random.default_rng(0)
+    columns = {
+        name: rng.uniform(low, high, WARM_UP_ROWS)
+        for name, (low, high) in GLOBAL_SENSITIVITY_RANGES.items()
     }
-    if sweep_parameter not in supported:
-        return {
-            "error": f"Unsupported sweep_parameter. Supported: {sorted(list(supported))}"
+    columns["layer_count"] = rng.integers(LAYER_COUNT_MIN, LAYER_COUNT_MAX + 1, WARM_UP_ROWS)
+    columns["laser_wavelength_nm"] = rng.choice(WAVELENGTHS, WARM_UP_ROWS)
+    columns["recording_material"] = rng.choice(MATERIALS, WARM_UP_ROWS)
+    columns["prml_enabled"] = rng.integers(0, 2, WARM_UP_ROWS)
+    columns["ctc_enabled"] = rng.integers(0, 2, WARM_UP_ROWS)
+    _, X = engineer_feature_arrays(columns, (WARM_UP_ROWS,))
+
+    for name, engine in models.engines.items():
+        if not np.all(np.isfinite(engine.predict(X))):
+            raise ValueError(f"Model version {models.version} gives non-finite '{name}' predictions")
+    if models.parallel is not None:
+        models.parallel.warm_up(wait=True)
+    if PRELOAD_ARTIFACTS:
+        models.preload()
+
+
+def evaluate_samples(base: Dict[str, Any], samples: Dict[str, np.ndarray],
+                     modulation: str = "OOK-NRZ"):
+    """
+    Predicted SNR and BER for scattered samples (one array per varied input,
+    everything else fixed at `base`), in chunks through the batch path.
+    """
+    n_rows = len(next(iter(samples.values())))
+    snr = np.empty(n_rows)
+    ber = np.empty(n_rows)
+    for start in range(0, n_rows, GRID_CHUNK_ROWS):
+        stop = min(start + GRID_CHUNK_ROWS, n_rows)
+        columns = dict(base)
+        columns.update((name, values[start:stop]) for name, values in samples.items())
+        physics_snr, X = engineer_feature_arrays(columns, (stop - start,))
+        arrays = predict_batch_arrays(physics_snr, X, modulation=modulation)
+        snr[start:stop] = arrays["predicted_snr_db"]
+        ber[start:stop] = arrays["estimated_ber"]
+    return snr, ber
+
+
+def run_global_sensitivity(base_config: Dict[str, Any], modulation: str, parameters: List[str],
+                           output: str, n_samples: int, n_bootstrap: int,
+                           confidence: float, seed: int = 0) -> Dict[str, Any]:
+    """
+    Sobol first- and total-order indices of the predicted SNR (or log10 BER)
+    over GLOBAL_SENSITIVITY_RANGES, other inputs fixed at the base config.
+    """
+    base = standardize_physical_inputs(base_config)
+    lower = [GLOBAL_SENSITIVITY_RANGES[p][0] for p in parameters]
+    upper = [
+        GLOBAL_SENSITIVITY_RANGES[p][1] + (1 if p in DISCRETE_PARAMETERS else 0)
+        for p in parameters
+    ]
+
+    design = saltelli_design(lower, upper, n_samples, seed=seed)
+    samples = {}
+    for j, param in enumerate(parameters):
+        column = design[:, j]
+        if param in DISCRETE_PARAMETERS:
+            column = np.minimum(np.floor(column), GLOBAL_SENSITIVITY_RANGES[param][1])
+        samples[param] = column
+
+    snr, ber = evaluate_samples(base, samples, modulation)
+    values = snr if output == "snr" else np.log10(np.maximum(ber, 1e-300))
+
+    indices = sobol_indices(values, len(parameters), n_bootstrap=n_bootstrap,
+                            confidence=confidence, seed=seed)
+
+    scores = []
+    for j, param in enumerate(parameters):
+        score = {
+            "parameter": param,
+            "range": list(GLOBAL_SENSITIVITY_RANGES[param]),
+            "first_order": float(indices["first_order"][j]),
+            "total_order": float(indices["total_order"][j])
         }
+        if n_bootstrap > 0:
+            score["first_order_ci"] = indices["first_order_ci"][j].tolist()
+            score["total_order_ci"] = indices["total_order_ci"][j].tolist()
+        scores.append(score)
+    scores.sort(key=lambda x: x["total_order"], reverse=True)
 
-    values = np.linspace(float(data.start), float(data.end), steps)
+    return {
+        "output": "predicted_snr_db" if output == "snr" else "log10_estimated_ber",
+        "modulation": modulation.upper(),
+        "sample_size": len(design) // (len(parameters) + 2),
+        "evaluations": len(design),
+        "output_mean": indices["output_mean"],
+        "output_variance": indices["output_variance"],
+        "bootstrap_resamples": n_bootstrap,
+        "confidence": confidence,
+        "first_order_sum": float(np.sum(indices["first_order"])),
+        "ranked_sensitivity": scores
+    }
+
+
+def unsupported_sweep_error() -> Dict[str, str]:
+    return {
+        "error": f"Unsupported sweep_parameter. Supported: {sorted(list(SWEEP_PARAMETERS))}"
+    }
+
+
+def build_simulation_candidates(base: Dict[str, Any], sweep_parameter: str,
+                                start: float, end: float, steps: int):
+    values = np.linspace(float(start), float(end), steps)
     candidates = []
     for value in values:
         frame = dict(base)
         frame[sweep_parameter] = float(value)
         candidates.append(frame)
+    return values, candidates
 
-    batch_metrics = predict_batch_metrics(candidates, modulation=data.modulation)
-
-    timeline = []
-    for idx, (value, metrics) in enumerate(zip(values, batch_metrics)):
-        timeline.append({
-            "t": idx,
-            "parameter": sweep_parameter,
-            "value": float(value),
-            "physics_snr_db": metrics["physics_snr_db"],
-            "predicted_snr_db": metrics["predicted_snr_db"],
-            "estimated_ber": metrics["estimated_ber"]
-        })
+
+def simulation_frame(idx: int, sweep_parameter: str, value: float, metrics: Dict[str, float]) -> Dict[str, Any]:
+    frame = {
+        "t": idx,
+        "parameter": sweep_parameter,
+        "value": float(value),
+        "physics_snr_db": metrics["physics_snr_db"],
+        "predicted_snr_db": metrics["predicted_snr_db"],
+        "estimated_ber": metrics["estimated_ber"]
+    }
+    frame.update((field, metrics[field]) for field in BOUND_FIELDS if field in metrics)
+    return frame
+
+
+def format_simulation_frames(sweep_parameter: str, values, batch_metrics: List[Dict[str, float]]) -> Dict[str, Any]:
+    timeline = [
+        simulation_frame(idx, sweep_parameter, value, metrics)
+        for idx, (value, metrics) in enumerate(zip(values, batch_metrics))
+    ]
 
     return {
         "simulation_mode": "real_time_dashboard_concept",
@@ -499,3 +1649,536 @@ def simulate_dashboard(data: SimulationInput):
         "frames": timeline
     }
 
+
+# Streaming sweeps: upper bound on steps, and a small first chunk so the
+# dashboard can draw before the bulk of the sweep is computed
+MAX_STREAM_STEPS = 1_000_000
+FIRST_STREAM_CHUNK = 64
+
+
+def sweep_values(start: float, end: float, steps: int, lo: int, hi: int) -> np.ndarray:
+    """
+    Entries lo:hi of np.linspace(start, end, steps), without building the
+    whole sweep.
+    """
+    step = (end - start) / (steps - 1) if steps > 1 else 0.0
+    values = np.arange(lo, hi) * step + start
+    if hi == steps and steps > 1:
+        values[-1] = end
+    return values
+
+
+def simulation_chunk(base: Dict[str, Any], sweep_parameter: str, values: np.ndarray,
+                     first_index: int, modulation: str, bounds: bool = False,
+                     use_ber_table: bool = False) -> List[Dict[str, Any]]:
+    candidates = []
+    for value in values:
+        frame = dict(base)
+        frame[sweep_parameter] = float(value)
+        candidates.append(frame)
+
+    batch_metrics = predict_batch_metrics(candidates, modulation=modulation, use_ber_table=use_ber_table,
+                                          bounds=bounds)
+    return [
+        simulation_frame(first_index + i, sweep_parameter, value, metrics)
+        for i, (value, metrics) in enumerate(zip(values, batch_metrics))
+    ]
+
+
+def encode_stream_event(event: str, payload: Dict[str, Any], stream_format: str) -> str:
+    payload = {"event": event, **payload}
+    if stream_format == "sse":
+        return f"event: {event}\ndata: {json.dumps(payload)}\n\n"
+    return json.dumps(payload) + "\n"
+
+
+async def stream_simulation_frames(request: Request, base: Dict[str, Any], sweep_parameter: str,
+                                   start: float, end: float, steps: int, chunk_size: int,
+                                   modulation: str, stream_format: str, bounds: bool = False,
+                                   use_ber_table: bool = False):
+    """
+    Frames in chunks as each sub-batch finishes. Only one chunk is held in
+    memory; model work runs in the threadpool so the event loop can notice
+    a client disconnect, which stops the sweep before the next chunk.
+    """
+    started = time.perf_counter()
+    time_to_first_frame_ms = None
+    sent = 0
+
+    yield encode_stream_event("start", {
+        "simulation_mode": "real_time_dashboard_stream",
+        "sweep_parameter": sweep_parameter,
+        "steps": steps,
+        "chunk_size": chunk_size
+    }, stream_format)
+
+    while sent < steps:
+        if await request.is_disconnected():
+            return
+
+        size = min(FIRST_STREAM_CHUNK, chunk_size) if sent == 0 else chunk_size
+        stop = min(sent + size, steps)
+        values = sweep_values(start, end, steps, sent, stop)
+        frames = await run_in_threadpool(
+            simulation_chunk, base, sweep_parameter, values, sent, modulation, bounds, use_ber_table
+        )
+
+        payload: Dict[str, Any] = {"frames": frames}
+        if time_to_first_frame_ms is None:
+            time_to_first_frame_ms = (time.perf_counter() - started) * 1e3
+            payload["time_to_first_frame_ms"] = time_to_first_frame_ms
+        yield encode_stream_event("frames", payload, stream_format)
+        sent = stop
+
+    yield encode_stream_event("end", {
+        "frames_sent": sent,
+        "time_to_first_frame_ms": time_to_first_frame_ms,
+        "elapsed_ms": (time.perf_counter() - started) * 1e3
+    }, stream_format)
+
+
+# -------------------------
+# PREDICTION API
+# -------------------------
+# /sweep_grid axes: continuous inputs take start/end/steps, categorical ones
+# default to every choice
+GRID_SWEEP_CONTINUOUS = SWEEP_PARAMETERS | {
+    "layer_spacing_nm",
+    "thermal_conductivity_w_mk",
+    "activation_energy_ev"
+}
+GRID_SWEEP_CATEGORICAL = {
+    "recording_material": MATERIALS,
+    "layer_count": list(range(LAYER_COUNT_MIN, LAYER_COUNT_MAX + 1)),
+    "prml_enabled": [0, 1],
+    "ctc_enabled": [0, 1]
+}
+MAX_SWEEP_AXES = 3
+MAX_SWEEP_POINTS = 1_000_000
+SWEEP_GRID_FIELDS = ["predicted_snr_db", "estimated_ber"]
+
+
+def build_sweep_axes(axes: List[SweepAxis]):
+    """
+    Ordered axis values for /sweep_grid, or an error dict.
+    """
+    supported = sorted(GRID_SWEEP_CONTINUOUS | set(GRID_SWEEP_CATEGORICAL))
+    if not 1 <= len(axes) <= MAX_SWEEP_AXES:
+        return {"error": f"Provide between 1 and {MAX_SWEEP_AXES} axes."}
+
+    grid_axes: Dict[str, Any] = {}
+    for axis in axes:
+        name = axis.parameter
+        if name not in supported:
+            return {"error": f"Unsupported sweep parameter '{name}'. Supported: {supported}"}
+        if name in grid_axes:
+            return {"error": f"Axis '{name}' given more than once."}
+
+        if name in GRID_SWEEP_CATEGORICAL:
+            choices = GRID_SWEEP_CATEGORICAL[name]
+            values = axis.values if axis.values is not None else choices
+            if not values or any(value not in choices for value in values):
+                return {"error": f"Axis '{name}' values must be drawn from {choices}."}
+        elif axis.values is not None:
+            if not axis.values:
+                return {"error": f"Axis '{name}' has no values."}
+            values = np.asarray(axis.values, dtype=np.float64)
+        else:
+            if axis.start is None or axis.end is None:
+                return {"error": f"Axis '{name}' needs start and end (or explicit values)."}
+            values = np.linspace(axis.start, axis.end, max(1, int(axis.steps)))
+        grid_axes[name] = values
+
+    n_points = int(np.prod([len(values) for values in grid_axes.values()]))
+    if n_points > MAX_SWEEP_POINTS:
+        return {"error": f"Grid has {n_points} points; the limit is {MAX_SWEEP_POINTS}."}
+    return grid_axes
+
+
+def pack_float32(values: np.ndarray) -> bytes:
+    return np.ascontiguousarray(values, dtype="<f4").tobytes()
+
+
+def with_explanations(response: Dict[str, Any], metrics: Dict[str, Any]) -> Dict[str, Any]:
+    if "shap_explanations" in metrics:
+        response["shap_explanations"] = metrics["shap_explanations"]
+    return response
+
+
+@app.post("/predict_snr")
+async def predict_snr(data: OSISInput, explain: bool = False):
+    metrics = await predict_full_metrics_batched(data.model_dump(), modulation="OOK-NRZ", explain=explain)
+    return with_explanations(format_snr_response(metrics), metrics)
+
+
+@app.post("/predict_ber")
+async def predict_ber(data: BERInput, explain: bool = False):
+    payload = data.model_dump()
+    modulation = payload.pop("modulation")
+
+    metrics = await predict_full_metrics_batched(payload, modulation=modulation, explain=explain)
+    return with_explanations(format_ber_response(metrics, modulation), metrics)
+
+
+@app.post("/compare_models")
+async def compare_models(data: ComparisonInput, explain: bool = False):
+    payload = data.model_dump()
+    modulation = payload.pop("modulation")
+    measured = payload.pop("measured_snr_db", None)
+
+    metrics = await predict_full_metrics_batched(payload, modulation=modulation, explain=explain)
+    if measured is not None and feedback.enabled:
+        # Feature build and buffer (memmap) writes stay off the event loop
+        await run_in_threadpool(ingest_comparison, payload, metrics, measured)
+    return with_explanations(format_comparison_response(metrics, modulation, measured), metrics)
+
+
+def ingest_comparison(payload: Dict[str, Any], metrics: Dict[str, Any], measured: float) -> None:
+    _, X = build_feature_vector(payload)
+    feedback.ingest(X, metrics["physics_snr_db"], measured, metrics["predicted_snr_db"])
+
+
+def feedback_disabled_error() -> Dict[str, str]:
+    return {"error": "Feedback ingestion is disabled. Set OSIS_FEEDBACK=1 to enable it."}
+
+
+@app.post("/feedback")
+def ingest_feedback(data: FeedbackInput):
+    """
+    Buffer measured SNRs for the next incremental update of the residual
+    model; the served prediction is stored alongside for drift tracking.
+    """
+    if not feedback.enabled:
+        return feedback_disabled_error()
+    if not data.samples:
+        return {"accepted": 0, "buffered_rows": len(feedback.buffer)}
+
+    configs = [sample.model_dump() for sample in data.samples]
+    measured = np.asarray([config.pop("measured_snr_db") for config in configs])
+    physics_snr, X = build_batch_features(configs)
+    served = physics_snr + predict_residuals(X)
+    feedback.ingest(X, physics_snr, measured, served)
+    return {"accepted": len(configs), "buffered_rows": len(feedback.buffer)}
+
+
+@app.post("/feedback/update")
+def update_feedback_model():
+    """
+    Run an incremental update now instead of waiting for the background one.
+    """
+    if not feedback.enabled:
+        return feedback_disabled_error()
+    record = feedback.run_update(force=True)
+    return {"updated": record is not None, "update": record}
+
+
+@app.get("/feedback_stats")
+def feedback_stats():
+    return feedback.stats()
+
+
+# Optional shared secret for the admin endpoints (X-OSIS-Admin-Token header)
+ADMIN_TOKEN = os.environ.get("OSIS_ADMIN_TOKEN")
+
+
+@app.post("/admin/reload_model")
+def reload_model(data: ModelReloadInput, request: Request):
+    """
+    Load a bundle version, warm it up and swap it in. Requests already in
+    flight finish on the version they started with. A named version is also
+    made CURRENT, so the watcher and restarts keep serving it.
+    """
+    if ADMIN_TOKEN and request.headers.get("x-osis-admin-token") != ADMIN_TOKEN:
+        return Response(status_code=403)
+    if not BUNDLE_ENABLED:
+        return {"error": "Model bundles are disabled (OSIS_MODEL_BUNDLE=none)."}
+
+    directory = None
+    if data.version is not None:
+        directory = os.path.join(MODEL_BUNDLE_ROOT, os.path.basename(data.version))
+        if not os.path.isdir(directory):
+            return {"error": f"Unknown model version '{data.version}'."}
+    record = model_registry.reload(directory, activate=data.version is not None)
+    return {"model_version": model_registry.current.version, "reload": record}
+
+
+@app.get("/model_info")
+def model_info():
+    return model_registry.stats()
+
+
+@app.get("/lattice_info")
+def lattice_info():
+    """
+    Response-surface lattice state: layout, size, build history and the
+    measured interpolation error against the live models.
+    """
+    return lattice_server.stats()
+
+
+@app.post("/explain")
+def explain(data: ExplainInput):
+    """
+    SHAP top contributions for a batch of configs in one explainer call.
+    """
+    configs = [config.model_dump() for config in data.configs]
+    top_n = max(1, min(int(data.top_n), N_FEATURES))
+
+    return {
+        "top_n": top_n,
+        "explanations": explain_configs(configs, top_n=top_n)
+    }
+
+
+@app.post("/optimize_parameters")
+def optimize_parameters(data: OptimizationInput):
+    mode = data.search_mode.lower().strip()
+    rank_by = data.rank_by.lower().strip()
+    if rank_by not in RANKING_FIELDS:
+        return {"error": f"Unsupported rank_by. Supported: {sorted(RANKING_FIELDS)}"}
+    if mode == "adaptive":
+        budget = max(64, min(int(data.budget), 50000))
+        return run_adaptive_optimization(
+            data.base_config.model_dump(), data.modulation, data.top_k, budget, seed=data.seed,
+            rank_by=rank_by, include_bounds=data.include_bounds
+        )
+    if mode != "grid":
+        return {"error": "Unsupported search_mode. Supported: ['adaptive', 'grid']"}
+
+    grid_steps = None
+    if data.grid_steps is not None:
+        grid_steps = max(2, min(int(data.grid_steps), MAX_GRID_STEPS))
+    return run_grid_optimization(data.base_config.model_dump(), data.modulation, data.top_k, grid_steps,
+                                 rank_by=rank_by, include_bounds=data.include_bounds)
+
+
+@app.post("/pareto_optimize")
+def pareto_optimize(data: ParetoInput):
+    objectives = list(dict.fromkeys(name.lower().strip() for name in data.objectives))
+    unknown = [name for name in objectives if name not in PARETO_OBJECTIVES]
+    if not objectives or unknown:
+        return {"error": f"Unsupported objectives. Supported: {sorted(PARETO_OBJECTIVES)}"}
+
+    grid_steps = max(2, min(int(data.grid_steps), PARETO_MAX_GRID_STEPS))
+    max_points = max(1, min(int(data.max_points), 500))
+    return run_pareto_optimization(
+        data.base_config.model_dump(), data.modulation, objectives, grid_steps, max_points,
+        use_ber_table=data.ber_table
+    )
+
+
+@app.post("/sensitivity_analysis")
+def sensitivity_analysis(data: SensitivityInput):
+    payload = data.model_dump()
+    delta_fraction = min(max(payload.pop("delta_fraction", 0.05), 0.01), 0.2)
+    modulation = payload.pop("modulation", "OOK-NRZ")
+
+    baseline = predict_full_metrics(payload, modulation=modulation)
+
+    candidates = build_sensitivity_candidates(payload, delta_fraction)
+    batch_metrics = predict_batch_metrics(candidates, modulation=modulation)
+
+    return rank_sensitivity(payload, candidates, batch_metrics, baseline, delta_fraction)
+
+
+@app.post("/global_sensitivity")
+def global_sensitivity(data: GlobalSensitivityInput):
+    parameters = list(dict.fromkeys(data.parameters or GLOBAL_SENSITIVITY_RANGES))
+    unknown = [p for p in parameters if p not in GLOBAL_SENSITIVITY_RANGES]
+    if unknown:
+        return {"error": f"Unsupported parameters. Supported: {list(GLOBAL_SENSITIVITY_RANGES)}"}
+
+    output = data.output.lower().strip()
+    if output not in {"snr", "ber"}:
+        return {"error": "Unsupported output. Supported: ['ber', 'snr']"}
+
+    return run_global_sensitivity(
+        data.base_config.model_dump(),
+        data.modulation,
+        parameters,
+        output,
+        n_samples=max(64, min(int(data.samples), 32768)),
+        n_bootstrap=max(0, min(int(data.bootstrap), 1000)),
+        confidence=min(max(data.confidence, 0.5), 0.99),
+        seed=data.seed
+    )
+
+
+@app.post("/simulate_dashboard")
+def simulate_dashboard(data: SimulationInput):
+    base = data.base_config.model_dump()
+    steps = max(5, min(int(data.steps), 200))
+    sweep_parameter = data.sweep_parameter
+
+    if sweep_parameter not in SWEEP_PARAMETERS:
+        return unsupported_sweep_error()
+
+    values, candidates = build_simulation_candidates(base, sweep_parameter, data.start, data.end, steps)
+    batch_metrics = predict_batch_metrics(candidates, modulation=data.modulation, bounds=data.include_bounds)
+
+    return format_simulation_frames(sweep_parameter, values, batch_metrics)
+
+
+@app.post("/simulate_dashboard/stream")
+async def simulate_dashboard_stream(data: SimulationStreamInput, request: Request):
+    if data.sweep_parameter not in SWEEP_PARAMETERS:
+        return unsupported_sweep_error()
+
+    stream_format = data.format.lower().strip()
+    if stream_format not in {"ndjson", "sse"}:
+        return {"error": "Unsupported format. Supported: ['ndjson', 'sse']"}
+
+    steps = max(2, min(int(data.steps), MAX_STREAM_STEPS))
+    chunk_size = max(1, min(int(data.chunk_size), 16384))
+    media_type = "text/event-stream" if stream_format == "sse" else "application/x-ndjson"
+
+    return StreamingResponse(
+        stream_simulation_frames(
+            request, data.base_config.model_dump(), data.sweep_parameter,
+            data.start, data.end, steps, chunk_size, data.modulation, stream_format, data.include_bounds,
+            data.ber_table
+        ),
+        media_type=media_type,
+        headers={"Cache-Control": "no-cache"}
+    )
+
+
+@app.post("/sweep_grid")
+def sweep_grid(data: SweepGridInput):
+    """
+    Full lattice of up to three axes in C order (last axis fastest), as
+    packed little-endian float32 arrays rather than per-point JSON.
+    """
+    encoding = data.encoding.lower().strip()
+    if encoding not in {"base64", "binary"}:
+        return {"error": "Unsupported encoding. Supported: ['base64', 'binary']"}
+
+    axes = build_sweep_axes(data.axes)
+    if "error" in axes:
+        return axes
+
+    base = standardize_physical_inputs(data.base_config.model_dump())
+    arrays = evaluate_grid_arrays(base, axes, data.modulation, bounds=data.include_bounds,
+                                  use_ber_table=data.ber_table)
+    fields = SWEEP_GRID_FIELDS + (BOUND_FIELDS if data.include_bounds else [])
+    shape = [len(values) for values in axes.values()]
+
+    if encoding == "binary":
+        # Body: every field back to back, each prod(shape) float32 values
+        return Response(
+            content=b"".join(pack_float32(arrays[field]) for field in fields),
+            media_type="application/octet-stream",
+            headers={
+                "X-Grid-Shape": ",".join(str(n) for n in shape),
+                "X-Grid-Axes": ",".join(axes),
+                "X-Grid-Fields": ",".join(fields),
+                "X-Grid-Dtype": "float32-le"
+            }
+        )
+
+    response = {
+        "modulation": data.modulation.upper(),
+        "shape": shape,
+        "axes": [
+            {"parameter": name, "values": np.asarray(values).tolist()}
+            for name, values in axes.items()
+        ],
+        "dtype": "float32",
+        "byte_order": "little"
+    }
+    for field in fields:
+        response[field] = base64.b64encode(pack_float32(arrays[field])).decode("ascii")
+    return response
+
+
+@app.get("/cache_stats")
+def cache_stats():
+    return prediction_cache.stats()
+
+
+@app.get("/batch_stats")
+def batch_stats():
+    return prediction_batcher.stats()
+
+
+@app.get("/metrics")
+def metrics():
+    """
+    Prometheus text exposition: stage/request histograms plus cache and
+    micro-batcher state.
+    """
+    cache = prediction_cache.stats()
+    batcher = prediction_batcher.stats()
+    lines = [instrumentation.render().rstrip("\n")]
+    lines += render_values("osis_cache_events_total", "Prediction cache events.", {
+        (("event", event),): cache[event] for event in ["hits", "misses", "evictions", "expirations"]
+    }, kind="counter")
+    lines += render_values("osis_cache_entries", "Entries in the prediction cache.", {(): cache["size"]})
+    lines += render_values("osis_batcher_queue_depth", "Requests waiting in the micro-batcher.",
+                           {(): batcher["queue_depth"]})
+    lines += render_values("osis_batcher_peak_queue_depth", "Largest micro-batcher queue seen.",
+                           {(): batcher["peak_queue_depth"]})
+    lines += render_values("osis_batcher_batches_total", "Micro-batches processed.",
+                           {(): batcher["batches"]}, kind="counter")
+    lines += render_values("osis_model_info", "Model version serving new requests.",
+                           {(("version", model_registry.current.version),): 1})
+    return Response("\n".join(lines) + "\n", media_type="text/plain; version=0.0.4; charset=utf-8")
+
+
+@app.post("/evaluate")
+def evaluate(data: EvaluationInput):
+    """
+    Every dashboard panel for one config in a single pass: the full single-row
+    prediction (ensemble, quantiles, SHAP) runs once, the optimizer grid is
+    evaluated on broadcast arrays, and the sensitivity and sweep candidates
+    share one batch model call.
+    """
+    base = data.base_config.model_dump()
+    modulation = data.modulation
+    delta_fraction = min(max(data.delta_fraction, 0.01), 0.2)
+
+    metrics = predict_full_metrics(base, modulation=modulation, explain=data.explain)
+
+    sensitivity_candidates = build_sensitivity_candidates(base, delta_fraction)
+    simulation_candidates: List[Dict[str, Any]] = []
+
+    simulation = data.simulation
+    simulation_error = None
+    if simulation is not None:
+        if simulation.sweep_parameter in SWEEP_PARAMETERS:
+            steps = max(5, min(int(simulation.steps), 200))
+            values, simulation_candidates = build_simulation_candidates(
+                base, simulation.sweep_parameter, simulation.start, simulation.end, steps
+            )
+        else:
+            simulation_error = unsupported_sweep_error()
+
+    batch_metrics = predict_batch_metrics(
+        sensitivity_candidates + simulation_candidates,
+        modulation=modulation
+    )
+    n_sens = len(sensitivity_candidates)
+
+    snr_panel = format_snr_response(metrics)
+    snr_panel["snr_lower_bound_db"] = metrics["snr_lower_bound_db"]
+    snr_panel["snr_upper_bound_db"] = metrics["snr_upper_bound_db"]
+    with_explanations(snr_panel, metrics)
+
+    response = {
+        "snr": snr_panel,
+        "ber": format_ber_response(metrics, modulation),
+        "comparison": format_comparison_response(metrics, modulation, data.measured_snr_db),
+        "optimization": run_grid_optimization(base, modulation, data.top_k),
+        "sensitivity": rank_sensitivity(
+            base, sensitivity_candidates, batch_metrics[:n_sens], metrics, delta_fraction
+        )
+    }
+
+    if simulation_error is not None:
+        response["simulation"] = simulation_error
+    elif simulation is not None:
+        response["simulation"] = format_simulation_frames(
+            simulation.sweep_parameter, values, batch_metrics[n_sens:]
+        )
+
+    return response
@@ -0,0 +1,175 @@
+"""
+Asyncio micro-batching for concurrent single-item requests.
+
+The first request to arrive opens a collection window of `max_wait_s`
+seconds. Every request submitted before the window closes, or until
+`max_batch_size` requests are waiting, joins the same batch. The batch is
+processed by one call of `process_batch` in a worker thread, and each
+request's future is resolved with its own result. A lone request therefore
+waits at most one window before it is processed.
+"""
+import asyncio
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+
+# Batch-size histogram buckets (upper bounds, inclusive)
+BATCH_SIZE_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128, 256)
+
+
+class MicroBatcher:
+    """
+    Groups `submit` calls made on one event loop into batches.
+
+    `process_batch(items)` must return one result per item, in order. If it
+    raises, every request in that batch receives the exception.
+    max_wait_s <= 0 or max_batch_size <= 1 disables batching; `submit` then
+    processes each item on its own (still in a worker thread).
+    """
+
+    def __init__(self, process_batch: Callable[[List[Any]], List[Any]],
+                 max_batch_size: int = 64, max_wait_s: float = 0.002):
+        self.process_batch = process_batch
+        self.max_batch_size = max(1, int(max_batch_size))
+        self.max_wait_s = max(0.0, float(max_wait_s))
+
+        # Pending requests belong to one event loop; they are only touched
+        # from that loop's thread, so they need no lock
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._pending: List[Tuple[Any, asyncio.Future, float]] = []
+        self._timer: Optional[asyncio.TimerHandle] = None
+        # Running batches; the loop only keeps weak references to tasks
+        self._tasks: Set[asyncio.Task] = set()
+
+        self._stats_lock = threading.Lock()
+        self.submitted = 0
+        self.batches = 0
+        self.batched_items = 0
+        self.failed_batches = 0
+        self.in_flight = 0
+        self.peak_queue_depth = 0
+        self.max_batch_seen = 0
+        self.total_wait_s = 0.0
+        self.max_wait_seen_s = 0.0
+        self.batch_size_counts = [0] * (len(BATCH_SIZE_BUCKETS) + 1)
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_wait_s > 0 and self.max_batch_size > 1
+
+    @property
+    def queue_depth(self) -> int:
+        return len(self._pending)
+
+    async def submit(self, item: Any) -> Any:
+        loop = asyncio.get_running_loop()
+        if not self.enabled:
+            with self._stats_lock:
+                self.submitted += 1
+            self._record_batch(1, [0.0])
+            return (await loop.run_in_executor(None, self._run, [item]))[0]
+
+        if loop is not self._loop:
+            # A new event loop (e.g. a restarted server): its predecessor's
+            # pending requests can never be resolved there
+            self._loop = loop
+            self._pending = []
+            self._timer = None
+            self._tasks = set()
+
+        future = loop.create_future()
+        self._pending.append((item, future, time.perf_counter()))
+        with self._stats_lock:
+            self.submitted += 1
+            self.peak_queue_depth = max(self.peak_queue_depth, len(self._pending))
+
+        if len(self._pending) >= self.max_batch_size:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.max_wait_s, self._flush)
+
+        return await future
+
+    def _flush(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending = self._pending, []
+        if not batch:
+            return
+
+        now = time.perf_counter()
+        self._record_batch(len(batch), [now - queued for _, _, queued in batch])
+        task = self._loop.create_task(self._process(batch))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def close(self) -> None:
+        """
+        Processes the requests still waiting for their window and waits for
+        every running batch. Must be called on the batcher's event loop.
+        """
+        if self._loop is not asyncio.get_running_loop():
+            return
+        self._flush()
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+
+    async def _process(self, batch: List[Tuple[Any, asyncio.Future, float]]) -> None:
+        loop = asyncio.get_running_loop()
+        try:
+            results = await loop.run_in_executor(None, self._run, [item for item, _, _ in batch])
+        except Exception as exc:
+            with self._stats_lock:
+                self.failed_batches += 1
+            for _, future, _ in batch:
+                if not future.done():
+                    future.set_exception(exc)
+            return
+
+        for (_, future, _), result in zip(batch, results):
+            # Requests whose client went away are cancelled; skip them
+            if not future.done():
+                future.set_result(result)
+
+    def _run(self, items: List[Any]) -> List[Any]:
+        with self._stats_lock:
+            self.in_flight += 1
+        try:
+            results = self.process_batch(items)
+            if len(results) != len(items):
+                raise RuntimeError(f"process_batch returned {len(results)} results for {len(items)} items")
+            return results
+        finally:
+            with self._stats_lock:
+                self.in_flight -= 1
+
+    def _record_batch(self, size: int, waits: List[float]) -> None:
+        bucket = next((i for i, bound in enumerate(BATCH_SIZE_BUCKETS) if size <= bound), len(BATCH_SIZE_BUCKETS))
+        with self._stats_lock:
+            self.batches += 1
+            self.batched_items += size
+            self.max_batch_seen = max(self.max_batch_seen, size)
+            self.batch_size_counts[bucket] += 1
+            self.total_wait_s += sum(waits)
+            self.max_wait_seen_s = max(self.max_wait_seen_s, max(waits))
+
+    def stats(self) -> Dict[str, Any]:
+        with self._stats_lock:
+            labels = [f"<={bound}" for bound in BATCH_SIZE_BUCKETS] + [f">{BATCH_SIZE_BUCKETS[-1]}"]
+            return {
+                "enabled": self.enabled,
+                "max_batch_size": self.max_batch_size,
+                "max_wait_ms": self.max_wait_s * 1e3,
+                "queue_depth": len(self._pending),
+                "peak_queue_depth": self.peak_queue_depth,
+                "in_flight_batches": self.in_flight,
+                "submitted": self.submitted,
+                "batches": self.batches,
+                "failed_batches": self.failed_batches,
+                "mean_batch_size": self.batched_items / self.batches if self.batches else 0.0,
+                "max_batch_size_seen": self.max_batch_seen,
+                "batch_size_histogram": dict(zip(labels, self.batch_size_counts)),
+                "mean_queue_wait_ms": self.total_wait_s / self.batched_items * 1e3 if self.batched_items else 0.0,
+                "max_queue_wait_ms": self.max_wait_seen_s * 1e3
+            }
@@ -0,0 +1,252 @@
+"""
+Versioned, memory-mappable model bundle.
+
+`export_bundle` compiles the fitted tree models (see tree_engine) and writes
+their node arrays as plain .npy files plus a manifest.json into
+<root>/<version>/, then points <root>/CURRENT at that version. `load_bundle`
+maps the arrays read-only with np.load(mmap_mode="r"): loading takes
+milliseconds, needs neither sklearn nor unpickling, and every worker process
+reading the same bundle shares its page-cache pages.
+
+A version can also carry `attachments`: copies of the pickled artifacts it
+was compiled from (sklearn models, SHAP explainer), so the server can hot-
+reload it without the top-level .pkl files (see model_registry.py).
+
+    python model_bundle.py    # export the current .pkl artifacts
+"""
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from tree_engine import CompiledStacking, FlatForest, compile_model
+
+FORMAT_VERSION = 1
+MANIFEST_FILE = "manifest.json"
+CURRENT_FILE = "CURRENT"
+FOREST_ARRAYS = ("feature", "threshold", "left", "right", "value", "roots", "children")
+
+DEFAULT_BUNDLE_ROOT = "model_bundle"
+
+
+def file_sha1(path: str) -> str:
+    digest = hashlib.sha1()
+    with open(path, "rb") as handle:
+        for block in iter(lambda: handle.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+# -------------------------
+# EXPORT
+# -------------------------
+def _write_forest(forest: FlatForest, prefix: str, directory: str, digest) -> Dict[str, Any]:
+    arrays = {}
+    for field in FOREST_ARRAYS:
+        values = np.ascontiguousarray(getattr(forest, field))
+        filename = f"{prefix}.{field}.npy"
+        np.save(os.path.join(directory, filename), values, allow_pickle=False)
+        digest.update(filename.encode())
+        digest.update(values.tobytes())
+        arrays[field] = filename
+
+    spec = {
+        "kind": "forest",
+        "arrays": arrays,
+        "depth": forest.depth,
+        "scale": forest.scale,
+        "offset": forest.offset,
+        "n_features": None if forest.n_features is None else int(forest.n_features),
+        "cast_float32": forest.cast_float32
+    }
+    digest.update(json.dumps(spec, sort_keys=True).encode())
+    return spec
+
+
+def _write_model(model, prefix: str, directory: str, digest) -> Dict[str, Any]:
+    if isinstance(model, CompiledStacking):
+        return {
+            "kind": "stacking",
+            "base_models": [
+                _write_model(base, f"{prefix}.base{i}", directory, digest)
+                for i, base in enumerate(model.base_models)
+            ],
+            "final_model": _write_model(model.final_model, f"{prefix}.final", directory, digest)
+        }
+    return _write_forest(model, prefix, directory, digest)
+
+
+def set_current_version(root: str, version: str) -> None:
+    """
+    Atomically point <root>/CURRENT at `version`.
+    """
+    if not os.path.isfile(os.path.join(root, version, MANIFEST_FILE)):
+        raise FileNotFoundError(f"No bundle version {version!r} in {root}")
+    _write_current(root, version)
+
+
+def _write_current(root: str, version: str) -> None:
+    fd, tmp_path = tempfile.mkstemp(dir=root, prefix=".current-")
+    with os.fdopen(fd, "w") as handle:
+        handle.write(version + "\n")
+    os.chmod(tmp_path, 0o644)
+    os.replace(tmp_path, os.path.join(root, CURRENT_FILE))
+
+
+def export_bundle(root: str, estimators: Dict[str, Any], feature_columns: List[str],
+                  sources: Optional[List[str]] = None,
+                  attachments: Optional[Dict[str, str]] = None) -> str:
+    """
+    Compile `estimators` (name -> fitted sklearn model) into a new bundle
+    version under `root` and make it current. `sources` are the artifact
+    files the estimators came from; their SHA-1s are recorded so a server
+    can tell when the bundle no longer matches them. `attachments` (name ->
+    file) are copied into the version as-is. Returns the version.
+    """
+    os.makedirs(root, exist_ok=True)
+    staging = tempfile.mkdtemp(dir=root, prefix=".staging-")
+    try:
+        os.chmod(staging, 0o755)
+        digest = hashlib.sha1()
+        digest.update(json.dumps(list(feature_columns)).encode())
+        models = {
+            name: _write_model(compile_model(estimator), name, staging, digest)
+            for name, estimator in estimators.items()
+        }
+        attached = {}
+        for name, path in sorted((attachments or {}).items()):
+            filename = os.path.basename(path)
+            shutil.copyfile(path, os.path.join(staging, filename))
+            digest.update(f"{name}:{filename}:{file_sha1(path)}".encode())
+            attached[name] = filename
+        version = digest.hexdigest()[:12]
+
+        manifest = {
+            "format_version": FORMAT_VERSION,
+            "version": version,
+            "feature_columns": list(feature_columns),
+            "models": models,
+            "sources": {os.path.basename(path): file_sha1(path) for path in sources or []}
+        }
+        if attached:
+            manifest["attachments"] = attached
+        with open(os.path.join(staging, MANIFEST_FILE), "w") as handle:
+            json.dump(manifest, handle, indent=1)
+
+        target = os.path.join(root, version)
+        if os.path.isdir(target):
+            # Identical content already exported
+            shutil.rmtree(staging)
+        else:
+            os.rename(staging, target)
+    except BaseException:
+        shutil.rmtree(staging, ignore_errors=True)
+        raise
+
+    _write_current(root, version)
+    return version
+
+
+# -------------------------
+# LOADING
+# -------------------------
+def _load_model(spec: Dict[str, Any], directory: str, mmap: bool):
+    if spec["kind"] == "stacking":
+        return CompiledStacking(
+            [_load_model(base, directory, mmap) for base in spec["base_models"]],
+            _load_model(spec["final_model"], directory, mmap)
+        )
+
+    arrays = {
+        field: np.load(os.path.join(directory, filename),
+                       mmap_mode="r" if mmap else None, allow_pickle=False)
+        for field, filename in spec["arrays"].items()
+    }
+    return FlatForest(
+        arrays["feature"], arrays["threshold"], arrays["left"], arrays["right"],
+        arrays["value"], arrays["roots"], spec["depth"],
+        scale=spec["scale"],
+        offset=spec["offset"],
+        n_features=spec["n_features"],
+        cast_float32=spec["cast_float32"],
+        # Bundles exported before `children` was stored rebuild it in memory
+        children=arrays.get("children")
+    )
+
+
+def current_bundle_dir(root: str) -> Optional[str]:
+    """
+    Directory of the version named in <root>/CURRENT, or None.
+    """
+    try:
+        with open(os.path.join(root, CURRENT_FILE)) as handle:
+            version = handle.read().strip()
+    except OSError:
+        return None
+    directory = os.path.join(root, version)
+    return directory if version and os.path.isfile(os.path.join(directory, MANIFEST_FILE)) else None
+
+
+def load_bundle(directory: str, mmap: bool = True) -> Dict[str, Any]:
+    """
+    Load one bundle version: manifest fields plus compiled `models`.
+    """
+    with open(os.path.join(directory, MANIFEST_FILE)) as handle:
+        manifest = json.load(handle)
+    if manifest.get("format_version") != FORMAT_VERSION:
+        raise ValueError(f"Unsupported bundle format: {manifest.get('format_version')!r}")
+
+    bundle = dict(manifest)
+    bundle["directory"] = directory
+    bundle["models"] = {
+        name: _load_model(spec, directory, mmap) for name, spec in manifest["models"].items()
+    }
+    return bundle
+
+
+def attachment_paths(bundle: Dict[str, Any]) -> Dict[str, str]:
+    """
+    Name -> path of every artifact attached to a loaded bundle.
+    """
+    return {
+        name: os.path.join(bundle["directory"], filename)
+        for name, filename in bundle.get("attachments", {}).items()
+    }
+
+
+def bundle_matches_sources(bundle: Dict[str, Any], base_dir: str = ".") -> bool:
+    """
+    True when every recorded source artifact still has the recorded SHA-1.
+    """
+    for filename, sha1 in bundle.get("sources", {}).items():
+        path = os.path.join(base_dir, filename)
+        if not os.path.isfile(path) or file_sha1(path) != sha1:
+            return False
+    return True
+
+
+if __name__ == "__main__":
+    import joblib
+
+    sources = {
+        "residual": "osis_snr_model.pkl",
+        "lower": "osis_snr_model_lower.pkl",
+        "upper": "osis_snr_model_upper.pkl"
+    }
+    version = export_bundle(
+        DEFAULT_BUNDLE_ROOT,
+        {name: joblib.load(path) for name, path in sources.items()},
+        joblib.load("osis_features.pkl"),
+        sources=list(sources.values()) + ["osis_features.pkl"],
+        attachments={
+            "model": sources["residual"],
+            "model_lower": sources["lower"],
+            "model_upper": sources["upper"],
+            "explainer": "osis_explainer.pkl"
+        }
+    )
+    print(f"Exported model bundle {version} to {DEFAULT_BUNDLE_ROOT}/")
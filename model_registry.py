@@ -0,0 +1,283 @@
+"""
+Hot-swappable model versions for the server.
+
+A `ModelSet` is one immutable model version: the compiled tree engines of a
+bundle (see model_bundle.py), the sklearn/SHAP artifacts that belong to it
+(unpickled on first use) and its own worker pool. `ModelRegistry` holds the
+current set. `reload` loads a bundle version in the calling thread, warms it
+up, then replaces the reference in one assignment, so requests that already
+started keep the set they began with.
+
+ModelVersionMiddleware pins `registry.current` for each HTTP request in a
+context variable, where `active()` finds it, and reports the pinned version
+in an `X-OSIS-Model-Version` response header. Work handed to other threads
+with run_in_threadpool inherits the pin; anything else (micro-batches,
+background threads) must carry its ModelSet explicitly.
+"""
+import contextvars
+import os
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, Dict, Optional
+
+from model_bundle import current_bundle_dir, set_current_version
+from tree_engine import FusedEnsemble
+
+MODEL_VERSION_HEADER = b"x-osis-model-version"
+
+# ModelSet serving the current request, if any
+_pinned: contextvars.ContextVar[Optional["ModelSet"]] = \
+    contextvars.ContextVar("osis_model_set", default=None)
+
+
+class ModelSet:
+    """
+    One model version. `engines` maps names to compiled tree models,
+    `artifact_paths` maps names to the .pkl files loaded by `artifact`.
+    `parallel` is the version's ParallelPredictor (or None).
+    """
+
+    def __init__(self, version: str, engines: Dict[str, Any], feature_columns,
+                 artifact_paths: Dict[str, str], directory: Optional[str] = None, parallel=None):
+        self.version = version
+        self.engines = dict(engines)
+        self.feature_columns = list(feature_columns)
+        self.artifact_paths = dict(artifact_paths)
+        self.directory = directory
+        self.parallel = parallel
+        self.loaded_at = time.time()
+
+        self._artifacts: Dict[str, Any] = {}
+        self._fused: Any = False  # built on first use; None if not fusable
+        self._lock = threading.Lock()
+
+    @property
+    def residual(self):
+        return self.engines["residual"]
+
+    @property
+    def lower(self):
+        return self.engines["lower"]
+
+    @property
+    def upper(self):
+        return self.engines["upper"]
+
+    @property
+    def fused(self) -> Optional[FusedEnsemble]:
+        """
+        The residual and quantile engines as one FusedEnsemble, so a batch
+        goes through all three in a single traversal (None if they are not
+        compiled tree models).
+        """
+        if self._fused is False:
+            with self._lock:
+                if self._fused is False:
+                    try:
+                        self._fused = FusedEnsemble({name: self.engines[name]
+                                                     for name in ("residual", "lower", "upper")})
+                    except (TypeError, ValueError):
+                        self._fused = None
+        return self._fused
+
+    def has_artifact(self, name: str) -> bool:
+        return name in self.artifact_paths
+
+    def artifact(self, name: str):
+        with self._lock:
+            if name not in self._artifacts:
+                if name not in self.artifact_paths:
+                    raise LookupError(f"Model version {self.version} has no '{name}' artifact")
+                import joblib
+                self._artifacts[name] = joblib.load(self.artifact_paths[name])
+            return self._artifacts[name]
+
+    def preload(self) -> None:
+        for name in self.artifact_paths:
+            self.artifact(name)
+
+    def shutdown(self) -> None:
+        if self.parallel is not None:
+            self.parallel.shutdown()
+
+    def describe(self) -> Dict[str, Any]:
+        return {
+            "version": self.version,
+            "directory": self.directory,
+            "loaded_at": self.loaded_at,
+            "artifacts": sorted(self.artifact_paths),
+            "parallel_workers": self.parallel.n_workers if self.parallel is not None else 0
+        }
+
+
+class ModelRegistry:
+    """
+    Current ModelSet plus the machinery to replace it.
+
+    `build(directory)` loads the bundle version in `directory` into a new
+    ModelSet (raising if it cannot be served). `warm_up(model_set)` runs it
+    on a synthetic batch before it goes live. `on_swap(old, new)` runs right
+    after the swap (e.g. to invalidate caches). With `watch_interval_s` > 0,
+    `start()` polls <root>/CURRENT and reloads when it names another version.
+    """
+
+    def __init__(self, initial: ModelSet, build: Callable[[str], ModelSet],
+                 warm_up: Callable[[ModelSet], None],
+                 on_swap: Optional[Callable[[ModelSet, ModelSet], None]] = None,
+                 root: Optional[str] = None, watch_interval_s: float = 0.0,
+                 retire_after_s: float = 30.0):
+        self.current = initial
+        self.build = build
+        self.warm_up = warm_up
+        self.on_swap = on_swap
+        self.root = root
+        self.watch_interval_s = float(watch_interval_s)
+        self.retire_after_s = float(retire_after_s)
+
+        self.history: deque = deque(maxlen=20)
+        self._reload_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._failed_directory: Optional[str] = None
+
+    def active(self) -> ModelSet:
+        """
+        The ModelSet pinned for this request, else the current one.
+        """
+        return _pinned.get() or self.current
+
+    def reload(self, directory: Optional[str] = None, activate: bool = False) -> Dict[str, Any]:
+        """
+        Load, warm up and swap in the bundle version in `directory` (default:
+        the one <root>/CURRENT names); `activate` also points CURRENT at it.
+        Returns the reload record; on failure it has an "error" and the
+        current set keeps serving.
+        """
+        with self._reload_lock:
+            if directory is None:
+                directory = current_bundle_dir(self.root) if self.root else None
+            record, old = self._swap(directory)
+            if activate and "error" not in record:
+                set_current_version(self.root, os.path.basename(os.path.normpath(directory)))
+        self._retire(old)
+        return record
+
+    def check_for_update(self) -> Optional[Dict[str, Any]]:
+        """
+        Reload if <root>/CURRENT names a version other than the current one
+        (and not one that already failed to load).
+        """
+        with self._reload_lock:
+            directory = current_bundle_dir(self.root) if self.root else None
+            if directory is None or directory == self._failed_directory:
+                return None
+            current = self.current.directory
+            if current is not None and os.path.realpath(directory) == os.path.realpath(current):
+                return None
+            record, old = self._swap(directory)
+        self._retire(old)
+        return record
+
+    def _swap(self, directory: Optional[str]):
+        old = self.current
+        record: Dict[str, Any] = {"from_version": old.version, "directory": directory,
+                                  "timestamp": time.time()}
+        if directory is None:
+            record["error"] = "No model bundle to load"
+            self.history.append(record)
+            return record, None
+
+        start = time.perf_counter()
+        new = None
+        try:
+            new = self.build(directory)
+            record["version"] = new.version
+            loaded = time.perf_counter()
+            self.warm_up(new)
+        except Exception as exc:
+            if new is not None:
+                new.shutdown()
+            record["error"] = repr(exc)
+            self._failed_directory = directory
+            self.history.append(record)
+            return record, None
+        warmed = time.perf_counter()
+
+        self.current = new
+        if self.on_swap is not None:
+            self.on_swap(old, new)
+        self._failed_directory = None
+        record.update(load_seconds=loaded - start, warm_up_seconds=warmed - loaded)
+        self.history.append(record)
+        return record, old
+
+    def _retire(self, old: Optional[ModelSet]) -> None:
+        # Requests pinned to the old set may still be running: give them
+        # time to finish before its worker pool goes away
+        if old is None or old is self.current or old.parallel is None:
+            return
+        timer = threading.Timer(self.retire_after_s, old.shutdown)
+        timer.daemon = True
+        timer.start()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "current": self.current.describe(),
+            "bundle_root": self.root,
+            "watch_interval_s": self.watch_interval_s if self._thread is not None else 0.0,
+            "reloads": list(self.history)
+        }
+
+    # Background watcher
+    def start(self) -> None:
+        if self.watch_interval_s <= 0 or not self.root or self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="osis-model-watch", daemon=True)
+        self._thread.start()
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.watch_interval_s):
+            try:
+                self.check_for_update()
+            except Exception as exc:  # keep serving; the next tick retries
+                self.history.append({"error": repr(exc), "timestamp": time.time()})
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+
+class ModelVersionMiddleware:
+    """
+    Pure ASGI middleware: pins the registry's current ModelSet for the
+    request and reports its version in a response header.
+    """
+
+    def __init__(self, app, registry: ModelRegistry):
+        self.app = app
+        self.registry = registry
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        model_set = self.registry.current
+        token = _pinned.set(model_set)
+        version = model_set.version.encode("latin-1")
+
+        async def send_with_version(message):
+            if message["type"] == "http.response.start":
+                headers = list(message.get("headers", []))
+                headers.append((MODEL_VERSION_HEADER, version))
+                message = dict(message, headers=headers)
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_version)
+        finally:
+            _pinned.reset(token)
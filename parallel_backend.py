@@ -0,0 +1,192 @@
+"""
+Process-pool execution for large prediction batches.
+
+Every worker process loads the model artifact (and the quantile models,
+if given) once, in the pool initializer. A batch is copied once into a
+shared-memory block; workers attach to it by name, predict their row shard
+and write the result into a shared output block, so neither the feature
+matrix nor the predictions are pickled between processes.
+"""
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+from multiprocessing.shared_memory import SharedMemory
+from typing import List, Optional, Sequence
+
+import numpy as np
+
+# Smallest row shard worth a round trip to a worker
+MIN_SHARD_ROWS = 8192
+
+# Per-process state, set by _init_worker: the residual model, then the
+# lower and upper quantile models if any
+_worker_models: List = []
+_worker_columns: Optional[List[str]] = None
+
+
+def _init_worker(model_paths: List[str], feature_columns: List[str]) -> None:
+    global _worker_models, _worker_columns
+    import joblib
+
+    _worker_models = [joblib.load(path) for path in model_paths]
+    _worker_columns = list(feature_columns)
+
+
+def _worker_ready() -> int:
+    return os.getpid()
+
+
+def _attach(name: str) -> SharedMemory:
+    """
+    Attach to a block owned (and unlinked) by the parent process.
+    """
+    try:
+        return SharedMemory(name=name, track=False)
+    except TypeError:
+        # Before Python 3.13 attaching always registers the block; spawned
+        # workers share the parent's resource tracker, so this duplicates the
+        # parent's entry and the parent's unlink clears it
+        return SharedMemory(name=name)
+
+
+def _predict_shard(input_name: str, output_name: str, shape, start: int, stop: int,
+                   n_models: int = 1) -> None:
+    import pandas as pd
+
+    shm_in = _attach(input_name)
+    shm_out = _attach(output_name)
+    try:
+        X = np.ndarray(shape, dtype=np.float64, buffer=shm_in.buf)
+        out = np.ndarray((n_models, shape[0]), dtype=np.float64, buffer=shm_out.buf)
+        frame = pd.DataFrame(X[start:stop], columns=_worker_columns, copy=False)
+        for k in range(n_models):
+            out[k, start:stop] = _worker_models[k].predict(frame)
+        del X, out, frame
+    finally:
+        shm_in.close()
+        shm_out.close()
+
+
+class ParallelPredictor:
+    """
+    Shards batches of at least `min_rows` rows across `n_workers` processes.
+    With fewer than two workers it is disabled and callers stay in-process.
+    The pool is started lazily (or by `warm_up`) and uses the spawn start
+    method, so it is safe to create from a threaded server. With
+    `quantile_paths` (lower, upper) the workers also load the quantile
+    models and `predict_with_bounds` is available. After `shutdown` no new
+    pool is started: batches that still arrive are predicted in-process.
+    """
+
+    def __init__(self, model_path: str, feature_columns: List[str],
+                 n_workers: int = 0, min_rows: int = 65_536,
+                 quantile_paths: Optional[Sequence[str]] = None):
+        self.model_path = os.path.abspath(model_path)
+        self.quantile_paths = [os.path.abspath(path) for path in quantile_paths or []]
+        self.feature_columns = list(feature_columns)
+        self.n_workers = max(0, int(n_workers))
+        self.min_rows = max(1, int(min_rows))
+
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._closed = False
+        self._local_models: Optional[List] = None
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self.n_workers > 1
+
+    def should_parallelize(self, n_rows: int) -> bool:
+        return self.enabled and not self._closed and n_rows >= self.min_rows
+
+    def _get_pool(self) -> Optional[ProcessPoolExecutor]:
+        with self._lock:
+            if self._closed:
+                return None
+            if self._pool is None:
+                self._pool = ProcessPoolExecutor(
+                    max_workers=self.n_workers,
+                    mp_context=get_context("spawn"),
+                    initializer=_init_worker,
+                    initargs=([self.model_path] + self.quantile_paths, self.feature_columns)
+                )
+            return self._pool
+
+    def warm_up(self, wait: bool = False) -> None:
+        """
+        Start every worker (and load its model) ahead of the first request.
+        """
+        if not self.enabled:
+            return
+        pool = self._get_pool()
+        if pool is None:
+            return
+        futures = [pool.submit(_worker_ready) for _ in range(self.n_workers)]
+        if wait:
+            for future in futures:
+                future.result()
+
+    @property
+    def has_bounds(self) -> bool:
+        return len(self.quantile_paths) == 2
+
+    def predict(self, X) -> np.ndarray:
+        return self._predict(X, 1)[0]
+
+    def predict_with_bounds(self, X) -> np.ndarray:
+        """
+        (3, n_rows): residual, lower and upper quantile predictions.
+        """
+        if not self.has_bounds:
+            raise RuntimeError("ParallelPredictor was created without quantile models")
+        return self._predict(X, 3)
+
+    def _predict(self, X, n_models: int) -> np.ndarray:
+        X = np.ascontiguousarray(X, dtype=np.float64)
+        pool = self._get_pool()
+        if pool is None:
+            return self._predict_in_process(X, n_models)
+
+        n_rows = len(X)
+        n_shards = max(1, min(self.n_workers, n_rows // MIN_SHARD_ROWS))
+        bounds = np.linspace(0, n_rows, n_shards + 1).astype(int)
+
+        shm_in = SharedMemory(create=True, size=max(X.nbytes, 1))
+        shm_out = SharedMemory(create=True, size=max(n_models * n_rows * 8, 1))
+        try:
+            np.ndarray(X.shape, dtype=np.float64, buffer=shm_in.buf)[:] = X
+
+            futures = [
+                pool.submit(_predict_shard, shm_in.name, shm_out.name, X.shape,
+                            int(start), int(stop), n_models)
+                for start, stop in zip(bounds[:-1], bounds[1:])
+            ]
+            for future in futures:
+                future.result()
+
+            return np.ndarray((n_models, n_rows), dtype=np.float64, buffer=shm_out.buf).copy()
+        finally:
+            shm_in.close()
+            shm_in.unlink()
+            shm_out.close()
+            shm_out.unlink()
+
+    def _predict_in_process(self, X: np.ndarray, n_models: int) -> np.ndarray:
+        # Requests still pinned to a retired model version end up here
+        import joblib
+        import pandas as pd
+
+        with self._lock:
+            if self._local_models is None:
+                self._local_models = [joblib.load(path) for path in [self.model_path] + self.quantile_paths]
+            models = self._local_models[:n_models]
+        frame = pd.DataFrame(X, columns=self.feature_columns, copy=False)
+        return np.stack([model.predict(frame) for model in models])
+
+    def shutdown(self) -> None:
+        with self._lock:
+            self._closed = True
+            if self._pool is not None:
+                self._pool.shutdown(wait=True, cancel_futures=True)
+                self._pool = None
@@ -0,0 +1,138 @@
+"""
+Non-dominated filtering for large multi-objective candidate sets.
+
+Every objective is minimized; negate the columns that should be maximized.
+Two objectives use an exact O(n log n) sweep. For more objectives, points
+are sorted lexicographically (a point can then only be dominated by an
+earlier one) and filtered block by block against the front kept so far,
+with the dominance checks done as vectorized array comparisons.
+"""
+import numpy as np
+
+# Rows per block in the many-objective filter; the within-block check
+# allocates block x block booleans
+FRONT_BLOCK_ROWS = 1024
+
+# Upper bound on points x front rows compared at once
+MAX_COMPARE_CELLS = 4_000_000
+
+
+def _front_2d(F: np.ndarray) -> np.ndarray:
+    order = np.lexsort((F[:, 1], F[:, 0]))
+    f0 = F[order, 0]
+    f1 = F[order, 1]
+    n = len(order)
+
+    # Running minimum of f1 over the points sorted before each row, and the
+    # first row reaching it (the one with the smallest f0 for that value)
+    running = np.minimum.accumulate(f1)
+    new_min = np.r_[True, f1[1:] < running[:-1]]
+    first_at_min = np.maximum.accumulate(np.where(new_min, np.arange(n), 0))
+
+    previous = np.r_[np.inf, running[:-1]]
+    previous_first = np.r_[0, first_at_min[:-1]]
+
+    # Dominated: an earlier row is strictly better on f1, or ties on f1
+    # while being strictly better on f0 (exact duplicates do not dominate)
+    dominated = (previous < f1) | ((previous == f1) & (f0[previous_first] < f0))
+    dominated[0] = False
+
+    mask = np.zeros(n, dtype=bool)
+    mask[order] = ~dominated
+    return mask
+
+
+def _dominates(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    """
+    (len(a), len(b)) matrix: row i of `a` dominates row j of `b`. Built one
+    objective at a time so only 2-D temporaries are allocated.
+    """
+    no_worse = np.ones((len(a), len(b)), dtype=bool)
+    equal = np.ones((len(a), len(b)), dtype=bool)
+    for k in range(a.shape[1]):
+        column_a = a[:, k][:, None]
+        column_b = b[:, k][None, :]
+        no_worse &= column_a <= column_b
+        equal &= column_a == column_b
+    return no_worse & ~equal
+
+
+def _dominated_by(points: np.ndarray, front: np.ndarray) -> np.ndarray:
+    """
+    For every row of `points`, whether some row of `front` dominates it.
+    """
+    dominated = np.zeros(len(points), dtype=bool)
+    if len(front) == 0 or len(points) == 0:
+        return dominated
+
+    step = max(1, MAX_COMPARE_CELLS // len(points))
+    for start in range(0, len(front), step):
+        dominated |= _dominates(front[start:start + step], points).any(axis=0)
+    return dominated
+
+
+def _front_blocked(F: np.ndarray) -> np.ndarray:
+    order = np.lexsort(F.T[::-1])
+    ordered = F[order]
+    n, m = ordered.shape
+
+    front_rows = []
+    front = np.empty((0, m))
+    for start in range(0, n, FRONT_BLOCK_ROWS):
+        rows = np.arange(start, min(start + FRONT_BLOCK_ROWS, n))
+        block = ordered[rows]
+
+        survivors = ~_dominated_by(block, front)
+        rows, block = rows[survivors], block[survivors]
+
+        if len(block) > 1:
+            survivors = ~_dominates(block, block).any(axis=0)
+            rows, block = rows[survivors], block[survivors]
+
+        front_rows.append(rows)
+        front = np.concatenate([front, block])
+
+    mask = np.zeros(n, dtype=bool)
+    mask[order[np.concatenate(front_rows)]] = True
+    return mask
+
+
+def non_dominated_mask(F) -> np.ndarray:
+    """
+    Boolean mask of the rows of `F` (n_points, n_objectives) on the first
+    Pareto front, all objectives minimized. Duplicate points are all kept.
+    """
+    F = np.asarray(F, dtype=np.float64)
+    if F.ndim != 2:
+        raise ValueError("F must be a 2-D array of shape (n_points, n_objectives).")
+
+    n, m = F.shape
+    if n == 0:
+        return np.zeros(0, dtype=bool)
+    if m == 1:
+        return F[:, 0] == F[:, 0].min()
+    if m == 2:
+        return _front_2d(F)
+    return _front_blocked(F)
+
+
+def crowding_distance(F) -> np.ndarray:
+    """
+    NSGA-II crowding distance of every point within one front. Boundary
+    points of each objective get infinity.
+    """
+    F = np.asarray(F, dtype=np.float64)
+    n, m = F.shape
+    distance = np.zeros(n)
+    if n <= 2:
+        distance[:] = np.inf
+        return distance
+
+    for k in range(m):
+        order = np.argsort(F[:, k], kind="stable")
+        column = F[order, k]
+        distance[order[0]] = distance[order[-1]] = np.inf
+        span = column[-1] - column[0]
+        if span > 0:
+            distance[order[1:-1]] += (column[2:] - column[:-2]) / span
+    return distance
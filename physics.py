@@ -0,0 +1,112 @@
+"""
+Physics baseline and model features of the served input space.
+
+The closed-form optical and thermal terms, the physics baseline SNR, the
+served parameter ranges and the array feature engineering shared by the
+server (main.py) and the offline lattice build (response_lattice.py), so
+both evaluate the models on the same features without one importing the
+other.
+"""
+import math
+from typing import Any, Dict, Tuple
+
+import numpy as np
+
+K_BOLTZMANN = 8.617e-5
+
+# Parameter ranges used in optimization sweeps
+NA_MIN, NA_MAX = 0.40, 0.95
+TRACK_PITCH_MIN, TRACK_PITCH_MAX = 180.0, 1800.0
+TEMP_MIN, TEMP_MAX = 20.0, 80.0
+HUMIDITY_MIN, HUMIDITY_MAX = 10.0, 90.0
+LAYER_COUNT_MIN, LAYER_COUNT_MAX = 1, 4
+
+MATERIALS = ["GST_HTL", "DYE_LTH", "MDISC"]
+WAVELENGTHS = [405, 650, 780]
+
+
+def calculate_physics_snr(wavelength, NA, isi, crosstalk, thermal_factor):
+    """
+    Deterministic Physics Baseline SNR (Same as training)
+    """
+    return (85
+            + 30 * NA
+            - 0.02 * wavelength
+            - 15 * isi
+            - 10 * crosstalk
+            + 5 * thermal_factor)
+
+
+def estimate_spot_size_nm(wavelength_nm: float, numerical_aperture: float) -> float:
+    return (0.61 * wavelength_nm) / numerical_aperture
+
+
+def estimate_crosstalk(track_pitch_nm: float, spot_size_nm: float, alpha: float = 0.002) -> float:
+    return math.exp(-alpha * (track_pitch_nm - spot_size_nm))
+
+
+def physics_columns(columns: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    `columns` plus the derived optical terms, thermal factor and physics
+    baseline SNR, each at the shape its inputs span.
+    """
+    columns = dict(columns)
+
+    wavelength = columns['laser_wavelength_nm']
+    na = columns['numerical_aperture']
+    pitch = columns['track_pitch_nm']
+
+    spot_size = estimate_spot_size_nm(wavelength, na)
+    columns['spot_size_nm'] = spot_size
+    columns['isi_factor'] = spot_size / pitch
+    columns['crosstalk_factor'] = np.exp(-0.002 * (pitch - spot_size))
+
+    temp_k = columns['temperature_c'] + 273.15
+    columns['thermal_factor'] = np.exp(-columns['activation_energy_ev'] / (K_BOLTZMANN * temp_k))
+
+    columns['physics_snr_db'] = calculate_physics_snr(
+        wavelength,
+        na,
+        columns['isi_factor'],
+        columns['crosstalk_factor'],
+        columns['thermal_factor']
+    )
+    return columns
+
+
+def engineer_feature_arrays(columns: Dict[str, Any], shape: Tuple[int, ...], feature_index: Dict[str, int]):
+    """
+    Array counterpart of engineer_features for a whole batch or grid.
+
+    `columns` maps input names to arrays broadcastable to `shape`. Derived
+    terms are evaluated at the shape their inputs span before anything is
+    expanded, so on a grid the optical terms are computed once per
+    (wavelength, NA, pitch) point and the thermal factor once per temperature.
+    Returns the flattened physics SNR and the (n, len(feature_index)) model
+    matrix, with each feature at its `feature_index` column.
+    """
+    columns = physics_columns(columns)
+    wavelength = columns['laser_wavelength_nm']
+    na = columns['numerical_aperture']
+    pitch = columns['track_pitch_nm']
+    spot_size = columns['spot_size_nm']
+
+    columns['NA_sq'] = na ** 2
+    columns['wavelength_div_NA'] = wavelength / na
+    columns['spot_div_pitch'] = spot_size / pitch
+    columns['temp_x_humidity'] = columns['temperature_c'] * columns['relative_humidity']
+
+    material = np.asarray(columns.pop('recording_material'))
+    columns['recording_material_GST_HTL'] = material == "GST_HTL"
+    columns['recording_material_MDISC'] = material == "MDISC"
+
+    n_rows = int(np.prod(shape))
+    n_features = len(feature_index)
+    X = np.zeros((n_rows, n_features))
+    grid = X.reshape(tuple(shape) + (n_features,))
+    for name, idx in feature_index.items():
+        if name in columns:
+            grid[..., idx] = columns[name]
+
+    physics_snr = np.broadcast_to(columns['physics_snr_db'], shape).reshape(n_rows)
+    return physics_snr, X
@@ -0,0 +1,124 @@
+"""
+Bounded in-process LRU cache for single-config predictions.
+
+Keys are built from the physically independent inputs only: the derived
+optical terms (spot size, ISI, crosstalk) are recomputed from wavelength, NA
+and pitch by `standardize_physical_inputs`, so whatever the client sent for
+them must not split one physical configuration into several cache entries.
+"""
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional
+
+# Recomputed by standardize_physical_inputs, never part of a cache key
+DERIVED_FIELDS = frozenset({"spot_size_nm", "isi_factor", "crosstalk_factor"})
+
+
+class PredictionCache:
+    """
+    Thread-safe LRU cache with a per-entry TTL.
+
+    maxsize <= 0 disables caching. quantize_decimals rounds float inputs
+    before keying, so configs that differ only below that precision share
+    one entry (and one prediction).
+    """
+
+    def __init__(self, maxsize: int = 1024, ttl_seconds: Optional[float] = 300.0,
+                 quantize_decimals: Optional[int] = None):
+        self.maxsize = int(maxsize)
+        self.ttl_seconds = ttl_seconds
+        self.quantize_decimals = quantize_decimals
+        self.version: Optional[str] = None
+
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.maxsize > 0
+
+    def make_key(self, canonical_input: Dict[str, Any], *extra: Hashable) -> tuple:
+        """
+        Key from a config already passed through standardize_physical_inputs.
+        """
+        items = []
+        for name in sorted(canonical_input):
+            if name in DERIVED_FIELDS:
+                continue
+            value = canonical_input[name]
+            if self.quantize_decimals is not None and isinstance(value, float):
+                value = round(value, self.quantize_decimals)
+            items.append((name, value))
+        return (self.version, tuple(items)) + tuple(extra)
+
+    def get(self, key: Hashable):
+        if not self.enabled:
+            return None
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+
+            expires_at, value = entry
+            if expires_at is not None and time.monotonic() >= expires_at:
+                del self._entries[key]
+                self.expirations += 1
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key: Hashable, value) -> None:
+        if not self.enabled:
+            return
+
+        expires_at = None
+        if self.ttl_seconds is not None and self.ttl_seconds > 0:
+            expires_at = time.monotonic() + self.ttl_seconds
+
+        with self._lock:
+            self._entries[key] = (expires_at, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def set_version(self, version: str) -> None:
+        """
+        Tag entries with the loaded model artifacts; a new version drops
+        everything cached for the previous one.
+        """
+        with self._lock:
+            if version != self.version:
+                self._entries.clear()
+                self.version = version
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "enabled": self.enabled,
+                "model_version": self.version,
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+                "ttl_seconds": self.ttl_seconds,
+                "quantize_decimals": self.quantize_decimals,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "hit_rate": (self.hits / lookups) if lookups else 0.0
+            }
@@ -0,0 +1,441 @@
+"""
+Precomputed response surface of the hybrid model.
+
+The served input space is small and bounded: a few categorical inputs
+(wavelength, material, PRML, CTC) times a box in NA, track pitch,
+temperature and humidity. `build_lattice` evaluates the residual and
+quantile models on a regular lattice over the box for every categorical
+combination and writes the result as one float32 .npy file plus a
+manifest.json:
+
+    response_lattice/
+        <model version>/
+            manifest.json   # axes, categories, fixed inputs, error report
+            values.npy      # (n_combos, *axis_steps, n_channels)
+
+`ResponseLattice` maps values.npy read-only and answers a batch by
+multilinear interpolation: 2^d gathers instead of a tree traversal. Only
+the model residuals are stored; the physics baseline is closed-form and is
+always computed exactly by the caller.
+
+The tree models are piecewise constant, so interpolation error peaks next
+to a split. `measure_error` compares the lattice with the live models on
+random points and the build stores that report in the manifest.
+`LatticeServer` keeps the lattice of the model version being served and
+rebuilds it in a background thread when the version changes.
+
+`bundle_evaluator` evaluates the models of an exported model bundle
+directly, so the offline build below does not start the server:
+
+    python response_lattice.py    # build the lattice for the current bundle
+"""
+import itertools
+import json
+import os
+import shutil
+import tempfile
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from physics import (HUMIDITY_MAX, HUMIDITY_MIN, MATERIALS, NA_MAX, NA_MIN, TEMP_MAX, TEMP_MIN,
+                     TRACK_PITCH_MAX, TRACK_PITCH_MIN, WAVELENGTHS, engineer_feature_arrays)
+
+FORMAT_VERSION = 1
+MANIFEST_FILE = "manifest.json"
+VALUES_FILE = "values.npy"
+DEFAULT_LATTICE_ROOT = "response_lattice"
+
+# evaluate(columns, shape) -> (n_channels, prod(shape)) residuals, where
+# `columns` maps every model input to an array broadcastable to `shape`
+Evaluator = Callable[[Dict[str, Any], Tuple[int, ...]], np.ndarray]
+
+
+def lattice_spec(axes: Dict[str, Tuple[float, float, int]], categories: Dict[str, Sequence],
+                 fixed: Dict[str, Any], channels: Sequence[str]) -> Dict[str, Any]:
+    """
+    JSON form of a lattice layout; a stored lattice is reused only if its
+    spec is equal.
+    """
+    return json.loads(json.dumps({
+        "axes": [[name, float(low), float(high), int(steps)] for name, (low, high, steps) in axes.items()],
+        "categories": [[name, list(values)] for name, values in categories.items()],
+        "fixed": dict(fixed),
+        "channels": list(channels)
+    }))
+
+
+# The served lattice: the categorical inputs, the continuous box of the
+# optimization sweeps and the other inputs at the dashboard defaults
+LATTICE_SPEC = lattice_spec(
+    axes={
+        "numerical_aperture": (NA_MIN, NA_MAX, 34),
+        "track_pitch_nm": (TRACK_PITCH_MIN, TRACK_PITCH_MAX, 55),
+        "temperature_c": (TEMP_MIN, TEMP_MAX, 7),
+        "relative_humidity": (HUMIDITY_MIN, HUMIDITY_MAX, 9)
+    },
+    categories={
+        "laser_wavelength_nm": WAVELENGTHS,
+        "recording_material": MATERIALS,
+        "prml_enabled": [0, 1],
+        "ctc_enabled": [0, 1]
+    },
+    fixed={
+        "layer_count": 1,
+        "layer_spacing_nm": 20000.0,
+        "thermal_conductivity_w_mk": 1.5,
+        "activation_energy_ev": 2.0
+    },
+    channels=["residual", "lower", "upper"]
+)
+
+
+def bundle_evaluator(bundle: Dict[str, Any]) -> Evaluator:
+    """
+    Residual, lower and upper predictions of a loaded model bundle (see
+    model_bundle.load_bundle), the values the server stores for its version.
+    """
+    models = bundle["models"]
+    feature_index = {name: idx for idx, name in enumerate(bundle["feature_columns"])}
+
+    def evaluate(columns: Dict[str, Any], shape: Tuple[int, ...]) -> np.ndarray:
+        _, X = engineer_feature_arrays(columns, shape, feature_index)
+        return np.stack([models[name].predict(X) for name in LATTICE_SPEC["channels"]])
+    return evaluate
+
+
+# -------------------------
+# BUILD
+# -------------------------
+def build_lattice(directory: str, evaluate: Evaluator, spec: Dict[str, Any], model_version: str,
+                  error_samples: int = 20_000) -> "ResponseLattice":
+    """
+    Evaluate every lattice point (one `evaluate` call per categorical
+    combination), measure the interpolation error on `error_samples` random
+    points and write the result to `directory`, replacing any older build.
+    """
+    root = os.path.dirname(os.path.abspath(directory))
+    os.makedirs(root, exist_ok=True)
+    started = time.perf_counter()
+
+    steps = tuple(axis[3] for axis in spec["axes"])
+    combos = list(itertools.product(*(values for _, values in spec["categories"])))
+
+    staging = tempfile.mkdtemp(dir=root, prefix=".staging-")
+    try:
+        os.chmod(staging, 0o755)
+        values = np.lib.format.open_memmap(
+            os.path.join(staging, VALUES_FILE), mode="w+", dtype="<f4",
+            shape=(len(combos),) + steps + (len(spec["channels"]),)
+        )
+        for k, combo in enumerate(combos):
+            columns: Dict[str, Any] = dict(spec["fixed"])
+            columns.update(zip((name for name, _ in spec["categories"]), combo))
+            for dim, (name, low, high, n) in enumerate(spec["axes"]):
+                view = [1] * len(steps)
+                view[dim] = -1
+                columns[name] = np.linspace(low, high, n).reshape(view)
+            values[k] = np.asarray(evaluate(columns, steps)).T.reshape(steps + (-1,))
+        values.flush()
+        del values
+
+        manifest = {
+            "format_version": FORMAT_VERSION,
+            "model_version": model_version,
+            "spec": spec,
+            "built_at": time.time(),
+            "build_seconds": time.perf_counter() - started
+        }
+        _write_manifest(staging, manifest)
+        manifest["error_report"] = measure_error(ResponseLattice(staging), evaluate, error_samples)
+        _write_manifest(staging, manifest)
+
+        if os.path.isdir(directory):
+            shutil.rmtree(directory)
+        os.rename(staging, directory)
+    except BaseException:
+        shutil.rmtree(staging, ignore_errors=True)
+        raise
+
+    return ResponseLattice(directory)
+
+
+def _write_manifest(directory: str, manifest: Dict[str, Any]) -> None:
+    with open(os.path.join(directory, MANIFEST_FILE), "w") as handle:
+        json.dump(manifest, handle, indent=2)
+
+
+def measure_error(lattice: "ResponseLattice", evaluate: Evaluator, n_samples: int = 20_000,
+                  seed: int = 0) -> Dict[str, Any]:
+    """
+    Absolute error (dB) of the interpolated residuals against `evaluate` on
+    points drawn uniformly over the box and the categorical combinations.
+    """
+    rng = np.random.default_rng(seed)
+    columns: Dict[str, Any] = dict(lattice.fixed)
+    for name, values in lattice.categories:
+        columns[name] = np.asarray(values)[rng.integers(0, len(values), n_samples)]
+    for name, low, high, _ in lattice.axes:
+        columns[name] = rng.uniform(low, high, n_samples)
+
+    shape = (n_samples,)
+    error = np.abs(lattice.interpolate(columns, shape) - np.asarray(evaluate(columns, shape)))
+    return {
+        "samples": n_samples,
+        "channels": {
+            channel: {
+                "max_abs_error_db": float(error[c].max()),
+                "p99_abs_error_db": float(np.percentile(error[c], 99)),
+                "mean_abs_error_db": float(error[c].mean())
+            }
+            for c, channel in enumerate(lattice.channels)
+        }
+    }
+
+
+# -------------------------
+# SERVING
+# -------------------------
+class ResponseLattice:
+    """
+    One built lattice, memory-mapped read-only.
+    """
+
+    def __init__(self, directory: str):
+        with open(os.path.join(directory, MANIFEST_FILE)) as handle:
+            manifest = json.load(handle)
+        if manifest.get("format_version") != FORMAT_VERSION:
+            raise ValueError(f"Unsupported lattice format: {manifest.get('format_version')!r}")
+
+        self.directory = directory
+        self.manifest = manifest
+        self.model_version: str = manifest["model_version"]
+        self.spec: Dict[str, Any] = manifest["spec"]
+        self.axes: List[Tuple[str, float, float, int]] = [tuple(axis) for axis in self.spec["axes"]]
+        self.categories: List[Tuple[str, list]] = [tuple(category) for category in self.spec["categories"]]
+        self.fixed: Dict[str, Any] = self.spec["fixed"]
+        self.channels: List[str] = self.spec["channels"]
+
+        self.values = np.load(os.path.join(directory, VALUES_FILE), mmap_mode="r")
+        # Plain ndarray view of the map: np.memmap indexing is much slower
+        self._flat = np.asarray(self.values).reshape(-1, len(self.channels))
+
+        # Row offsets in _flat: per categorical combination, per axis step,
+        # and of the 2^d corners of a cell relative to its lowest corner
+        steps = [axis[3] for axis in self.axes]
+        self._combo_stride = int(np.prod(steps))
+        self._axis_strides = [int(np.prod(steps[dim + 1:])) for dim in range(len(steps))]
+        corner_bits = np.array(list(itertools.product((0, 1), repeat=len(steps))), dtype=np.intp)
+        self._corner_offsets = corner_bits @ np.array(self._axis_strides, dtype=np.intp)
+
+        # Sorted category values and their codes, for searchsorted lookups
+        self._category_lookup = []
+        for _, values in self.categories:
+            order = np.argsort(values, kind="stable")
+            self._category_lookup.append((np.asarray(values)[order], order))
+
+    @property
+    def error_report(self) -> Optional[Dict[str, Any]]:
+        return self.manifest.get("error_report")
+
+    def _codes(self, k: int, column) -> Optional[np.ndarray]:
+        """
+        Index of each value of `column` in category k, or None if any value
+        is not one of its choices.
+        """
+        ordered, order = self._category_lookup[k]
+        column = np.asarray(column)
+        if column.dtype.kind != ordered.dtype.kind and not (
+                column.dtype.kind in "iuf" and ordered.dtype.kind in "iuf"):
+            return None
+        position = np.minimum(np.searchsorted(ordered, column), len(ordered) - 1)
+        if not np.all(ordered[position] == column):
+            return None
+        return order[position]
+
+    def covers(self, columns: Dict[str, Any]) -> bool:
+        """
+        True when every value in `columns` lies on the lattice: fixed inputs
+        equal, categorical values known, continuous values inside the box.
+        """
+        try:
+            for name, value in self.fixed.items():
+                if not np.all(np.asarray(columns[name]) == value):
+                    return False
+            for k, (name, _) in enumerate(self.categories):
+                if self._codes(k, columns[name]) is None:
+                    return False
+            for name, low, high, _ in self.axes:
+                column = np.asarray(columns[name], dtype=np.float64)
+                slack = 1e-9 * (high - low)
+                if not np.all((column >= low - slack) & (column <= high + slack)):
+                    return False
+        except KeyError:
+            return False
+        return True
+
+    def interpolate(self, columns: Dict[str, Any], shape: Tuple[int, ...]) -> np.ndarray:
+        """
+        (n_channels, prod(shape)) multilinear interpolation at `columns`,
+        which must be covered (see `covers`).
+        """
+        n_rows = int(np.prod(shape))
+
+        # Lowest cell corner per row; indices and fractions are computed at
+        # the shape each input spans and only then broadcast to all rows
+        combo = 0
+        for k, (name, values) in enumerate(self.categories):
+            combo = combo * len(values) + self._codes(k, columns[name])
+        base = np.asarray(combo, dtype=np.intp) * self._combo_stride
+
+        fractions = []
+        for (name, low, high, steps), stride in zip(self.axes, self._axis_strides):
+            position = (np.asarray(columns[name], dtype=np.float64) - low) * ((steps - 1) / (high - low))
+            cell = np.clip(np.floor(position), 0, steps - 2)
+            base = base + cell.astype(np.intp) * stride
+            fractions.append(np.broadcast_to(np.clip(position - cell, 0.0, 1.0), shape).reshape(n_rows, 1))
+        base = np.broadcast_to(base, shape).reshape(n_rows, 1)
+
+        # All 2^d corners in one gather: (n_rows, 2^d, n_channels), and
+        # their weights in the same order (first axis most significant)
+        corners = np.take(self._flat, base + self._corner_offsets, axis=0)
+        weights = np.ones((n_rows, 1))
+        for t in reversed(fractions):
+            weights = np.hstack([weights * (1.0 - t), weights * t])
+        return (weights[:, None, :] @ corners)[:, 0, :].T
+
+    def describe(self) -> Dict[str, Any]:
+        return {
+            "model_version": self.model_version,
+            "directory": self.directory,
+            "axes": [{"parameter": name, "start": low, "end": high, "steps": steps}
+                     for name, low, high, steps in self.axes],
+            "categories": {name: values for name, values in self.categories},
+            "fixed": self.fixed,
+            "points": int(self.values.shape[0] * self._combo_stride),
+            "size_bytes": int(self.values.nbytes),
+            "build_seconds": self.manifest.get("build_seconds"),
+            "error_report": self.error_report
+        }
+
+
+class LatticeServer:
+    """
+    Lattice of the model version being served.
+
+    `ensure(models)` loads <root>/<models.version>/ if it was built with
+    the same spec, and otherwise builds it in a background thread with
+    `evaluator_for(models)`. Until it is ready, `lattice_for` returns None
+    and callers use the live models.
+    """
+
+    def __init__(self, root: str, spec: Dict[str, Any], evaluator_for: Callable[[Any], Evaluator],
+                 enabled: bool = False, error_samples: int = 20_000):
+        self.root = root
+        self.spec = spec
+        self.evaluator_for = evaluator_for
+        self.enabled = enabled
+        self.error_samples = error_samples
+
+        self.lattice: Optional[ResponseLattice] = None
+        self.history: deque = deque(maxlen=20)
+        self._wanted = None
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+
+    def lattice_for(self, version: str) -> Optional[ResponseLattice]:
+        lattice = self.lattice
+        if not self.enabled or lattice is None or lattice.model_version != version:
+            return None
+        return lattice
+
+    def load_or_build(self, models, rebuild: bool = False) -> ResponseLattice:
+        """
+        Stored lattice for `models.version`, built first if it is missing,
+        stale or `rebuild` is set. Runs in the calling thread.
+        """
+        directory = os.path.join(self.root, models.version)
+        if not rebuild:
+            try:
+                lattice = ResponseLattice(directory)
+                if lattice.spec == self.spec and lattice.model_version == models.version:
+                    return lattice
+            except (OSError, ValueError, KeyError):
+                pass
+        return build_lattice(directory, self.evaluator_for(models), self.spec, models.version,
+                             error_samples=self.error_samples)
+
+    def ensure(self, models) -> None:
+        """
+        Make `models` the version to serve from; loads or builds its lattice
+        in the background.
+        """
+        if not self.enabled:
+            return
+        with self._lock:
+            self._wanted = models
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="osis-lattice", daemon=True)
+                self._thread.start()
+
+    def _run(self) -> None:
+        while True:
+            with self._lock:
+                models = self._wanted
+                current = self.lattice
+                if current is not None and current.model_version == models.version:
+                    self._thread = None
+                    return
+
+            started = time.perf_counter()
+            try:
+                lattice = self.load_or_build(models)
+            except Exception as exc:  # keep serving from the live models
+                with self._lock:
+                    self.history.append({"model_version": models.version, "error": repr(exc),
+                                         "timestamp": time.time()})
+                    if self._wanted is models:
+                        self._thread = None
+                        return
+                continue
+
+            with self._lock:
+                self.lattice = lattice
+                self.history.append({"model_version": models.version, "timestamp": time.time(),
+                                     "seconds": time.perf_counter() - started})
+
+    def wait(self, timeout: Optional[float] = None) -> None:
+        thread = self._thread
+        if thread is not None:
+            thread.join(timeout)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "enabled": self.enabled,
+            "building": self._thread is not None,
+            "lattice": self.lattice.describe() if self.lattice is not None else None,
+            "builds": list(self.history)
+        }
+
+
+if __name__ == "__main__":
+    from model_bundle import DEFAULT_BUNDLE_ROOT, current_bundle_dir, load_bundle
+
+    # Same locations as the server
+    bundle_root = os.environ.get("OSIS_MODEL_BUNDLE", DEFAULT_BUNDLE_ROOT)
+    lattice_root = os.environ.get("OSIS_LATTICE_DIR", DEFAULT_LATTICE_ROOT)
+    bundle_dir = current_bundle_dir(bundle_root) if bundle_root and bundle_root.lower() != "none" else None
+    if bundle_dir is None:
+        raise SystemExit(f"No current model bundle in {bundle_root!r}; export one with python model_bundle.py")
+
+    bundle = load_bundle(bundle_dir)
+    version = bundle["version"]
+    lattice = build_lattice(os.path.join(lattice_root, version), bundle_evaluator(bundle), LATTICE_SPEC, version)
+    print(f"Built response lattice for {version} in {lattice.manifest['build_seconds']:.1f} s "
+          f"({lattice.values.nbytes / 1e6:.1f} MB) at {lattice.directory}")
+    for channel, report in lattice.error_report["channels"].items():
+        print(f"{channel:>9} | max {report['max_abs_error_db']:.3f} dB | "
+              f"p99 {report['p99_abs_error_db']:.3f} dB | mean {report['mean_abs_error_db']:.4f} dB")
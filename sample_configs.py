@@ -0,0 +1,47 @@
+"""
+Reference configurations for the benchmarks and tests.
+
+BASE_CONFIG is a 405 nm single-layer disc at room temperature;
+random_configs draws configurations across the server's input ranges.
+"""
+from typing import Any, Dict, List
+
+import numpy as np
+
+BASE_CONFIG = {
+    'laser_wavelength_nm': 405,
+    'numerical_aperture': 0.85,
+    'spot_size_nm': 290.47,
+    'track_pitch_nm': 225.0,
+    'layer_count': 1,
+    'layer_spacing_nm': 20000.0,
+    'isi_factor': 1.29,
+    'crosstalk_factor': 0.0,
+    'recording_material': 'GST_HTL',
+    'thermal_conductivity_w_mk': 1.5,
+    'activation_energy_ev': 2.0,
+    'temperature_c': 25.0,
+    'relative_humidity': 45.0,
+    'prml_enabled': 1,
+    'ctc_enabled': 1
+}
+
+
+def random_configs(n: int, seed: int = 0) -> List[Dict[str, Any]]:
+    import main  # input ranges
+
+    rng = np.random.default_rng(seed)
+    configs = []
+    for _ in range(n):
+        config = dict(BASE_CONFIG)
+        config['laser_wavelength_nm'] = int(rng.choice([405, 650, 780]))
+        config['numerical_aperture'] = float(rng.uniform(main.NA_MIN, main.NA_MAX))
+        config['track_pitch_nm'] = float(rng.uniform(main.TRACK_PITCH_MIN, main.TRACK_PITCH_MAX))
+        config['layer_count'] = int(rng.integers(1, 5))
+        config['recording_material'] = str(rng.choice(["GST_HTL", "DYE_LTH", "MDISC"]))
+        config['temperature_c'] = float(rng.uniform(main.TEMP_MIN, main.TEMP_MAX))
+        config['relative_humidity'] = float(rng.uniform(main.HUMIDITY_MIN, main.HUMIDITY_MAX))
+        config['prml_enabled'] = int(rng.integers(0, 2))
+        config['ctc_enabled'] = int(rng.integers(0, 2))
+        configs.append(config)
+    return configs
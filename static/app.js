@@ -270,26 +270,29 @@ document.getElementById("osisForm").addEventListener("submit", async (e) => {
         const simEnd = parseFloat(document.getElementById("sim_end").value);
         const simSteps = parseInt(document.getElementById("sim_steps").value) || 20;
 
-        const comparisonPayload = { ...basePayload, modulation };
-        if (measuredInput !== "") {
-            comparisonPayload.measured_snr_db = parseFloat(measuredInput);
-        }
-
-        const [snrData, berData, cmpData, optData, sensData, simData] = await Promise.all([
-            postJson("/predict_snr", basePayload),
-            postJson("/predict_ber", { ...basePayload, modulation }),
-            postJson("/compare_models", comparisonPayload),
-            postJson("/optimize_parameters", { base_config: basePayload, modulation, top_k: topK }),
-            postJson("/sensitivity_analysis", { ...basePayload, modulation, delta_fraction: deltaFraction }),
-            postJson("/simulate_dashboard", {
-                base_config: basePayload,
+        const evaluationPayload = {
+            base_config: basePayload,
+            modulation,
+            top_k: topK,
+            delta_fraction: deltaFraction,
+            simulation: {
                 sweep_parameter: sweepParameter,
                 start: simStart,
                 end: simEnd,
-                steps: simSteps,
-                modulation
-            })
-        ]);
+                steps: simSteps
+            }
+        };
+        if (measuredInput !== "") {
+            evaluationPayload.measured_snr_db = parseFloat(measuredInput);
+        }
+
+        const evaluation = await postJson("/evaluate", evaluationPayload);
+        const snrData = evaluation.snr;
+        const berData = evaluation.ber;
+        const cmpData = evaluation.comparison;
+        const optData = evaluation.optimization;
+        const sensData = evaluation.sensitivity;
+        const simData = evaluation.simulation;
 
         updateMetricCards(snrData, berData, cmpData);
         renderOptimizationTable(optData.top_recommendations || []);
@@ -0,0 +1,75 @@
+import numpy as np
+from fastapi.testclient import TestClient
+
+import main
+from adaptive_search import adaptive_search
+from sample_configs import BASE_CONFIG, random_configs
+
+client = TestClient(main.app)
+
+CONTINUOUS = {"x": (-2.0, 2.0), "y": (0.0, 10.0)}
+CATEGORICAL = {"mode": ["a", "b", "c"]}
+
+
+def bowl(samples):
+    bonus = np.where(samples["mode"] == "b", 1.0, 0.0)
+    return bonus - (samples["x"] - 0.7) ** 2 - 0.1 * (samples["y"] - 3.0) ** 2
+
+
+def test_evaluations_stay_within_budget():
+    for budget in [1, 16, 33, 100, 1000]:
+        rows = []
+
+        def objective(samples):
+            rows.append(len(samples["x"]))
+            return bowl(samples)
+
+        result = adaptive_search(objective, CONTINUOUS, CATEGORICAL, budget=budget)
+        assert result["evaluations_used"] == sum(rows) <= budget
+        assert len(result["scores"]) == result["evaluations_used"]
+        assert result["history"][-1]["evaluations"] == result["evaluations_used"]
+        best = [entry["best_objective"] for entry in result["history"]]
+        assert best == sorted(best)
+
+
+def test_fixed_seed_is_deterministic():
+    first = adaptive_search(bowl, CONTINUOUS, CATEGORICAL, budget=200, seed=3)
+    second = adaptive_search(bowl, CONTINUOUS, CATEGORICAL, budget=200, seed=3)
+    other = adaptive_search(bowl, CONTINUOUS, CATEGORICAL, budget=200, seed=4)
+
+    assert first["history"] == second["history"]
+    np.testing.assert_array_equal(first["scores"], second["scores"])
+    for name in first["samples"]:
+        np.testing.assert_array_equal(first["samples"][name], second["samples"][name])
+    assert not np.array_equal(first["scores"], other["scores"])
+    assert first["scores"].max() > 0.95  # optimum is 1.0 at (0.7, 3.0, "b")
+
+
+def test_moderate_budget_reaches_grid_optimum():
+    grid_best = main.run_grid_optimization(BASE_CONFIG, "OOK-NRZ", 1)["top_recommendations"][0]["objective_score"]
+    for budget in [64, 256]:
+        adaptive = main.run_adaptive_optimization(BASE_CONFIG, "OOK-NRZ", 1, budget=budget, seed=0)
+        assert adaptive["evaluations_used"] <= budget
+        assert adaptive["top_recommendations"][0]["objective_score"] >= grid_best - 1e-9
+
+    # Elsewhere the continuous search lands within a small margin of the grid
+    for config in random_configs(4, seed=12):
+        grid_best = main.run_grid_optimization(config, "OOK-NRZ", 1)["top_recommendations"][0]["objective_score"]
+        adaptive = main.run_adaptive_optimization(config, "OOK-NRZ", 1, budget=256, seed=0)
+        assert adaptive["top_recommendations"][0]["objective_score"] >= grid_best - 0.25
+
+
+def test_endpoint_reports_budget_and_is_reproducible():
+    body = {"base_config": BASE_CONFIG, "search_mode": "adaptive", "budget": 100, "seed": 7, "top_k": 3}
+    first = client.post("/optimize_parameters", json=body).json()
+    assert first["search_mode"] == "adaptive" and first["budget"] == 100
+    assert first["evaluations_used"] <= 100
+    assert client.post("/optimize_parameters", json=body).json() == first
+
+
+if __name__ == "__main__":
+    test_evaluations_stay_within_budget()
+    test_fixed_seed_is_deterministic()
+    test_moderate_budget_reaches_grid_optimum()
+    test_endpoint_reports_budget_and_is_reproducible()
+    print("Adaptive search checks passed.")
@@ -0,0 +1,33 @@
+import numpy as np
+
+from bench_suite import compare_results, run_suite, summarize
+
+
+def report(**p50_ms):
+    return {"results": {name.replace("__", "/"): {"p50_ms": value} for name, value in p50_ms.items()}}
+
+
+def test_summarize_percentiles_and_throughput():
+    latencies = np.arange(1, 101) / 1e3  # 1..100 ms
+    summary = summarize(latencies, rows=10)
+    assert summary["repeats"] == 100
+    assert summary["p50_ms"] == np.percentile(np.arange(1, 101), 50)
+    assert summary["p50_ms"] <= summary["p95_ms"] <= summary["p99_ms"]
+    assert summary["rows_per_s"] == 10 / (summary["p50_ms"] / 1e3)
+
+
+def test_compare_flags_only_regressions_beyond_threshold():
+    baseline = report(a=10.0, b=10.0, c=10.0)
+    current = report(a=12.0, b=13.0, c=5.0, d=99.0)
+
+    regressions = compare_results(current, baseline, threshold=0.25)
+    assert [r["case"] for r in regressions] == ["b"]
+    assert abs(regressions[0]["change"] - 0.3) < 1e-12
+
+
+def test_suite_reports_every_selected_case():
+    result = run_suite(max_rows=10, only="predict_batch_metrics", log=lambda line: None)
+    assert list(result["results"]) == ["predict_batch_metrics/1", "predict_batch_metrics/10"]
+    for summary in result["results"].values():
+        assert summary["p50_ms"] > 0 and summary["rows_per_s"] > 0
+    assert "model_version" in result["environment"]
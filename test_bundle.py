@@ -0,0 +1,116 @@
+import json
+import os
+import shutil
+import subprocess
+import sys
+
+import joblib
+import numpy as np
+
+from model_bundle import bundle_matches_sources, current_bundle_dir, export_bundle, load_bundle
+from tree_engine import compile_model
+
+ARTIFACTS = {
+    "residual": "osis_snr_model.pkl",
+    "lower": "osis_snr_model_lower.pkl",
+    "upper": "osis_snr_model_upper.pkl"
+}
+FEATURE_COLUMNS = joblib.load("osis_features.pkl")
+
+
+def export_to(root):
+    estimators = {name: joblib.load(path) for name, path in ARTIFACTS.items()}
+    return estimators, export_bundle(str(root), estimators, FEATURE_COLUMNS, sources=list(ARTIFACTS.values()))
+
+
+def test_bundle_matches_compiled_models(tmp_path):
+    estimators, version = export_to(tmp_path)
+    bundle = load_bundle(current_bundle_dir(str(tmp_path)))
+    assert bundle["version"] == version
+    assert bundle["feature_columns"] == list(FEATURE_COLUMNS)
+
+    rng = np.random.default_rng(0)
+    X = rng.uniform(0, 5, size=(500, len(FEATURE_COLUMNS)))
+    for name, estimator in estimators.items():
+        np.testing.assert_array_equal(bundle["models"][name].predict(X), compile_model(estimator).predict(X))
+
+
+def test_bundle_arrays_are_memory_mapped(tmp_path):
+    export_to(tmp_path)
+    forest = load_bundle(current_bundle_dir(str(tmp_path)))["models"]["lower"]
+    for field in ["feature", "threshold", "left", "right", "value", "roots", "children"]:
+        values = getattr(forest, field)
+        assert isinstance(values.base, np.memmap) and not values.flags.writeable
+
+
+def test_bundle_without_children_array_still_loads(tmp_path):
+    # Bundles exported before `children` was stored
+    estimators, _ = export_to(tmp_path)
+    directory = current_bundle_dir(str(tmp_path))
+    manifest_path = os.path.join(directory, "manifest.json")
+    with open(manifest_path) as handle:
+        manifest = json.load(handle)
+
+    def drop_children(spec):
+        if spec["kind"] == "stacking":
+            for base in spec["base_models"] + [spec["final_model"]]:
+                drop_children(base)
+        else:
+            os.remove(os.path.join(directory, spec["arrays"].pop("children")))
+
+    for spec in manifest["models"].values():
+        drop_children(spec)
+    with open(manifest_path, "w") as handle:
+        json.dump(manifest, handle)
+
+    bundle = load_bundle(directory)
+    X = np.random.default_rng(1).uniform(0, 5, size=(200, len(FEATURE_COLUMNS)))
+    for name, estimator in estimators.items():
+        np.testing.assert_array_equal(bundle["models"][name].predict(X), compile_model(estimator).predict(X))
+
+
+def test_export_is_versioned_and_detects_stale_sources(tmp_path):
+    _, first = export_to(tmp_path)
+    _, second = export_to(tmp_path)
+    assert first == second
+    assert sorted(entry for entry in os.listdir(tmp_path) if not entry.startswith(".")) == sorted(["CURRENT", first])
+
+    bundle = load_bundle(current_bundle_dir(str(tmp_path)))
+    assert bundle_matches_sources(bundle)
+    shutil.copy(ARTIFACTS["lower"], tmp_path / ARTIFACTS["lower"])
+    with open(tmp_path / ARTIFACTS["lower"], "ab") as handle:
+        handle.write(b"\0")
+    assert not bundle_matches_sources(bundle, base_dir=str(tmp_path))
+
+
+COLD_START = """
+import json, sys, time
+start = time.perf_counter()
+import main
+imported = time.perf_counter()
+main.predict_full_metrics(main.standardize_physical_inputs(json.loads(sys.argv[1])))
+done = time.perf_counter()
+print(imported - start, done - start)
+"""
+
+
+if __name__ == "__main__":
+    import tempfile
+    from pathlib import Path
+
+    from sample_configs import BASE_CONFIG
+
+    with tempfile.TemporaryDirectory() as tmp:
+        test_bundle_matches_compiled_models(Path(tmp))
+    print("Bundle checks passed.")
+
+    # Fresh interpreter per run: import time and time to first prediction
+    for label, bundle_root in [("bundle", "model_bundle"), ("pickle", "none")]:
+        env = dict(os.environ, OSIS_MODEL_BUNDLE=bundle_root)
+        runs = []
+        for _ in range(5):
+            command = [sys.executable, "-c", COLD_START, json.dumps(BASE_CONFIG)]
+            output = subprocess.run(command, env=env, check=True, capture_output=True, text=True).stdout
+            runs.append([float(value) for value in output.split()])
+        imported, first = np.median(runs, axis=0)
+        print(f"{label:<7} | import {imported * 1e3:7.1f} ms | first prediction {first * 1e3:7.1f} ms")
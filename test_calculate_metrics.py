@@ -0,0 +1,117 @@
+import os
+import subprocess
+import sys
+
+import numpy as np
+import pytest
+from sklearn.metrics import mean_absolute_error, mean_squared_error, r2_score
+
+import calculate_metrics as cm
+import generate_osis_dataset as gen
+from dataset_store import export_csv
+
+
+@pytest.fixture
+def dataset_dir(tmp_path):
+    """
+    A small store plus the same rows as CSV.
+    """
+    gen.generate_store(6000, str(tmp_path / "osis_dataset"), seed=11, chunk_size=2500, workers=1)
+    export_csv(str(tmp_path / "osis_dataset"), str(tmp_path / "osis_dataset.csv"))
+    # Same rows: keep the store current so it is what gets read
+    schema_mtime = os.path.getmtime(str(tmp_path / "osis_dataset" / "schema.json"))
+    os.utime(str(tmp_path / "osis_dataset.csv"), (schema_mtime - 1, schema_mtime - 1))
+    return tmp_path
+
+
+def test_online_accumulator_matches_sklearn():
+    rng = np.random.default_rng(0)
+    # Large offset: a naive sum(y²) - n·mean² loses most digits here
+    y_true = 1e8 + rng.normal(0, 1, 100_000)
+    y_pred = y_true + rng.normal(0, 0.3, len(y_true))
+
+    parts = np.array_split(np.arange(len(y_true)), [1, 999, 40_000, 40_001, 77_777])
+    chunks = [cm.RegressionAccumulator().update(y_true[idx], y_pred[idx]) for idx in parts]
+    forward = cm.RegressionAccumulator()
+    for chunk in chunks:
+        forward.merge(chunk)
+    backward = cm.RegressionAccumulator()
+    for chunk in reversed(chunks):
+        backward.merge(chunk)
+
+    expected = {
+        "r2": r2_score(y_true, y_pred),
+        "rmse": np.sqrt(mean_squared_error(y_true, y_pred)),
+        "mae": mean_absolute_error(y_true, y_pred)
+    }
+    for result in [forward.result(), backward.result()]:
+        assert result["n"] == len(y_true)
+        for name, value in expected.items():
+            assert result[name] == pytest.approx(value, rel=1e-9), name
+
+
+def test_streaming_matches_in_memory(dataset_dir):
+    store, csv_path = str(dataset_dir / "osis_dataset"), str(dataset_dir / "osis_dataset.csv")
+    expected = cm.evaluate_in_memory(store, csv_path)
+
+    slices = ["recording_material", "layer_count"]
+    from_store = cm.evaluate_streaming(store, csv_path, chunk_rows=1700, slice_columns=slices)
+    from_csv = cm.evaluate_streaming(str(dataset_dir / "missing"), csv_path, chunk_rows=2500)
+    for result in [from_store, from_csv]:
+        assert result["n"] == expected["n"] == 6000
+        for name in ["r2", "rmse", "mae"]:
+            assert result[name] == pytest.approx(expected[name], rel=1e-9), name
+
+    for name in slices:
+        groups = from_store["slices"][name]
+        assert sum(group["n"] for group in groups.values()) == 6000
+    assert set(from_store["slices"]["recording_material"]) == {"DYE_LTH", "GST_HTL", "MDISC"}
+
+
+def test_worker_count_does_not_change_results(dataset_dir):
+    store = str(dataset_dir / "osis_dataset")
+    sequential = cm.evaluate_streaming(store, chunk_rows=1000, slice_columns=["laser_wavelength_nm"])
+    parallel = cm.evaluate_streaming(store, chunk_rows=1000, slice_columns=["laser_wavelength_nm"], workers=2)
+    assert parallel == sequential
+
+
+def test_streaming_does_not_load_the_server(dataset_dir):
+    script = ("import sys, calculate_metrics as cm; cm.evaluate_streaming(sys.argv[1], chunk_rows=3000); "
+              "print('main' in sys.modules)")
+    here = os.path.dirname(os.path.abspath(__file__))
+    output = subprocess.run([sys.executable, "-c", script, str(dataset_dir / "osis_dataset")], cwd=here,
+                            env=dict(os.environ, PYTHONPATH=here), check=True, capture_output=True, text=True)
+    assert output.stdout.split()[-1] == "False"
+
+
+PEAK_RSS = """
+import re, sys
+import calculate_metrics as cm
+if sys.argv[1] == "in-memory":
+    cm.evaluate_in_memory(sys.argv[2])
+else:
+    cm.evaluate_streaming(sys.argv[2], chunk_rows=250_000)
+# VmHWM is this process's own peak; ru_maxrss also counts the forking parent
+print(re.search(r"VmHWM:\\s+(\\d+)", open("/proc/self/status").read()).group(1))
+"""
+
+
+if __name__ == "__main__":
+    import tempfile
+    import time
+
+    # Peak RSS and wall time of the one-shot vs streaming evaluation as the
+    # dataset grows; streaming should stay flat
+    here = os.path.dirname(os.path.abspath(__file__))
+    env = dict(os.environ, PYTHONPATH=here)
+    for n_rows in [500_000, 1_000_000, 2_000_000]:
+        with tempfile.TemporaryDirectory() as tmp:
+            gen.generate_store(n_rows, os.path.join(tmp, "osis_dataset"), workers=1)
+            for mode in ["in-memory", "streaming"]:
+                start = time.perf_counter()
+                command = [sys.executable, "-c", PEAK_RSS, mode, os.path.join(tmp, "osis_dataset")]
+                output = subprocess.run(command, cwd=here, env=env, check=True,
+                                        capture_output=True, text=True).stdout
+                seconds = time.perf_counter() - start
+                print(f"{n_rows:>9} rows | {mode:<9} | {seconds:6.1f} s | peak RSS "
+                      f"{int(output.split()[-1]) / 1024:7.0f} MB")
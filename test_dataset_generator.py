@@ -0,0 +1,100 @@
+import time
+
+import numpy as np
+import pandas as pd
+from scipy import stats
+
+import generate_osis_dataset as gen
+
+
+def legacy_samples(n, seed=42):
+    """
+    The original per-row generator loop, kept as the statistical reference.
+    """
+    np.random.seed(seed)
+    rows = []
+    for _ in range(n):
+        wl = np.random.choice(gen.wavelengths)
+        na_min, na_max = gen.NA_range[wl]
+        NA = np.random.uniform(na_min, na_max)
+        track_pitch = gen.track_pitch_base[wl] * np.random.uniform(0.9, 1.1)
+        spot = gen.spot_size_nm(wl, NA)
+        isi = gen.isi_factor(spot, track_pitch)
+        layers = np.random.choice([1, 2, 3, 4], p=[0.5, 0.3, 0.15, 0.05])
+        spacing = np.random.uniform(15000, 30000) if layers > 1 else 1e6
+        crosstalk = gen.crosstalk_factor(track_pitch, spot)
+        material = np.random.choice(gen.materials, p=[0.5, 0.3, 0.2])
+        if material == "GST_HTL":
+            thermal_k, activation = np.random.uniform(0.5, 1.5), np.random.uniform(1.8, 2.2)
+        elif material == "DYE_LTH":
+            thermal_k, activation = np.random.uniform(0.1, 0.4), np.random.uniform(0.8, 1.2)
+        else:
+            thermal_k, activation = np.random.uniform(1.2, 2.0), np.random.uniform(2.0, 2.5)
+        temp = np.random.uniform(20, 80)
+        humidity = np.random.uniform(10, 90)
+        prml = np.random.choice([0, 1], p=[0.5, 0.5])
+        ctc = np.random.choice([0, 1], p=[0.5, 0.5])
+        thermal_f = gen.thermal_factor_calc(activation, temp)
+        physics_snr = gen.calculate_physics_snr(wl, NA, isi, crosstalk, thermal_f) + np.random.normal(0, 0.05)
+        density_penalty = 5 * (isi - 0.8) ** 2 if isi > 0.8 else 0
+        humidity_penalty = 0.05 * (humidity - 40) if material == "DYE_LTH" and humidity > 40 else 0
+        layer_penalty = 2 * (layers - 1) ** 1.5 if layers > 1 else 0
+        measured_snr = (physics_snr - density_penalty - humidity_penalty - layer_penalty
+                        + (2.5 if prml else 0) + (1.5 if ctc else 0) + np.random.normal(0, 0.15))
+        rows.append([wl, NA, spot, track_pitch, layers, spacing, isi, crosstalk, material,
+                     thermal_k, activation, temp, humidity, prml, ctc,
+                     physics_snr, max(measured_snr, 1.0), thermal_f])
+    return pd.DataFrame(rows, columns=gen.columns)
+
+
+def test_vectorized_generator_matches_legacy_distribution():
+    n = 6000
+    legacy = legacy_samples(n)
+    vectorized = gen.generate_chunk(n, np.random.SeedSequence(7))
+
+    assert list(vectorized.columns) == gen.columns
+    for name in ["laser_wavelength_nm", "layer_count", "recording_material", "prml_enabled", "ctc_enabled"]:
+        table = pd.crosstab(
+            np.r_[np.zeros(n), np.ones(n)],
+            pd.concat([legacy[name], vectorized[name]], ignore_index=True)
+        )
+        assert stats.chi2_contingency(table).pvalue > 1e-3, name
+    for name in gen.columns:
+        if name in {"recording_material"}:
+            continue
+        assert stats.ks_2samp(legacy[name], vectorized[name]).pvalue > 1e-3, name
+
+    # Per-material ranges and the SNR floor hold row by row
+    for material, (lo, hi) in gen.thermal_k_range.items():
+        rows = vectorized[vectorized["recording_material"] == material]
+        assert rows["thermal_conductivity_w_mk"].between(lo, hi).all()
+    assert (vectorized["measured_snr_db"] >= 1.0).all()
+
+
+def test_output_is_independent_of_worker_count(tmp_path):
+    paths = []
+    for workers in [1, 2]:
+        path = tmp_path / f"dataset_{workers}.csv"
+        gen.generate_dataset(2500, str(path), seed=3, chunk_size=1000, workers=workers)
+        paths.append(path)
+
+    single, parallel = (path.read_bytes() for path in paths)
+    assert single == parallel
+    frame = pd.read_csv(paths[0])
+    assert len(frame) == 2500 and list(frame.columns) == gen.columns
+    # Chunks use distinct seed streams
+    assert not np.array_equal(frame["numerical_aperture"][:1000], frame["numerical_aperture"][1000:2000])
+
+
+if __name__ == "__main__":
+    test_vectorized_generator_matches_legacy_distribution()
+    print("Dataset generator checks passed.")
+
+    n = 20000
+    start = time.perf_counter()
+    legacy_samples(n)
+    legacy_s = time.perf_counter() - start
+    start = time.perf_counter()
+    gen.generate_chunk(n, np.random.SeedSequence(0))
+    vectorized_s = time.perf_counter() - start
+    print(f"{n} rows | legacy loop {legacy_s:6.2f} s | vectorized {vectorized_s * 1e3:6.1f} ms")
@@ -0,0 +1,134 @@
+import os
+import subprocess
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import generate_osis_dataset as gen
+from dataset_store import (ENGINEERED_COLUMNS, RAW_COLUMNS, DatasetStore, DatasetWriter,
+                           export_csv, import_csv, iter_dataset, load_dataset)
+
+
+@pytest.fixture
+def store_dir(tmp_path):
+    root = str(tmp_path / "store")
+    gen.generate_store(2500, root, seed=5, chunk_size=1000, workers=1)
+    return root
+
+
+def test_store_round_trips_generated_rows(store_dir):
+    store = DatasetStore(store_dir)
+    assert len(store) == 2500
+    assert store.columns == list(RAW_COLUMNS) + list(ENGINEERED_COLUMNS)
+
+    expected = pd.concat([gen.generate_chunk(n, seed) for n, seed in gen.chunk_seeds(2500, 5, 1000)],
+                         ignore_index=True)
+    stored = store.read(list(RAW_COLUMNS))
+    for name in RAW_COLUMNS:
+        np.testing.assert_array_equal(stored[name], expected[name].to_numpy())
+
+
+def test_projection_and_row_range(store_dir):
+    store = DatasetStore(store_dir)
+    full = store.read(["NA_sq", "recording_material"])
+    part = store.read(["NA_sq", "recording_material"], start=1200, stop=1300)
+
+    assert list(part) == ["NA_sq", "recording_material"]
+    np.testing.assert_array_equal(part["NA_sq"], full["NA_sq"][1200:1300])
+    np.testing.assert_array_equal(part["recording_material"], full["recording_material"][1200:1300])
+    assert set(full["recording_material"]) <= {"GST_HTL", "DYE_LTH", "MDISC"}
+
+    chunks = list(store.iter_chunks(["temperature_c"], chunk_rows=1000))
+    assert [len(chunk["temperature_c"]) for chunk in chunks] == [1000, 1000, 500]
+
+
+def test_csv_import_export_and_load_dataset(store_dir, tmp_path):
+    csv_path = str(tmp_path / "dataset.csv")
+    export_csv(store_dir, csv_path)
+    reimported = import_csv(csv_path, str(tmp_path / "reimported"))
+    original = DatasetStore(store_dir)
+    for name in original.columns:
+        np.testing.assert_array_equal(reimported.column(name), original.column(name))
+
+    columns = ["numerical_aperture", "spot_div_pitch", "recording_material_MDISC", "measured_snr_db"]
+    from_store = load_dataset(columns, root=str(tmp_path / "reimported"), csv_path=csv_path)
+    from_csv = load_dataset(columns, root=str(tmp_path / "missing"), csv_path=csv_path)
+    assert list(from_store.columns) == list(from_csv.columns) == columns
+    np.testing.assert_allclose(from_store.to_numpy(dtype=float), from_csv.to_numpy(dtype=float), rtol=1e-15)
+
+
+
+def test_newer_csv_takes_precedence_over_stale_store(store_dir, tmp_path):
+    csv_path = str(tmp_path / "dataset.csv")
+    gen.generate_chunk(300, 9).to_csv(csv_path, index=False)
+    schema_mtime = os.path.getmtime(os.path.join(store_dir, "schema.json"))
+    os.utime(csv_path, (schema_mtime + 10, schema_mtime + 10))
+
+    with pytest.warns(UserWarning, match="newer than the dataset store"):
+        assert len(load_dataset(["numerical_aperture"], root=store_dir, csv_path=csv_path)) == 300
+    with pytest.warns(UserWarning, match="newer than the dataset store"):
+        assert sum(len(chunk["numerical_aperture"])
+                   for chunk in iter_dataset(["numerical_aperture"], root=store_dir, csv_path=csv_path)) == 300
+
+    os.utime(csv_path, (schema_mtime - 10, schema_mtime - 10))
+    assert len(load_dataset(["numerical_aperture"], root=store_dir, csv_path=csv_path)) == 2500
+
+def test_failed_write_leaves_no_store(tmp_path):
+    root = str(tmp_path / "store")
+    with pytest.raises(ValueError):
+        with DatasetWriter(root, 10) as writer:
+            writer.append(gen.generate_chunk(5, 0))  # closes with 5 of 10 rows
+    assert not os.path.exists(root) and not os.path.exists(root + ".partial")
+
+
+# Columns train_model.load_data asks for
+TRAINING_COLUMNS = [
+    "laser_wavelength_nm", "numerical_aperture", "track_pitch_nm", "layer_count", "layer_spacing_nm",
+    "temperature_c", "relative_humidity", "prml_enabled", "ctc_enabled", "thermal_conductivity_w_mk",
+    "activation_energy_ev", "spot_size_nm", "isi_factor", "crosstalk_factor", "thermal_factor",
+    "physics_snr_db", "NA_sq", "wavelength_div_NA", "spot_div_pitch", "temp_x_humidity",
+    "recording_material_GST_HTL", "recording_material_MDISC", "measured_snr_db"
+]
+
+LOAD_TEMPLATE = """
+import re, sys, time
+import pandas as pd
+from dataset_store import engineer_columns, load_dataset
+columns = sys.argv[1].split(",")
+start = time.perf_counter()
+{load}
+# VmHWM is this process's own peak; ru_maxrss also counts the forking parent
+print(time.perf_counter() - start, re.search(r"VmHWM:\\s+(\\d+)", open("/proc/self/status").read()).group(1))
+"""
+
+# What train_model.load_data did before: parse everything, then engineer
+LOAD_CSV = LOAD_TEMPLATE.format(load="""
+df = pd.read_csv("osis_dataset.csv")
+for name, values in engineer_columns(df).items():
+    df[name] = values
+df = df[columns]""")
+
+LOAD_STORE = LOAD_TEMPLATE.format(load="""
+df = load_dataset(columns)""")
+
+
+if __name__ == "__main__":
+    import tempfile
+
+    # Load time and peak RSS: full CSV parse + feature engineering vs the
+    # projected training columns from the store (OSIS_BENCH_ROWS rows)
+    n_rows = int(os.environ.get("OSIS_BENCH_ROWS", "2000000"))
+    here = os.path.dirname(os.path.abspath(__file__))
+    with tempfile.TemporaryDirectory() as tmp:
+        csv_path = os.path.join(tmp, "osis_dataset.csv")
+        gen.generate_dataset(n_rows, csv_path, workers=1)
+        gen.generate_store(n_rows, os.path.join(tmp, "osis_dataset"), workers=1)
+
+        env = dict(os.environ, PYTHONPATH=here)
+        for label, script in [("csv", LOAD_CSV), ("store", LOAD_STORE)]:
+            command = [sys.executable, "-c", script, ",".join(TRAINING_COLUMNS)]
+            output = subprocess.run(command, cwd=tmp, env=env, check=True, capture_output=True, text=True).stdout
+            seconds, rss_kb = output.split()[-2:]
+            print(f"{n_rows} rows | {label:<5} | load {float(seconds):6.2f} s | peak RSS {int(rss_kb) / 1024:7.0f} MB")
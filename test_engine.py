@@ -0,0 +1,83 @@
+import time
+
+import joblib
+import numpy as np
+
+from tree_engine import FusedEnsemble, compile_model
+
+FEATURE_COUNT = len(joblib.load("osis_features.pkl"))
+
+
+def random_feature_matrix(n_rows, seed=0):
+    """
+    Rows spanning the training ranges; exact values only matter for coverage.
+    """
+    rng = np.random.default_rng(seed)
+    reference = joblib.load("osis_shap_background.pkl").to_numpy(dtype=np.float64)
+    low, high = reference.min(axis=0), reference.max(axis=0)
+    span = np.where(high > low, high - low, 1.0)
+    return low - 0.1 * span + rng.random((n_rows, FEATURE_COUNT)) * 1.2 * span
+
+
+def test_compiled_models_match_sklearn():
+    X = random_feature_matrix(5000)
+    for path in ["osis_snr_model.pkl", "osis_snr_model_lower.pkl", "osis_snr_model_upper.pkl"]:
+        estimator = joblib.load(path)
+        compiled = compile_model(estimator)
+        np.testing.assert_allclose(compiled.predict(X), estimator.predict(X), rtol=0, atol=1e-9)
+
+
+def test_single_row_matches_sklearn():
+    estimator = joblib.load("osis_snr_model.pkl")
+    compiled = compile_model(estimator)
+    row = random_feature_matrix(1, seed=1)
+    assert abs(compiled.predict(row)[0] - estimator.predict(row)[0]) < 1e-9
+
+
+def test_hist_gradient_boosting_matches_sklearn():
+    from sklearn.ensemble import HistGradientBoostingRegressor
+
+    X = random_feature_matrix(4000, seed=2)
+    y = np.sin(X[:, 1]) + 0.01 * X[:, 0] - X[:, 3] * X[:, 4] / (1 + np.abs(X[:, 3]))
+    X_new = random_feature_matrix(3000, seed=3)
+    for estimator in [
+        HistGradientBoostingRegressor(max_iter=80, max_leaf_nodes=31, random_state=0),
+        HistGradientBoostingRegressor(max_iter=40, loss="quantile", quantile=0.95, random_state=0)
+    ]:
+        estimator.fit(X, y)
+        np.testing.assert_allclose(compile_model(estimator).predict(X_new), estimator.predict(X_new),
+                                   rtol=0, atol=1e-9)
+
+
+def test_fused_ensemble_matches_separate_models():
+    compiled = {
+        name: compile_model(joblib.load(path))
+        for name, path in [("residual", "osis_snr_model.pkl"), ("lower", "osis_snr_model_lower.pkl"),
+                           ("upper", "osis_snr_model_upper.pkl")]
+    }
+    fused = FusedEnsemble(compiled)
+    for X in [random_feature_matrix(1, seed=4), random_feature_matrix(3000, seed=5)]:
+        predictions = fused.predict(X)
+        for name, model in compiled.items():
+            np.testing.assert_allclose(predictions[name], model.predict(X), rtol=0, atol=1e-12)
+
+
+if __name__ == "__main__":
+    test_compiled_models_match_sklearn()
+    test_single_row_matches_sklearn()
+    test_hist_gradient_boosting_matches_sklearn()
+    test_fused_ensemble_matches_separate_models()
+    print("Parity checks passed.")
+
+    estimator = joblib.load("osis_snr_model.pkl")
+    compiled = compile_model(estimator)
+
+    for n_rows in [1, 100_000]:
+        X = random_feature_matrix(n_rows)
+        repeats = 200 if n_rows == 1 else 3
+        for label, predict in [("sklearn", estimator.predict), ("compiled", compiled.predict)]:
+            start = time.perf_counter()
+            for _ in range(repeats):
+                predict(X)
+            elapsed = (time.perf_counter() - start) / repeats
+            print(f"{label:>9} | rows={n_rows:>7} | {elapsed * 1e3:9.3f} ms | {n_rows / elapsed:12.0f} rows/s")
@@ -0,0 +1,52 @@
+from fastapi.testclient import TestClient
+
+import main
+from sample_configs import BASE_CONFIG
+
+client = TestClient(main.app)
+
+CONFIG = dict(BASE_CONFIG, temperature_c=41.5, relative_humidity=37.0, recording_material="MDISC")
+SIMULATION = {"sweep_parameter": "temperature_c", "start": 20, "end": 80, "steps": 12}
+
+
+def post(path, body):
+    response = client.post(path, json=body)
+    assert response.status_code == 200
+    return response.json()
+
+
+def test_every_panel_matches_its_single_endpoint():
+    evaluation = post("/evaluate", {
+        "base_config": CONFIG, "modulation": "BPSK", "measured_snr_db": 18.0, "top_k": 3,
+        "delta_fraction": 0.1, "simulation": SIMULATION
+    })
+
+    snr = post("/predict_snr?explain=1", CONFIG)
+    assert "shap_explanations" in snr
+    assert {name: evaluation["snr"][name] for name in snr} == snr
+    assert evaluation["snr"]["snr_lower_bound_db"] <= evaluation["snr"]["snr_upper_bound_db"]
+    assert evaluation["ber"] == post("/predict_ber", dict(CONFIG, modulation="BPSK"))
+    assert evaluation["comparison"] == post("/compare_models",
+                                            dict(CONFIG, modulation="BPSK", measured_snr_db=18.0))
+    assert evaluation["optimization"] == post("/optimize_parameters",
+                                              {"base_config": CONFIG, "modulation": "BPSK", "top_k": 3})
+    assert evaluation["sensitivity"] == post("/sensitivity_analysis",
+                                             dict(CONFIG, modulation="BPSK", delta_fraction=0.1))
+    assert evaluation["simulation"] == post("/simulate_dashboard",
+                                            {"base_config": CONFIG, "modulation": "BPSK", **SIMULATION})
+
+
+def test_without_simulation_or_explanations():
+    evaluation = post("/evaluate", {"base_config": CONFIG, "explain": False})
+    assert "simulation" not in evaluation
+    assert evaluation["snr"] == dict(post("/predict_snr", CONFIG), **{
+        name: evaluation["snr"][name] for name in ["snr_lower_bound_db", "snr_upper_bound_db"]})
+
+    unsupported = post("/evaluate", {"base_config": CONFIG, "simulation": dict(SIMULATION, sweep_parameter="x")})
+    assert "error" in unsupported["simulation"]
+
+
+if __name__ == "__main__":
+    test_every_panel_matches_its_single_endpoint()
+    test_without_simulation_or_explanations()
+    print("Evaluate checks passed.")
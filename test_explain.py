@@ -0,0 +1,55 @@
+from fastapi.testclient import TestClient
+
+import main
+from sample_configs import BASE_CONFIG, random_configs
+
+client = TestClient(main.app)
+
+CONFIG = dict(BASE_CONFIG, temperature_c=52.5, relative_humidity=71.0)
+ENDPOINTS = [
+    ("/predict_snr", CONFIG),
+    ("/predict_ber", dict(CONFIG, modulation="QPSK")),
+    ("/compare_models", dict(CONFIG, measured_snr_db=20.0))
+]
+
+
+def test_shap_only_on_request_and_equal_to_explain_endpoint():
+    expected = client.post("/explain", json={"configs": [CONFIG]}).json()["explanations"][0]
+    assert len(expected) == 5
+
+    for path, body in ENDPOINTS:
+        explained = client.post(f"{path}?explain=1", json=body).json()
+        assert explained["shap_explanations"] == expected
+        # The explanation is cached apart from the prediction
+        assert "shap_explanations" not in client.post(path, json=body).json()
+        assert "shap_explanations" not in client.post(f"{path}?explain=0", json=body).json()
+
+
+def test_batch_explanations_match_single_rows():
+    configs = random_configs(6, seed=8)
+    response = client.post("/explain", json={"configs": configs, "top_n": 3}).json()
+    assert response["top_n"] == 3
+    assert response["explanations"] == [main.explain_configs([config], top_n=3)[0] for config in configs]
+    assert client.post("/explain", json={"configs": configs[:1], "top_n": 10_000}).json()["top_n"] == main.N_FEATURES
+
+
+def test_explanation_cache_key():
+    config = dict(CONFIG, layer_count=2)
+    canonical = main.standardize_physical_inputs(config)
+    shap_key = main.prediction_cache.make_key(canonical, "shap")
+    assert shap_key != main.prediction_cache.make_key(canonical, main.ber_snr_divisor("OOK-NRZ"))
+
+    explained = client.post("/predict_snr?explain=1", json=config).json()["shap_explanations"]
+    assert main.prediction_cache.get(shap_key) == explained
+    # Client-sent derived terms do not split the entry
+    hits = main.prediction_cache.stats()["hits"]
+    again = client.post("/predict_snr?explain=1", json=dict(config, isi_factor=0.5)).json()
+    assert again["shap_explanations"] == explained
+    assert main.prediction_cache.stats()["hits"] - hits == 2  # prediction and explanation
+
+
+if __name__ == "__main__":
+    test_shap_only_on_request_and_equal_to_explain_endpoint()
+    test_batch_explanations_match_single_rows()
+    test_explanation_cache_key()
+    print("Explanation checks passed.")
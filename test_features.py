@@ -0,0 +1,153 @@
+import time
+
+import numpy as np
+
+import main
+from sample_configs import BASE_CONFIG, random_configs
+
+
+def test_feature_vector_matches_dataframe_path():
+    for config in random_configs(200):
+        physics_df, df = main.build_model_features(config)
+        physics_vec, X = main.build_feature_vector(config)
+
+        assert physics_df == physics_vec
+        np.testing.assert_array_equal(X, df.to_numpy(dtype=np.float64))
+
+
+def test_feature_vector_predictions_match_dataframe_path():
+    for config in random_configs(50, seed=1):
+        _, df = main.build_model_features(config)
+        _, X = main.build_feature_vector(config)
+
+        assert abs(main.model.predict(df)[0] - main.engine.predict(X)[0]) < 1e-9
+
+
+def test_batch_features_match_single_row_path():
+    configs = random_configs(100, seed=2)
+    physics, X = main.build_batch_features(configs)
+    for i, config in enumerate(configs):
+        physics_row, X_row = main.build_feature_vector(config)
+        np.testing.assert_allclose(physics[i], physics_row, rtol=1e-12)
+        np.testing.assert_allclose(X[i], X_row[0], rtol=1e-12)
+
+
+def test_grid_features_match_candidate_dicts():
+    base = main.standardize_physical_inputs(BASE_CONFIG)
+    axes = main.optimization_grid_axes(base)
+    physics_grid, X_grid = main.build_grid_features(base, axes)
+    physics_dict, X_dict = main.build_batch_features(main.build_optimization_candidates(BASE_CONFIG))
+
+    np.testing.assert_array_equal(physics_grid, physics_dict)
+    np.testing.assert_array_equal(X_grid, X_dict)
+
+
+def test_grid_optimization_matches_dict_ranking():
+    for config in random_configs(5, seed=3):
+        candidates = main.build_optimization_candidates(config)
+        expected = main.rank_optimization(
+            candidates, main.predict_batch_metrics(candidates), "OOK-NRZ", 10
+        )
+        result = main.run_grid_optimization(config, "OOK-NRZ", 10)
+
+        assert result["evaluated_candidates"] == expected["evaluated_candidates"]
+        assert result["top_recommendations"] == expected["top_recommendations"]
+
+
+def test_batch_bounds_match_full_metrics():
+    configs = random_configs(40, seed=4)
+    batch = main.predict_batch_metrics(configs, bounds=True)
+    for config, metrics in zip(configs, batch):
+        expected = main.compute_full_metrics(config)
+        for field in ["predicted_snr_db", "snr_lower_bound_db", "snr_upper_bound_db"]:
+            assert abs(metrics[field] - expected[field]) < 1e-9
+        assert metrics["ber_upper_bound"] == main.estimate_ber_from_snr(metrics["snr_lower_bound_db"])
+        assert metrics["ber_lower_bound"] <= metrics["estimated_ber"] <= metrics["ber_upper_bound"]
+
+
+def test_worst_case_grid_ranking_matches_dict_ranking():
+    config = random_configs(1, seed=5)[0]
+    candidates = main.build_optimization_candidates(config)
+    metrics = main.predict_batch_metrics(candidates, bounds=True)
+    expected = main.rank_optimization(candidates, metrics, "OOK-NRZ", 10, rank_by="worst_case")
+    result = main.run_grid_optimization(config, "OOK-NRZ", 10, rank_by="worst_case")
+
+    assert result["rank_by"] == "worst_case"
+    assert result["top_recommendations"] == expected["top_recommendations"]
+    best = result["top_recommendations"][0]
+    assert best["objective_score"] == main.optimization_objective_arrays(
+        np.array([best["snr_lower_bound_db"]]), np.array([best["ber_upper_bound"]]))[0]
+
+
+BER_MODULATIONS = ["OOK-NRZ", "BPSK", "QPSK", " qpsk ", "NRZI"]  # last one falls back to OOK-NRZ
+
+
+def test_ber_array_matches_scalar_kernel():
+    snr_db = np.concatenate([np.linspace(-40, 40, 801), [-300.0, 300.0]])
+    for modulation in BER_MODULATIONS:
+        expected = [main.estimate_ber_from_snr(float(snr), modulation=modulation) for snr in snr_db]
+        np.testing.assert_allclose(main.estimate_ber_array(snr_db, modulation=modulation), expected,
+                                   rtol=1e-12, atol=0)
+
+
+def test_ber_table_max_error():
+    probe = np.linspace(-45, 45, 300 * 301)
+    for modulation in BER_MODULATIONS:
+        table = main.get_ber_table(modulation)
+        assert table.max_rel_error < 2.1e-5
+        exact = main.estimate_ber_array(probe, modulation=modulation)
+        approx = main.estimate_ber_array(probe.reshape(300, -1), modulation=modulation, use_table=True)
+        assert approx.shape == (300, 301)
+        assert np.max(np.abs(approx.ravel() - exact) / exact) < 2.1e-5
+        # Outside the table range the exact kernel is used
+        outside = np.abs(probe) > 30
+        np.testing.assert_array_equal(approx.ravel()[outside], exact[outside])
+
+
+def _time_per_call(fn, repeats):
+    fn()
+    start = time.perf_counter()
+    for _ in range(repeats):
+        fn()
+    return (time.perf_counter() - start) / repeats * 1e6
+
+
+if __name__ == "__main__":
+    test_feature_vector_matches_dataframe_path()
+    test_feature_vector_predictions_match_dataframe_path()
+    test_batch_features_match_single_row_path()
+    test_grid_features_match_candidate_dicts()
+    test_grid_optimization_matches_dict_ranking()
+    test_ber_array_matches_scalar_kernel()
+    test_ber_table_max_error()
+    print("Parity checks passed.")
+
+    def before():
+        _, df = main.build_model_features(BASE_CONFIG)
+        main.model.predict(df)
+        main.model_lower.predict(df)
+        main.model_upper.predict(df)
+
+    def after():
+        _, X = main.build_feature_vector(BASE_CONFIG)
+        main.engine.predict(X)
+        main.engine_lower.predict(X)
+        main.engine_upper.predict(X)
+
+    def grid_dicts():
+        candidates = main.build_optimization_candidates(BASE_CONFIG)
+        main.rank_optimization(candidates, main.predict_batch_metrics(candidates), "OOK-NRZ", 5)
+
+    def grid_arrays():
+        main.run_grid_optimization(BASE_CONFIG, "OOK-NRZ", 5)
+
+    rows = [
+        ("features (DataFrame + reindex)", lambda: main.build_model_features(BASE_CONFIG), 2000),
+        ("features (NumPy vector)", lambda: main.build_feature_vector(BASE_CONFIG), 20000),
+        ("features + 3 models (before)", before, 200),
+        ("features + 3 models (after)", after, 2000),
+        ("optimizer grid (dicts)", grid_dicts, 10),
+        ("optimizer grid (arrays)", grid_arrays, 10),
+    ]
+    for label, fn, repeats in rows:
+        print(f"{label:<32} {_time_per_call(fn, repeats):10.1f} us/request")
@@ -0,0 +1,165 @@
+import time
+
+import numpy as np
+from fastapi.testclient import TestClient
+
+import main
+from feedback import MEASURED, FeedbackBuffer, FeedbackLoop
+from sample_configs import BASE_CONFIG
+
+client = TestClient(main.app)
+
+
+def test_buffer_keeps_last_rows_and_reopens(tmp_path):
+    buffer = FeedbackBuffer(str(tmp_path), ["a", "b"], capacity=5)
+    for seqs in [range(3), range(3, 8)]:
+        X = np.array([[seq, -seq] for seq in seqs], dtype=float)
+        buffer.append(X, 0.0, np.asarray(seqs, dtype=float), 0.0)
+
+    first, X, targets = buffer.since(0)
+    assert (first, len(buffer), buffer.appended) == (3, 5, 8)
+    np.testing.assert_array_equal(X[:, 0], [3, 4, 5, 6, 7])
+    np.testing.assert_array_equal(targets[:, MEASURED], [3, 4, 5, 6, 7])
+    assert buffer.since(6)[1][:, 0].tolist() == [6, 7]
+
+    buffer.sync()
+    reopened = FeedbackBuffer(str(tmp_path), ["a", "b"], capacity=5)
+    np.testing.assert_array_equal(reopened.since(0)[1], X)
+    assert FeedbackBuffer(str(tmp_path), ["a", "b"], capacity=6).appended == 0
+
+
+def synthetic_rows(n, seed):
+    rng = np.random.default_rng(seed)
+    X = rng.uniform(0, 1, (n, 4))
+    physics = rng.uniform(10, 20, n)
+    return X, physics, physics + 0.5 + np.where(X[:, 0] > 0.5, 1.0, -0.5)
+
+
+def test_updates_fit_only_new_rows(tmp_path):
+    published = []
+    loop = FeedbackLoop(str(tmp_path), ["a", "b", "c", "d"], "base-1", base_predict=lambda X: np.zeros(len(X)),
+                        publish=lambda model, version, base: published.append(version), min_rows=100,
+                        stages_per_update=20, max_stages=60)
+
+    X, physics, measured = synthetic_rows(600, 0)
+    loop.ingest(X, physics, measured, physics)
+    first = loop.run_update()
+    assert first["rows"] == 600 and first["stages"] == 20 and not first["refit"]
+    assert first["rmse_after_db"] < 0.5 * first["rmse_before_db"]
+
+    X, physics, measured = synthetic_rows(300, 1)
+    loop.ingest(X, physics, measured, physics)
+    second = loop.run_update()
+    assert second["rows"] == 300 and second["stages"] == 40
+    assert second["rmse_before_db"] < first["rmse_before_db"]  # the correction already helps on new rows
+
+    loop.ingest(*synthetic_rows(10, 2)[:1], 0.0, 0.0, 0.0)
+    assert loop.run_update() is None  # below min_rows
+    loop.ingest(*synthetic_rows(200, 3)[:1], 0.0, 0.0, 0.0)
+    loop.corrector.max_stages = 40
+    refit = loop.run_update()
+    assert refit["refit"] and refit["rows"] == 1110 and refit["stages"] == 20
+    assert published == ["fb1", "fb2", "fb3"]
+
+    # A restart restores the correction only for the same base model
+    loop.stop()
+    restored = []
+    FeedbackLoop(str(tmp_path), ["a", "b", "c", "d"], "base-1", base_predict=None,
+                 publish=lambda model, version, base: restored.append(version)).buffer
+    FeedbackLoop(str(tmp_path), ["a", "b", "c", "d"], "base-2", base_predict=None,
+                 publish=lambda model, version, base: restored.append(version)).buffer
+    assert restored == ["fb3"]
+
+
+def test_rows_ingested_during_an_update_are_kept_for_the_next(tmp_path):
+    late = synthetic_rows(150, 5)
+
+    def base_predict(X):
+        # Runs between `since()` and the fit, like a concurrent ingest
+        if loop.buffer.appended == 400:
+            loop.ingest(late[0], late[1], late[2], late[1])
+        return np.zeros(len(X))
+
+    loop = FeedbackLoop(str(tmp_path), ["a", "b", "c", "d"], "base-1", base_predict=base_predict,
+                        publish=lambda model, version, base: None, min_rows=100)
+    X, physics, measured = synthetic_rows(400, 4)
+    loop.ingest(X, physics, measured, physics)
+    assert loop.run_update()["rows"] == 400
+    assert loop.corrector.seen == 400 and loop.stats()["pending_rows"] == 150
+
+    second = loop.run_update()
+    assert second["rows"] == 150 and loop.corrector.seen == 550
+
+
+def test_feedback_endpoints_correct_served_predictions(tmp_path, monkeypatch):
+    assert "error" in client.post("/feedback", json={"samples": []}).json()
+
+    loop = FeedbackLoop(str(tmp_path), main.feature_columns, main.MODEL_VERSION,
+                        base_predict=lambda X: main.engine.predict(X), publish=main.publish_correction,
+                        min_rows=1)
+    monkeypatch.setattr(main, "feedback", loop)
+    configs = [dict(BASE_CONFIG, temperature_c=float(t), relative_humidity=float(h))
+               for t in np.linspace(20, 80, 30) for h in np.linspace(10, 90, 10)]
+    served = [row["predicted_snr_db"] for row in main.predict_batch_metrics(configs)]
+    probe = configs[123]
+    before = client.post("/predict_snr", json=probe).json()["predicted_snr_db"]
+
+    try:
+        # Every measurement sits 2 dB above the served prediction
+        samples = [dict(config, measured_snr_db=snr + 2.0) for config, snr in zip(configs, served)]
+        assert client.post("/feedback", json={"samples": samples}).json()["accepted"] == 300
+        client.post("/compare_models", json=dict(probe, measured_snr_db=served[123] + 2.0))
+        stats = client.get("/feedback_stats").json()
+        assert stats["appended_rows"] == 301 and stats["pending_rows"] == 301
+        assert abs(stats["drift"]["served_bias_db"] - 2.0) < 0.01
+
+        update = client.post("/feedback/update").json()
+        assert update["updated"] and update["update"]["rows"] == 301
+        after = client.post("/predict_snr", json=probe).json()["predicted_snr_db"]
+        assert 1.5 < after - before < 2.1
+        assert client.get("/feedback_stats").json()["correction_version"] == "fb1"
+    finally:
+        main.publish_correction(None, None, main.model_registry.current.version)
+
+
+def test_update_racing_a_swap_keeps_its_base_version(tmp_path):
+    current = main.model_registry.current.version
+    loop = FeedbackLoop(str(tmp_path), main.feature_columns, "retired-base",
+                        base_predict=lambda X: main.engine.predict(X), publish=main.publish_correction,
+                        min_rows=1)
+    _, X = main.build_batch_features([dict(BASE_CONFIG, temperature_c=float(t)) for t in range(20, 70)])
+    physics = np.full(len(X), 15.0)
+    loop.ingest(X, physics, physics + 1.0, physics)
+    try:
+        loop.run_update()
+        # Tagged with the base it was fitted against, so the current model
+        # does not serve it
+        assert main.residual_correction[1] == "retired-base"
+        assert main.feedback_correction(X, main.model_registry.current) == 0.0
+        assert main.prediction_cache.version != current
+    finally:
+        main.publish_correction(None, None, current)
+    assert main.prediction_cache.version == current
+
+
+if __name__ == "__main__":
+    import tempfile
+
+    # Update cost against the number of new rows: it should track the new
+    # data, not the rows already folded in
+    with tempfile.TemporaryDirectory() as tmp:
+        loop = FeedbackLoop(tmp, main.feature_columns, main.MODEL_VERSION,
+                            base_predict=lambda X: main.engine.predict(X), publish=lambda *args: None,
+                            capacity=1_000_000, min_rows=1, max_stages=10_000)
+        rng = np.random.default_rng(0)
+        reference = main.build_batch_features([BASE_CONFIG])[1]
+        for n_rows in [1_000, 10_000, 100_000, 10_000]:
+            X = reference * rng.uniform(0.9, 1.1, (n_rows, reference.shape[1]))
+            physics = rng.uniform(10, 20, n_rows)
+            measured = physics + main.engine.predict(X) + 1.0
+            start = time.perf_counter()
+            loop.ingest(X, physics, measured, physics)
+            ingest_s = time.perf_counter() - start
+            record = loop.run_update()
+            print(f"{n_rows:>7} new rows (buffer {loop.buffer.appended:>7}) | ingest {ingest_s * 1e3:7.1f} ms | "
+                  f"update {record['seconds']:6.2f} s | stages {record['stages']}")
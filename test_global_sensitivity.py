@@ -0,0 +1,64 @@
+import time
+
+import numpy as np
+
+from global_sensitivity import saltelli_design, sobol_indices
+
+# Ishigami function (a=7, b=0.1) on [-pi, pi]^3 and its analytical indices
+ISHIGAMI_FIRST = np.array([0.3139, 0.4424, 0.0])
+ISHIGAMI_TOTAL = np.array([0.5576, 0.4424, 0.2437])
+
+
+def ishigami(X):
+    return np.sin(X[:, 0]) + 7 * np.sin(X[:, 1]) ** 2 + 0.1 * X[:, 2] ** 4 * np.sin(X[:, 0])
+
+
+def test_design_layout():
+    design = saltelli_design([0, 10, 100], [1, 20, 200], 1000, seed=3)
+    n = 1024  # rounded up to a power of two
+    assert design.shape == (n * 5, 3)
+    A, B = design[:n], design[n:2 * n]
+    for i in range(3):
+        AB = design[(2 + i) * n:(3 + i) * n]
+        np.testing.assert_array_equal(AB[:, i], B[:, i])
+        np.testing.assert_array_equal(np.delete(AB, i, axis=1), np.delete(A, i, axis=1))
+    assert design.min(axis=0).tolist() >= [0, 10, 100]
+    assert design.max(axis=0).tolist() <= [1, 20, 200]
+
+
+def test_ishigami_indices():
+    lower, upper = [-np.pi] * 3, [np.pi] * 3
+    design = saltelli_design(lower, upper, 8192, seed=1)
+    result = sobol_indices(ishigami(design), 3, n_bootstrap=200, seed=1)
+
+    np.testing.assert_allclose(result["first_order"], ISHIGAMI_FIRST, atol=0.03)
+    np.testing.assert_allclose(result["total_order"], ISHIGAMI_TOTAL, atol=0.03)
+    for key, estimate in [("first_order_ci", result["first_order"]), ("total_order_ci", result["total_order"])]:
+        ci = result[key]
+        assert np.all(ci[:, 0] <= estimate) and np.all(estimate <= ci[:, 1])
+
+
+def test_constant_output_has_zero_indices():
+    design = saltelli_design([0, 0], [1, 1], 256)
+    result = sobol_indices(np.full(len(design), 3.0), 2, n_bootstrap=50)
+    np.testing.assert_array_equal(result["first_order"], 0.0)
+    np.testing.assert_array_equal(result["total_order"], 0.0)
+
+
+if __name__ == "__main__":
+    test_design_layout()
+    test_ishigami_indices()
+    test_constant_output_has_zero_indices()
+    print("Sobol checks passed.")
+
+    import main
+    from sample_configs import BASE_CONFIG
+
+    for n_samples, n_bootstrap in [(4096, 200), (32768, 1000)]:
+        start = time.perf_counter()
+        result = main.run_global_sensitivity(
+            BASE_CONFIG, "OOK-NRZ", list(main.GLOBAL_SENSITIVITY_RANGES), "snr",
+            n_samples, n_bootstrap, 0.95
+        )
+        elapsed = time.perf_counter() - start
+        print(f"N={n_samples:>6} | evaluations={result['evaluations']:>7} | bootstrap={n_bootstrap:>5} | {elapsed:6.2f} s")
@@ -0,0 +1,79 @@
+import time
+
+from fastapi.testclient import TestClient
+
+import main
+from instrumentation import Histogram, Instrumentation
+from sample_configs import BASE_CONFIG
+
+client = TestClient(main.app)
+
+
+def test_histogram_renders_cumulative_buckets():
+    histogram = Histogram("demo_seconds", "Demo.", ("stage",), (0.1, 1.0))
+    for value in [0.05, 0.5, 0.5, 5.0]:
+        histogram.observe(("a",), value)
+
+    lines = list(histogram.render())
+    assert 'demo_seconds_bucket{stage="a",le="0.1"} 1' in lines
+    assert 'demo_seconds_bucket{stage="a",le="1.0"} 3' in lines
+    assert 'demo_seconds_bucket{stage="a",le="+Inf"} 4' in lines
+    assert 'demo_seconds_count{stage="a"} 4' in lines
+    assert 'demo_seconds_sum{stage="a"} 6.05' in lines
+
+
+def test_disabled_stage_records_nothing():
+    instrumentation = Instrumentation(enabled=False)
+    assert instrumentation.stage("a") is instrumentation.stage("b")
+    with instrumentation.stage("a"):
+        pass
+    instrumentation.observe_batch("batch", 10)
+    assert "stage=" not in instrumentation.render()
+
+
+def test_debug_header_returns_stage_breakdown():
+    config = dict(BASE_CONFIG, temperature_c=31.7)
+    response = client.post("/sensitivity_analysis", json=config, headers={"X-OSIS-Debug": "1"})
+    stages = dict(part.split("=") for part in response.headers["x-osis-stages"].split(";"))
+    assert {"standardize", "features", "model.residual", "ber"} <= set(stages)
+    assert all(float(ms) >= 0 for ms in stages.values())
+
+    plain = client.post("/sensitivity_analysis", json=config)
+    assert "x-osis-stages" not in plain.headers
+
+
+def test_debug_header_includes_micro_batch_stages():
+    config = dict(BASE_CONFIG, temperature_c=33.9)
+    response = client.post("/predict_snr", json=config, headers={"X-OSIS-Debug": "1"})
+    stages = dict(part.split("=") for part in response.headers["x-osis-stages"].split(";"))
+    assert {"standardize", "cache_lookup", "micro_batch", "features", "model.residual",
+            "model.quantiles", "ber"} <= set(stages)
+
+
+def test_metrics_endpoint_exposes_requests_and_stages():
+    client.post("/predict_snr", json=dict(BASE_CONFIG, relative_humidity=12.3))
+    text = client.get("/metrics").text
+
+    assert 'osis_requests_total{endpoint="/predict_snr",method="POST",status="200"}' in text
+    assert 'osis_stage_duration_seconds_count{stage="model.residual",path="micro_batch"}' in text
+    assert 'osis_batch_rows_count{path="micro_batch"}' in text
+    assert "osis_batcher_queue_depth 0" in text
+
+
+if __name__ == "__main__":
+    test_histogram_renders_cumulative_buckets()
+    test_disabled_stage_records_nothing()
+    test_debug_header_returns_stage_breakdown()
+    test_debug_header_includes_micro_batch_stages()
+    test_metrics_endpoint_exposes_requests_and_stages()
+    print("Instrumentation checks passed.")
+
+    for enabled in [False, True]:
+        stage = Instrumentation(enabled=enabled).stage
+        n = 200_000
+        start = time.perf_counter()
+        for _ in range(n):
+            with stage("model.residual"):
+                pass
+        per_stage = (time.perf_counter() - start) / n
+        print(f"stage timer {'enabled' if enabled else 'disabled':<8} | {per_stage * 1e6:6.3f} us per stage")
@@ -0,0 +1,118 @@
+import asyncio
+import time
+
+import pytest
+
+import main
+from micro_batcher import MicroBatcher
+from sample_configs import random_configs
+
+
+class Recorder:
+    def __init__(self, fail=False):
+        self.batches = []
+        self.fail = fail
+
+    def __call__(self, items):
+        self.batches.append(list(items))
+        if self.fail:
+            raise ValueError("boom")
+        return [item * 10 for item in items]
+
+
+def test_concurrent_requests_share_one_batch():
+    recorder = Recorder()
+    batcher = MicroBatcher(recorder, max_batch_size=64, max_wait_s=0.02)
+
+    async def run():
+        return await asyncio.gather(*(batcher.submit(i) for i in range(20)))
+
+    assert asyncio.run(run()) == [i * 10 for i in range(20)]
+    assert recorder.batches == [list(range(20))]
+    stats = batcher.stats()
+    assert stats["batches"] == 1 and stats["max_batch_size_seen"] == 20 and stats["queue_depth"] == 0
+
+
+def test_full_batch_is_flushed_before_the_window():
+    recorder = Recorder()
+    batcher = MicroBatcher(recorder, max_batch_size=8, max_wait_s=10.0)
+
+    async def run():
+        return await asyncio.wait_for(asyncio.gather(*(batcher.submit(i) for i in range(16))), timeout=5)
+
+    assert asyncio.run(run()) == [i * 10 for i in range(16)]
+    assert [len(batch) for batch in recorder.batches] == [8, 8]
+
+
+def test_lone_request_waits_at_most_one_window():
+    batcher = MicroBatcher(Recorder(), max_batch_size=64, max_wait_s=0.01)
+
+    async def run():
+        start = time.perf_counter()
+        result = await batcher.submit(3)
+        return result, time.perf_counter() - start
+
+    result, elapsed = asyncio.run(run())
+    assert result == 30
+    assert 0.01 <= elapsed < 0.01 + 0.05
+
+
+def test_batch_failure_reaches_every_request():
+    batcher = MicroBatcher(Recorder(fail=True), max_batch_size=64, max_wait_s=0.005)
+
+    async def run():
+        return await asyncio.gather(*(batcher.submit(i) for i in range(3)), return_exceptions=True)
+
+    results = asyncio.run(run())
+    assert all(isinstance(result, ValueError) for result in results)
+    assert batcher.stats()["failed_batches"] == 1
+
+
+def test_close_drains_pending_and_running_batches():
+    recorder = Recorder()
+    batcher = MicroBatcher(recorder, max_batch_size=64, max_wait_s=10.0)
+
+    async def run():
+        waiting = [asyncio.ensure_future(batcher.submit(i)) for i in range(5)]
+        await asyncio.sleep(0)
+        await asyncio.wait_for(batcher.close(), timeout=5)
+        assert not batcher._tasks
+        return await asyncio.wait_for(asyncio.gather(*waiting), timeout=1)
+
+    assert asyncio.run(run()) == [i * 10 for i in range(5)]
+    assert recorder.batches == [list(range(5))]
+
+
+def test_batched_metrics_match_single_path():
+    configs = random_configs(40, seed=5)
+    modulations = ["OOK-NRZ", "BPSK"] * 20
+    batched = main.compute_full_metrics_batch(list(zip(configs, modulations)))
+    for config, modulation, metrics in zip(configs, modulations, batched):
+        expected = main.compute_full_metrics(config, modulation=modulation)
+        assert metrics.keys() == expected.keys()
+        for name in expected:
+            assert metrics[name] == pytest.approx(expected[name], rel=1e-9, abs=1e-12)
+
+
+if __name__ == "__main__":
+    test_concurrent_requests_share_one_batch()
+    test_full_batch_is_flushed_before_the_window()
+    test_lone_request_waits_at_most_one_window()
+    test_batch_failure_reaches_every_request()
+    test_close_drains_pending_and_running_batches()
+    test_batched_metrics_match_single_path()
+    print("Micro-batcher checks passed.")
+
+    # Throughput for 2000 concurrent single-config requests
+    configs = random_configs(2000, seed=9)
+    for label, window in [("unbatched", 0.0), ("batched 2ms", 0.002)]:
+        batcher = MicroBatcher(main.compute_full_metrics_batch, max_batch_size=64, max_wait_s=window)
+
+        async def run():
+            return await asyncio.gather(*(batcher.submit((config, "OOK-NRZ")) for config in configs))
+
+        start = time.perf_counter()
+        asyncio.run(run())
+        elapsed = time.perf_counter() - start
+        stats = batcher.stats()
+        print(f"{label:<12} | {len(configs) / elapsed:8.0f} req/s | mean batch {stats['mean_batch_size']:5.1f}")
@@ -0,0 +1,94 @@
+import os
+
+import joblib
+import numpy as np
+from fastapi.testclient import TestClient
+
+import main
+from model_bundle import current_bundle_dir, export_bundle
+from model_registry import ModelRegistry, ModelSet
+from sample_configs import BASE_CONFIG
+
+client = TestClient(main.app)
+
+ARTIFACTS = {
+    "model": "osis_snr_model.pkl",
+    "model_lower": "osis_snr_model_lower.pkl",
+    "model_upper": "osis_snr_model_upper.pkl",
+    "explainer": "osis_explainer.pkl"
+}
+
+
+class Shifted:
+    def __init__(self, engine, shift):
+        self.engine = engine
+        self.shift = shift
+
+    def predict(self, X):
+        return self.engine.predict(X) + self.shift
+
+
+def shifted_set(base, shift, version):
+    engines = {name: Shifted(engine, shift) for name, engine in base.engines.items()}
+    return ModelSet(version, engines, base.feature_columns, {})
+
+
+def export_with_attachments(root):
+    estimators = {
+        "residual": joblib.load(ARTIFACTS["model"]),
+        "lower": joblib.load(ARTIFACTS["model_lower"]),
+        "upper": joblib.load(ARTIFACTS["model_upper"])
+    }
+    return export_bundle(str(root), estimators, main.feature_columns, attachments=ARTIFACTS)
+
+
+def test_bundle_with_attachments_reloads_from_current(tmp_path):
+    version = export_with_attachments(tmp_path)
+    assert set(ARTIFACTS.values()) <= set(os.listdir(tmp_path / version))
+
+    initial = main.model_registry.current
+    swaps = []
+    registry = ModelRegistry(initial, build=main.load_model_version, warm_up=main.warm_up_model_set,
+                             on_swap=lambda old, new: swaps.append((old.version, new.version)),
+                             root=str(tmp_path))
+    record = registry.check_for_update()
+    assert record["version"] == version and "error" not in record
+    assert swaps == [(initial.version, version)]
+    assert registry.check_for_update() is None  # CURRENT unchanged
+
+    loaded = registry.current
+    assert loaded.artifact_paths["model"] == os.path.join(current_bundle_dir(str(tmp_path)), ARTIFACTS["model"])
+    _, X = main.build_batch_features([BASE_CONFIG])
+    np.testing.assert_array_equal(loaded.residual.predict(X), initial.residual.predict(X))
+
+
+def test_failed_reload_keeps_serving_old_version(tmp_path):
+    initial = main.model_registry.current
+    broken = shifted_set(initial, np.nan, "broken")
+    registry = ModelRegistry(initial, build=lambda directory: broken, warm_up=main.warm_up_model_set)
+    record = registry.reload(str(tmp_path))
+    assert "non-finite" in record["error"] and registry.current is initial
+
+
+def test_swap_changes_served_version_and_pins_in_flight_requests(monkeypatch):
+    registry = main.model_registry
+    initial = registry.current
+    monkeypatch.setattr(registry, "build", lambda directory: shifted_set(initial, 1.0, "shifted"))
+    before = client.post("/predict_snr", json=BASE_CONFIG)
+    assert before.headers["x-osis-model-version"] == initial.version
+
+    try:
+        reload = client.post("/admin/reload_model", json={}).json()
+        assert reload["model_version"] == "shifted" and reload["reload"]["from_version"] == initial.version
+
+        after = client.post("/predict_snr", json=BASE_CONFIG)
+        assert after.headers["x-osis-model-version"] == "shifted"
+        assert abs(after.json()["ml_residual_db"] - before.json()["ml_residual_db"] - 1.0) < 0.011
+        assert client.get("/model_info").json()["current"]["version"] == "shifted"
+
+        # A request that started on the old version is still predicted by it
+        old, new = main.compute_full_metrics_batch([(BASE_CONFIG, "OOK-NRZ", initial), (BASE_CONFIG, "OOK-NRZ")])
+        assert abs(new["ml_residual_db"] - old["ml_residual_db"] - 1.0) < 1e-9
+    finally:
+        registry.current = initial
+        main.on_model_swap(None, initial)
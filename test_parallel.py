@@ -0,0 +1,69 @@
+import time
+
+import joblib
+import numpy as np
+import pandas as pd
+
+from parallel_backend import ParallelPredictor
+from test_engine import random_feature_matrix
+
+FEATURE_COLUMNS = joblib.load("osis_features.pkl")
+
+
+def test_sharded_predictions_match_in_process():
+    model = joblib.load("osis_snr_model.pkl")
+    predictor = ParallelPredictor("osis_snr_model.pkl", FEATURE_COLUMNS, n_workers=2, min_rows=1)
+    try:
+        X = random_feature_matrix(20_000)
+        expected = model.predict(pd.DataFrame(X, columns=FEATURE_COLUMNS))
+        np.testing.assert_array_equal(predictor.predict(X), expected)
+        # Batches smaller than one shard still work (single shard)
+        np.testing.assert_array_equal(predictor.predict(X[:10]), expected[:10])
+    finally:
+        predictor.shutdown()
+
+
+def test_threshold_and_disabled_backend():
+    predictor = ParallelPredictor("osis_snr_model.pkl", FEATURE_COLUMNS, n_workers=1, min_rows=1)
+    assert not predictor.enabled
+    assert not predictor.should_parallelize(10**6)
+
+    predictor = ParallelPredictor("osis_snr_model.pkl", FEATURE_COLUMNS, n_workers=4, min_rows=1000)
+    assert not predictor.should_parallelize(999)
+    assert predictor.should_parallelize(1000)
+
+
+def test_shutdown_falls_back_to_in_process_without_new_pool():
+    model = joblib.load("osis_snr_model.pkl")
+    predictor = ParallelPredictor("osis_snr_model.pkl", FEATURE_COLUMNS, n_workers=2, min_rows=1)
+    predictor.shutdown()
+    assert not predictor.should_parallelize(10**6)
+
+    X = random_feature_matrix(100, seed=1)
+    predictor.warm_up()
+    np.testing.assert_array_equal(predictor.predict(X), model.predict(pd.DataFrame(X, columns=FEATURE_COLUMNS)))
+    assert predictor._pool is None
+
+
+if __name__ == "__main__":
+    test_sharded_predictions_match_in_process()
+    test_threshold_and_disabled_backend()
+    test_shutdown_falls_back_to_in_process_without_new_pool()
+    print("Parallel backend checks passed.")
+
+    import os
+
+    model = joblib.load("osis_snr_model.pkl")
+    X = random_feature_matrix(500_000)
+    frame = pd.DataFrame(X, columns=FEATURE_COLUMNS)
+    start = time.perf_counter()
+    model.predict(frame)
+    print(f"in-process        | {time.perf_counter() - start:6.2f} s")
+
+    for n_workers in sorted({2, max(2, os.cpu_count() or 1)}):
+        predictor = ParallelPredictor("osis_snr_model.pkl", FEATURE_COLUMNS, n_workers=n_workers, min_rows=1)
+        predictor.warm_up(wait=True)
+        start = time.perf_counter()
+        predictor.predict(X)
+        print(f"{n_workers:>3} workers       | {time.perf_counter() - start:6.2f} s")
+        predictor.shutdown()
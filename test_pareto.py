@@ -0,0 +1,55 @@
+import time
+
+import numpy as np
+
+from pareto import crowding_distance, non_dominated_mask
+
+
+def brute_force_front(F):
+    F = np.asarray(F, dtype=np.float64)
+    mask = np.ones(len(F), dtype=bool)
+    for j in range(len(F)):
+        dominated = (F <= F[j]).all(axis=1) & (F < F[j]).any(axis=1)
+        mask[j] = not dominated.any()
+    return mask
+
+
+def test_front_matches_brute_force():
+    rng = np.random.default_rng(0)
+    for n_objectives in [1, 2, 3, 5]:
+        for trial in range(20):
+            n_points = int(rng.integers(1, 400))
+            if trial % 2:
+                # Coarse integer grid: plenty of ties and duplicate points
+                F = rng.integers(0, 5, (n_points, n_objectives)).astype(float)
+            else:
+                F = rng.random((n_points, n_objectives))
+            np.testing.assert_array_equal(non_dominated_mask(F), brute_force_front(F))
+
+
+def test_front_spans_blocks():
+    rng = np.random.default_rng(1)
+    F = rng.random((5000, 3))
+    np.testing.assert_array_equal(non_dominated_mask(F), brute_force_front(F))
+
+
+def test_crowding_distance_keeps_extremes():
+    F = np.array([[0.0, 4.0], [1.0, 2.0], [2.0, 1.5], [4.0, 0.0]])
+    distance = crowding_distance(F)
+    assert np.isinf(distance[0]) and np.isinf(distance[3])
+    assert np.all(np.isfinite(distance[1:3]))
+
+
+if __name__ == "__main__":
+    test_front_matches_brute_force()
+    test_front_spans_blocks()
+    test_crowding_distance_keeps_extremes()
+    print("Pareto checks passed.")
+
+    rng = np.random.default_rng(0)
+    for n_objectives, n_points in [(2, 1_000_000), (3, 1_000_000), (4, 200_000)]:
+        F = rng.random((n_points, n_objectives))
+        start = time.perf_counter()
+        front_size = int(non_dominated_mask(F).sum())
+        elapsed = time.perf_counter() - start
+        print(f"objectives={n_objectives} | points={n_points:>9} | front={front_size:>5} | {elapsed:6.2f} s")
@@ -0,0 +1,103 @@
+import time
+
+from fastapi.testclient import TestClient
+
+import main
+import prediction_cache
+from prediction_cache import PredictionCache
+from sample_configs import BASE_CONFIG
+
+client = TestClient(main.app)
+
+
+def key_for(cache, **overrides):
+    return cache.make_key(main.standardize_physical_inputs(dict(BASE_CONFIG, **overrides)), 2.0)
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = PredictionCache(maxsize=2, ttl_seconds=None)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    assert cache.get("a") == 1  # "b" is now the least recently used
+    cache.put("c", 3)
+
+    assert cache.get("b") is None
+    assert cache.get("a") == 1 and cache.get("c") == 3
+    stats = cache.stats()
+    assert stats["size"] == 2 and stats["evictions"] == 1
+
+
+def test_entries_expire_after_ttl(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(prediction_cache.time, "monotonic", lambda: now[0])
+    cache = PredictionCache(maxsize=8, ttl_seconds=10.0)
+    cache.put("a", 1)
+
+    now[0] += 9.9
+    assert cache.get("a") == 1
+    now[0] += 0.1
+    assert cache.get("a") is None
+    stats = cache.stats()
+    assert stats["expirations"] == 1 and stats["size"] == 0 and stats["misses"] == 1
+
+
+def test_quantized_keys_share_an_entry():
+    exact = PredictionCache()
+    quantized = PredictionCache(quantize_decimals=3)
+    first = dict(temperature_c=25.00001)
+    second = dict(temperature_c=25.00004)
+
+    assert key_for(exact, **first) != key_for(exact, **second)
+    assert key_for(quantized, **first) == key_for(quantized, **second)
+    assert key_for(quantized, **first) != key_for(quantized, temperature_c=25.01)
+
+
+def test_derived_fields_do_not_split_keys():
+    cache = PredictionCache()
+    key = key_for(cache)
+    assert key_for(cache, spot_size_nm=1.0, isi_factor=9.9, crosstalk_factor=0.5) == key
+    assert all(name not in prediction_cache.DERIVED_FIELDS for name, _ in key[1])
+    assert key_for(cache, track_pitch_nm=300.0) != key
+
+
+def test_new_version_invalidates_entries():
+    cache = PredictionCache()
+    cache.set_version("v1")
+    key = key_for(cache)
+    cache.put(key, "old")
+    cache.set_version("v1")
+    assert cache.get(key) == "old"
+
+    cache.set_version("v2")
+    assert cache.stats()["size"] == 0 and cache.get(key) is None
+    assert key_for(cache)[0] == "v2" and key_for(cache) != key
+
+
+def test_repeated_requests_hit_the_cache():
+    config = dict(BASE_CONFIG, relative_humidity=61.7)
+    before = client.get("/cache_stats").json()
+    first = client.post("/predict_snr", json=config).json()
+    second = client.post("/predict_snr", json=dict(config, isi_factor=0.123)).json()
+    after = client.get("/cache_stats").json()
+
+    assert first == second
+    assert after["model_version"] == main.prediction_cache.version
+    assert after["hits"] - before["hits"] == 1 and after["misses"] - before["misses"] == 1
+
+
+if __name__ == "__main__":
+    test_least_recently_used_entry_is_evicted()
+    test_quantized_keys_share_an_entry()
+    test_derived_fields_do_not_split_keys()
+    test_new_version_invalidates_entries()
+    test_repeated_requests_hit_the_cache()
+    print("Prediction cache checks passed.")
+
+    cache = PredictionCache(maxsize=1024)
+    canonical = main.standardize_physical_inputs(BASE_CONFIG)
+    cache.put(cache.make_key(canonical, 2.0), {})
+    n = 100_000
+    start = time.perf_counter()
+    for _ in range(n):
+        cache.get(cache.make_key(canonical, 2.0))
+    print(f"key + hit | {(time.perf_counter() - start) / n * 1e6:6.2f} us per lookup")
@@ -0,0 +1,129 @@
+import numpy as np
+
+import main
+from model_bundle import DEFAULT_BUNDLE_ROOT, current_bundle_dir, load_bundle
+from response_lattice import LatticeServer, build_lattice, bundle_evaluator, lattice_spec
+from sample_configs import BASE_CONFIG
+from test_model_registry import shifted_set
+
+# Small layout so the real models can be evaluated on it in a test
+SPEC = lattice_spec(
+    axes={
+        "numerical_aperture": (0.40, 0.95, 4),
+        "track_pitch_nm": (180.0, 1800.0, 5),
+        "temperature_c": (20.0, 80.0, 2),
+        "relative_humidity": (10.0, 90.0, 3)
+    },
+    categories={
+        "laser_wavelength_nm": [405],
+        "recording_material": ["MDISC", "GST_HTL"],
+        "prml_enabled": [0, 1],
+        "ctc_enabled": [1]
+    },
+    fixed={key: BASE_CONFIG[key] for key in
+           ["layer_count", "layer_spacing_nm", "thermal_conductivity_w_mk", "activation_energy_ev"]},
+    channels=["residual", "lower", "upper"]
+)
+
+
+def multilinear(columns, shape):
+    """
+    Linear in each axis (with cross terms), so interpolation is exact.
+    """
+    na = columns["numerical_aperture"]
+    pitch = columns["track_pitch_nm"]
+    temp = columns["temperature_c"]
+    humidity = columns["relative_humidity"]
+    material = (np.asarray(columns["recording_material"]) == "MDISC") * 2.0
+    value = 3 * na - pitch / 900 + na * pitch * temp / 1e4 + 0.01 * humidity + material + columns["prml_enabled"]
+    value = np.broadcast_to(value, shape).reshape(-1)
+    return np.stack([value, value - 1, value + 1])
+
+
+def lattice_node_configs():
+    configs = []
+    for na in np.linspace(0.40, 0.95, 4):
+        for pitch in np.linspace(180.0, 1800.0, 5):
+            configs.append(dict(BASE_CONFIG, numerical_aperture=float(na), track_pitch_nm=float(pitch),
+                                temperature_c=80.0, relative_humidity=50.0, recording_material="MDISC"))
+    return configs
+
+
+def test_interpolation_is_exact_for_multilinear_function(tmp_path):
+    lattice = build_lattice(str(tmp_path / "v1"), multilinear, SPEC, "v1", error_samples=500)
+    assert lattice.values.shape == (4, 4, 5, 2, 3, 3)
+    assert lattice.error_report["channels"]["residual"]["max_abs_error_db"] < 1e-4
+
+    rng = np.random.default_rng(0)
+    columns = {
+        **SPEC["fixed"],
+        "laser_wavelength_nm": 405,
+        "recording_material": rng.choice(["GST_HTL", "MDISC"], 300),
+        "prml_enabled": rng.integers(0, 2, 300),
+        "ctc_enabled": 1,
+        "numerical_aperture": rng.uniform(0.40, 0.95, 300),
+        "track_pitch_nm": rng.uniform(180.0, 1800.0, 300),
+        "temperature_c": rng.uniform(20.0, 80.0, 300),
+        "relative_humidity": rng.uniform(10.0, 90.0, 300)
+    }
+    assert lattice.covers(columns)
+    np.testing.assert_allclose(lattice.interpolate(columns, (300,)), multilinear(columns, (300,)), atol=1e-4)
+
+    assert not lattice.covers(dict(columns, ctc_enabled=0))
+    assert not lattice.covers(dict(columns, laser_wavelength_nm=650))
+    assert not lattice.covers(dict(columns, recording_material="DYE_LTH"))
+    assert not lattice.covers(dict(columns, layer_count=2))
+    assert not lattice.covers(dict(columns, numerical_aperture=0.96))
+
+
+def test_served_batches_match_live_model_on_lattice_nodes(tmp_path, monkeypatch):
+    server = LatticeServer(str(tmp_path), SPEC, main.lattice_evaluator, enabled=True, error_samples=500)
+    monkeypatch.setattr(main, "lattice_server", server)
+    configs = lattice_node_configs()
+    uncovered = [dict(config, layer_count=2) for config in configs]
+    live = main.predict_batch_metrics(configs, bounds=True)
+    live_uncovered = main.predict_batch_metrics(uncovered)
+
+    server.ensure(main.model_registry.current)
+    server.wait()
+    assert server.lattice.model_version == main.model_registry.current.version
+    assert main.lattice_batch_arrays(main.batch_columns(configs), (len(configs),)) is not None
+    served = main.predict_batch_metrics(configs, bounds=True)
+    for expected, metrics in zip(live, served):
+        assert metrics["physics_snr_db"] == expected["physics_snr_db"]
+        for field in ["predicted_snr_db", "snr_lower_bound_db", "snr_upper_bound_db"]:
+            assert abs(metrics[field] - expected[field]) < 1e-4
+
+    # Off-lattice inputs go to the live models
+    assert main.predict_batch_metrics(uncovered) == live_uncovered
+
+
+def test_offline_build_matches_the_server_build(tmp_path):
+    bundle = load_bundle(current_bundle_dir(DEFAULT_BUNDLE_ROOT))
+    assert bundle["version"] == main.model_registry.current.version
+    server = LatticeServer(str(tmp_path / "server"), SPEC, main.lattice_evaluator, error_samples=500)
+    served = server.load_or_build(main.model_registry.current)
+    offline = build_lattice(str(tmp_path / "offline" / bundle["version"]), bundle_evaluator(bundle), SPEC,
+                            bundle["version"], error_samples=500)
+
+    np.testing.assert_allclose(np.asarray(offline.values), np.asarray(served.values), atol=1e-6)
+    assert offline.spec == served.spec and offline.model_version == served.model_version
+
+
+def test_lattice_rebuilds_when_model_version_changes(tmp_path, monkeypatch):
+    server = LatticeServer(str(tmp_path), SPEC, main.lattice_evaluator, enabled=True, error_samples=500)
+    monkeypatch.setattr(main, "lattice_server", server)
+    initial = main.model_registry.current
+    shifted = shifted_set(initial, 1.0, "shifted")
+
+    server.ensure(initial)
+    server.wait()
+    main.on_model_swap(initial, shifted)
+    server.wait()
+
+    assert server.lattice.model_version == "shifted"
+    assert server.lattice_for(initial.version) is None
+    np.testing.assert_allclose(np.asarray(server.lattice.values) - np.asarray(server.load_or_build(initial).values),
+                               1.0, atol=1e-5)
+    main.on_model_swap(None, initial)
+    server.wait()
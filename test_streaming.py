@@ -0,0 +1,52 @@
+import json
+
+import numpy as np
+from fastapi.testclient import TestClient
+
+import main
+from sample_configs import BASE_CONFIG
+
+client = TestClient(main.app)
+
+
+def test_sweep_values_match_linspace():
+    for start, end, steps in [(0.4, 0.95, 2), (180.0, 500.0, 37), (20.0, 80.0, 1001)]:
+        expected = np.linspace(start, end, steps)
+        chunks = [main.sweep_values(start, end, steps, lo, min(lo + 10, steps)) for lo in range(0, steps, 10)]
+        np.testing.assert_array_equal(np.concatenate(chunks), expected)
+
+
+def test_stream_matches_blocking_simulation():
+    sweep = {"sweep_parameter": "track_pitch_nm", "start": 180, "end": 500, "steps": 150}
+    expected = client.post("/simulate_dashboard", json={"base_config": BASE_CONFIG, **sweep}).json()
+
+    response = client.post(
+        "/simulate_dashboard/stream",
+        json={"base_config": BASE_CONFIG, **sweep, "chunk_size": 40}
+    )
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+
+    messages = [json.loads(line) for line in response.text.splitlines()]
+    assert messages[0]["event"] == "start" and messages[-1]["event"] == "end"
+    assert "time_to_first_frame_ms" in messages[1]
+
+    frames = [frame for m in messages if m["event"] == "frames" for frame in m["frames"]]
+    assert frames == expected["frames"]
+    assert messages[-1]["frames_sent"] == 150
+
+
+def test_stream_sse_format():
+    response = client.post(
+        "/simulate_dashboard/stream",
+        json={"base_config": BASE_CONFIG, "start": 0.5, "end": 0.9, "steps": 10, "format": "sse"}
+    )
+    assert response.headers["content-type"].startswith("text/event-stream")
+    events = [block for block in response.text.split("\n\n") if block]
+    assert events[0].startswith("event: start") and events[-1].startswith("event: end")
+
+
+if __name__ == "__main__":
+    test_sweep_values_match_linspace()
+    test_stream_matches_blocking_simulation()
+    test_stream_sse_format()
+    print("Streaming checks passed.")
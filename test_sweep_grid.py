@@ -0,0 +1,90 @@
+import base64
+import itertools
+import time
+
+import numpy as np
+from fastapi.testclient import TestClient
+
+import main
+from sample_configs import BASE_CONFIG
+
+client = TestClient(main.app)
+
+AXES = [
+    {"parameter": "temperature_c", "start": 20, "end": 80, "steps": 7},
+    {"parameter": "relative_humidity", "values": [10, 50, 90]},
+    {"parameter": "recording_material"}
+]
+
+
+def decode(payload, field):
+    raw = base64.b64decode(payload[field])
+    return np.frombuffer(raw, dtype="<f4").reshape(payload["shape"])
+
+
+def test_sweep_grid_matches_batch_path():
+    payload = client.post("/sweep_grid", json={"base_config": BASE_CONFIG, "axes": AXES}).json()
+    assert payload["shape"] == [7, 3, 3]
+
+    axis_values = [axis["values"] for axis in payload["axes"]]
+    candidates = []
+    for temp, humidity, material in itertools.product(*axis_values):
+        candidates.append(dict(BASE_CONFIG, temperature_c=temp, relative_humidity=humidity,
+                               recording_material=material))
+    metrics = main.predict_batch_metrics(candidates)
+
+    expected_snr = np.array([m["predicted_snr_db"] for m in metrics], dtype=np.float32)
+    expected_ber = np.array([m["estimated_ber"] for m in metrics], dtype=np.float32)
+    np.testing.assert_array_equal(decode(payload, "predicted_snr_db").ravel(), expected_snr)
+    np.testing.assert_array_equal(decode(payload, "estimated_ber").ravel(), expected_ber)
+
+
+def test_binary_encoding_matches_base64():
+    body = {"base_config": BASE_CONFIG, "axes": AXES}
+    payload = client.post("/sweep_grid", json=body).json()
+    response = client.post("/sweep_grid", json={**body, "encoding": "binary"})
+
+    assert response.headers["content-type"] == "application/octet-stream"
+    shape = [int(n) for n in response.headers["x-grid-shape"].split(",")]
+    fields = response.headers["x-grid-fields"].split(",")
+    arrays = np.frombuffer(response.content, dtype="<f4").reshape([len(fields)] + shape)
+    for field, values in zip(fields, arrays):
+        np.testing.assert_array_equal(values, decode(payload, field))
+
+
+def test_ber_table_option_stays_close_to_exact_ber():
+    body = {"base_config": BASE_CONFIG, "axes": AXES}
+    exact = client.post("/sweep_grid", json=body).json()
+    table = client.post("/sweep_grid", json={**body, "ber_table": True}).json()
+
+    np.testing.assert_array_equal(decode(table, "predicted_snr_db"), decode(exact, "predicted_snr_db"))
+    np.testing.assert_allclose(decode(table, "estimated_ber"), decode(exact, "estimated_ber"), rtol=2.1e-5)
+
+
+def test_sweep_grid_rejects_oversized_grid():
+    axes = [{"parameter": p, "start": 0, "end": 1, "steps": 200}
+            for p in ["numerical_aperture", "temperature_c", "relative_humidity"]]
+    payload = client.post("/sweep_grid", json={"base_config": BASE_CONFIG, "axes": axes}).json()
+    assert "error" in payload
+
+
+if __name__ == "__main__":
+    test_sweep_grid_matches_batch_path()
+    test_binary_encoding_matches_base64()
+    test_ber_table_option_stays_close_to_exact_ber()
+    test_sweep_grid_rejects_oversized_grid()
+    print("Sweep grid checks passed.")
+
+    body = {
+        "base_config": BASE_CONFIG,
+        "axes": [
+            {"parameter": "numerical_aperture", "start": 0.4, "end": 0.95, "steps": 500},
+            {"parameter": "track_pitch_nm", "start": 180, "end": 1800, "steps": 500}
+        ]
+    }
+    for encoding in ["base64", "binary"]:
+        client.post("/sweep_grid", json={**body, "encoding": encoding})
+        start = time.perf_counter()
+        response = client.post("/sweep_grid", json={**body, "encoding": encoding})
+        elapsed = time.perf_counter() - start
+        print(f"500x500 {encoding:<7} | {len(response.content) / 1e6:5.2f} MB | {elapsed * 1e3:7.1f} ms")
@@ -0,0 +1,37 @@
+import numpy as np
+from sklearn.ensemble import HistGradientBoostingRegressor
+
+import generate_osis_dataset as gen
+import train_model
+from tree_engine import compile_model
+
+
+def test_fast_pipeline_trains_compilable_models(tmp_path):
+    gen.generate_store(2000, str(tmp_path / "osis_dataset"), seed=2, chunk_size=2000, workers=1)
+    X, y, features, _ = train_model.load_data(root=str(tmp_path / "osis_dataset"))
+
+    models, best_params, timings = train_model.fit_pipeline(X, y, fast=True, n_trials=3, n_jobs=1)
+    ensemble = models["ensemble"]
+    assert isinstance(ensemble.named_estimators_["gb"], HistGradientBoostingRegressor)
+    assert set(best_params) == {"max_iter", "learning_rate", "max_leaf_nodes", "min_samples_leaf",
+                                "l2_regularization"}
+    assert {"optuna", "ensemble", "quantiles", "explainer", "total"} <= set(timings)
+
+    # The explainer explains the stacked GB (SHAP values add up to its output)
+    shap_values = models["explainer"].shap_values(X.iloc[:3])
+    assert shap_values.shape == (3, len(features))
+    np.testing.assert_allclose(models["explainer"].expected_value + shap_values.sum(axis=1),
+                               ensemble.named_estimators_["gb"].predict(X.iloc[:3]), atol=1e-6)
+
+    # Every model compiles for the array engine and the bundle
+    X_new = X.to_numpy()
+    for name in ["ensemble", "lower", "upper"]:
+        np.testing.assert_allclose(compile_model(models[name]).predict(X_new), models[name].predict(X),
+                                   rtol=0, atol=1e-9)
+    assert np.mean(models["lower"].predict(X) <= models["upper"].predict(X)) > 0.95
+
+
+if __name__ == "__main__":
+    # Full wall-clock and accuracy comparison; needs osis_dataset/ or
+    # osis_dataset.csv in the working directory (no artifacts are written)
+    train_model.compare()
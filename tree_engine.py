@@ -0,0 +1,337 @@
+"""
+Array-backed inference for the fitted tree ensembles.
+
+Every tree of a fitted scikit-learn model is flattened into contiguous NumPy
+node arrays (feature, threshold, left/right child, leaf value). A whole batch
+is then routed through all trees at once with one vectorized step per tree
+level, instead of going through the per-call validation and per-estimator
+Python dispatch of `StackingRegressor.predict`.
+"""
+import numpy as np
+
+# sklearn marks leaves with children_left == -1
+TREE_LEAF = -1
+
+# Upper bound on rows * trees routed per traversal chunk. Small chunks keep the
+# node-index matrices cache-resident and bound memory for very large batches.
+MAX_TRAVERSAL_CELLS = 65_536
+
+
+class FlatForest:
+    """
+    All trees of one additive tree model packed into contiguous node arrays.
+
+    prediction = offset + scale * sum(leaf value of every tree)
+
+    Leaves point to themselves with an infinite threshold, so every row can be
+    advanced `depth` times without tracking which rows already reached a leaf.
+    """
+
+    def __init__(self, feature, threshold, left, right, value, roots, depth,
+                 scale=1.0, offset=0.0, n_features=None, cast_float32=True, children=None):
+        self.feature = np.ascontiguousarray(feature, dtype=np.int64)
+        self.threshold = np.ascontiguousarray(threshold, dtype=np.float64)
+        self.left = np.ascontiguousarray(left, dtype=np.int64)
+        self.right = np.ascontiguousarray(right, dtype=np.int64)
+        self.value = np.ascontiguousarray(value, dtype=np.float64)
+        self.roots = np.ascontiguousarray(roots, dtype=np.int64)
+        self.depth = int(depth)
+        self.scale = float(scale)
+        self.offset = float(offset)
+        self.n_features = n_features
+        self.cast_float32 = bool(cast_float32)
+        # Left/right child of node i at 2i/2i+1: one gather per level. A
+        # bundle stores it, so mapped forests do not build a private copy
+        if children is None:
+            children = np.column_stack([self.left, self.right]).ravel()
+        self.children = np.ascontiguousarray(children, dtype=np.int64)
+
+    @property
+    def n_trees(self) -> int:
+        return len(self.roots)
+
+    @classmethod
+    def from_sklearn_trees(cls, trees, scale=1.0, offset=0.0, n_features=None):
+        """
+        Pack fitted sklearn `Tree` objects (`estimator.tree_`) into one forest.
+        """
+        features, thresholds, lefts, rights, values, roots = [], [], [], [], [], []
+        depth = 0
+        base = 0
+
+        for tree in trees:
+            n_nodes = tree.node_count
+            node_ids = np.arange(n_nodes) + base
+            is_leaf = tree.children_left == TREE_LEAF
+
+            features.append(np.where(is_leaf, 0, tree.feature))
+            thresholds.append(np.where(is_leaf, np.inf, tree.threshold))
+            lefts.append(np.where(is_leaf, node_ids, tree.children_left + base))
+            rights.append(np.where(is_leaf, node_ids, tree.children_right + base))
+            values.append(tree.value.reshape(n_nodes, -1)[:, 0])
+            roots.append(base)
+
+            depth = max(depth, int(tree.max_depth))
+            base += n_nodes
+
+        return cls(
+            np.concatenate(features),
+            np.concatenate(thresholds),
+            np.concatenate(lefts),
+            np.concatenate(rights),
+            np.concatenate(values),
+            np.asarray(roots),
+            depth,
+            scale=scale,
+            offset=offset,
+            n_features=n_features
+        )
+
+    @classmethod
+    def from_hist_predictors(cls, predictors, offset=0.0, n_features=None):
+        """
+        Pack the `TreePredictor`s of a HistGradientBoosting model. Their
+        leaf values already include the learning rate, and splits compare
+        the float64 inputs directly (no float32 cast).
+        """
+        features, thresholds, lefts, rights, values, roots = [], [], [], [], [], []
+        depth = 0
+        base = 0
+
+        for predictor in predictors:
+            nodes = predictor.nodes
+            n_nodes = len(nodes)
+            node_ids = np.arange(n_nodes) + base
+            is_leaf = nodes["is_leaf"].astype(bool)
+
+            features.append(np.where(is_leaf, 0, nodes["feature_idx"]))
+            thresholds.append(np.where(is_leaf, np.inf, nodes["num_threshold"]))
+            lefts.append(np.where(is_leaf, node_ids, nodes["left"].astype(np.int64) + base))
+            rights.append(np.where(is_leaf, node_ids, nodes["right"].astype(np.int64) + base))
+            values.append(nodes["value"])
+            roots.append(base)
+
+            depth = max(depth, int(nodes["depth"].max()))
+            base += n_nodes
+
+        return cls(
+            np.concatenate(features),
+            np.concatenate(thresholds),
+            np.concatenate(lefts),
+            np.concatenate(rights),
+            np.concatenate(values),
+            np.asarray(roots),
+            depth,
+            offset=offset,
+            n_features=n_features,
+            cast_float32=False
+        )
+
+    def _prepare(self, X):
+        X = np.asarray(X)
+        if X.ndim == 1:
+            X = X.reshape(1, -1)
+        if self.n_features is not None and X.shape[1] != self.n_features:
+            raise ValueError(
+                f"X has {X.shape[1]} features, but the model expects {self.n_features}."
+            )
+        # sklearn trees compare float32 inputs against float64 thresholds
+        if self.cast_float32:
+            X = X.astype(np.float32)
+        return np.ascontiguousarray(X, dtype=np.float64)
+
+    def _leaf_values(self, X):
+        """
+        (n_rows, n_trees) leaf value each row reaches in every tree.
+        """
+        n_rows, n_cols = X.shape
+        flat_X = X.ravel()
+        row_offsets = (np.arange(n_rows) * n_cols)[:, None]
+
+        nodes = np.repeat(self.roots[None, :], n_rows, axis=0)
+        for _ in range(self.depth):
+            go_left = flat_X[row_offsets + self.feature[nodes]] <= self.threshold[nodes]
+            nodes = self.children[2 * nodes + 1 - go_left]
+
+        return self.value[nodes]
+
+    def _tree_sum(self, X):
+        return self._leaf_values(X).sum(axis=1)
+
+    def predict(self, X):
+        X = self._prepare(X)
+        n_rows = X.shape[0]
+        out = np.empty(n_rows, dtype=np.float64)
+
+        chunk = max(1, MAX_TRAVERSAL_CELLS // max(self.n_trees, 1))
+        for start in range(0, n_rows, chunk):
+            stop = min(start + chunk, n_rows)
+            out[start:stop] = self._tree_sum(X[start:stop])
+
+        return self.offset + self.scale * out
+
+
+class CompiledStacking:
+    """
+    Stacked ensemble: base model predictions become the meta-learner inputs.
+    """
+
+    def __init__(self, base_models, final_model):
+        self.base_models = list(base_models)
+        self.final_model = final_model
+
+    @property
+    def n_features(self):
+        return self.base_models[0].n_features
+
+    def transform(self, X):
+        return np.column_stack([m.predict(X) for m in self.base_models])
+
+    def predict(self, X):
+        return self.final_model.predict(self.transform(X))
+
+
+class FusedForests:
+    """
+    Several FlatForests that read the same inputs, packed into one node
+    array set. A batch is prepared once and routed through every tree in a
+    single traversal; the leaf values are then summed per forest.
+    """
+
+    def __init__(self, forests):
+        forests = list(forests)
+        if not forests or not all(isinstance(forest, FlatForest) for forest in forests):
+            raise TypeError("FusedForests needs FlatForest models")
+        if len({forest.cast_float32 for forest in forests}) > 1:
+            raise ValueError("Cannot fuse forests with different input casts")
+
+        node_base = np.cumsum([0] + [len(forest.feature) for forest in forests])[:-1]
+        tree_base = np.cumsum([0] + [forest.n_trees for forest in forests])
+        self.combined = FlatForest(
+            np.concatenate([forest.feature for forest in forests]),
+            np.concatenate([forest.threshold for forest in forests]),
+            np.concatenate([forest.left + base for forest, base in zip(forests, node_base)]),
+            np.concatenate([forest.right + base for forest, base in zip(forests, node_base)]),
+            np.concatenate([forest.value for forest in forests]),
+            np.concatenate([forest.roots + base for forest, base in zip(forests, node_base)]),
+            max(forest.depth for forest in forests),
+            n_features=forests[0].n_features,
+            cast_float32=forests[0].cast_float32
+        )
+        self.tree_slices = [slice(int(a), int(b)) for a, b in zip(tree_base[:-1], tree_base[1:])]
+        self.scales = np.array([forest.scale for forest in forests])
+        self.offsets = np.array([forest.offset for forest in forests])
+
+    def predict(self, X):
+        """
+        (n_rows, n_forests) predictions, one column per forest.
+        """
+        X = self.combined._prepare(X)
+        n_rows = X.shape[0]
+        out = np.empty((n_rows, len(self.tree_slices)), dtype=np.float64)
+
+        chunk = max(1, MAX_TRAVERSAL_CELLS // max(self.combined.n_trees, 1))
+        for start in range(0, n_rows, chunk):
+            stop = min(start + chunk, n_rows)
+            leaves = self.combined._leaf_values(X[start:stop])
+            for column, trees in enumerate(self.tree_slices):
+                out[start:stop, column] = leaves[:, trees].sum(axis=1)
+
+        return self.offsets + self.scales * out
+
+
+class FusedEnsemble:
+    """
+    Named models (FlatForest or CompiledStacking) evaluated on one feature
+    matrix. Every forest that reads X, stand-alone or a stack's base model,
+    goes through one FusedForests traversal; each stack then applies its
+    meta-learner to its base columns.
+    """
+
+    def __init__(self, models):
+        forests, self.layout = [], {}
+        for name, model in models.items():
+            if isinstance(model, CompiledStacking):
+                self.layout[name] = (list(range(len(forests), len(forests) + len(model.base_models))),
+                                     model.final_model)
+                forests.extend(model.base_models)
+            else:
+                self.layout[name] = ([len(forests)], None)
+                forests.append(model)
+        self.fused = FusedForests(forests)
+
+    def predict(self, X):
+        """
+        Name -> predictions for every model.
+        """
+        outputs = self.fused.predict(X)
+        return {
+            name: outputs[:, columns[0]] if final is None else final.predict(outputs[:, columns])
+            for name, (columns, final) in self.layout.items()
+        }
+
+
+# -------------------------
+# COMPILATION FROM SKLEARN
+# -------------------------
+def _constant_init(estimator, n_features):
+    init = estimator.init_
+    if isinstance(init, str) and init == "zero":
+        return 0.0
+    if type(init).__name__ != "DummyRegressor":
+        raise ValueError(f"Unsupported init estimator for compilation: {init!r}")
+    return float(np.ravel(init.predict(np.zeros((1, n_features))))[0])
+
+
+def compile_model(estimator):
+    """
+    Flatten a fitted regressor into an array-backed model with `.predict(X)`.
+
+    Supports GradientBoostingRegressor, HistGradientBoostingRegressor
+    (numerical features, identity link; NaN inputs are not routed like
+    sklearn), RandomForest/ExtraTrees regressors, DecisionTreeRegressor and
+    StackingRegressor built from those.
+    """
+    name = type(estimator).__name__
+    n_features = getattr(estimator, "n_features_in_", None)
+
+    if name == "StackingRegressor":
+        if estimator.passthrough:
+            raise ValueError("StackingRegressor with passthrough=True is not supported.")
+        if any(method != "predict" for method in estimator.stack_method_):
+            raise ValueError("Only stack_method='predict' is supported.")
+        return CompiledStacking(
+            [compile_model(est) for est in estimator.estimators_],
+            compile_model(estimator.final_estimator_)
+        )
+
+    if name == "GradientBoostingRegressor":
+        return FlatForest.from_sklearn_trees(
+            [est.tree_ for est in estimator.estimators_[:, 0]],
+            scale=estimator.learning_rate,
+            offset=_constant_init(estimator, n_features),
+            n_features=n_features
+        )
+
+    if name == "HistGradientBoostingRegressor":
+        if estimator.is_categorical_ is not None and estimator.is_categorical_.any():
+            raise ValueError("HistGradientBoostingRegressor with categorical features is not supported.")
+        if type(estimator._loss.link).__name__ != "IdentityLink":
+            raise ValueError(f"Unsupported HistGradientBoostingRegressor loss: {estimator.loss!r}")
+        return FlatForest.from_hist_predictors(
+            [trees[0] for trees in estimator._predictors],
+            offset=float(np.ravel(estimator._baseline_prediction)[0]),
+            n_features=n_features
+        )
+
+    if name in {"RandomForestRegressor", "ExtraTreesRegressor"}:
+        return FlatForest.from_sklearn_trees(
+            [est.tree_ for est in estimator.estimators_],
+            scale=1.0 / len(estimator.estimators_),
+            n_features=n_features
+        )
+
+    if name in {"DecisionTreeRegressor", "ExtraTreeRegressor"}:
+        return FlatForest.from_sklearn_trees([estimator.tree_], n_features=n_features)
+
+    raise TypeError(f"Cannot compile estimator of type {name}")